@@ -0,0 +1,39 @@
+// Clientside stakeholder pie and table filtering, used by the apps when the stakeholder table is
+// small enough to be sent to the browser once (see stakeholder_clientside). The
+// 'stakeholder-client-data' store holds the table records, the column behind each dropdown
+// option and a serialized pie per option; the server callbacks update_pie and filter_table do
+// the same work for larger tables.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    stakeholders: {
+        updatePie: function(filterBy, clickData, currentSelected, store) {
+            if (!store) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+            const pie = store.pies[filterBy];
+            const triggered = window.dash_clientside.callback_context.triggered.map(t => t.prop_id);
+
+            // Toggle the clicked slice; switching the dropdown clears the selection
+            let selected = null;
+            if (clickData && triggered.includes('piechart.clickData')) {
+                const clicked = clickData.points[0].label;
+                selected = clicked === currentSelected ? null : clicked;
+            }
+
+            const trace = Object.assign({}, pie.data[0], {
+                pull: pie.data[0].labels.map(name => name === selected ? 0.2 : 0)
+            });
+            return [Object.assign({}, pie, {data: [trace]}), selected];
+        },
+
+        filterTable: function(filterBy, selected, store) {
+            if (!store) {
+                return window.dash_clientside.no_update;
+            }
+            if (!selected) {
+                return store.records;
+            }
+            const column = store.columns[filterBy];
+            return store.records.filter(row => row[column] === selected);
+        }
+    }
+});
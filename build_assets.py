@@ -0,0 +1,189 @@
+"""
+Build web variants of the dashboard images into assets/build/, which Dash serves with the
+other assets.
+
+- Every image in IMAGE_FOLDERS is resized to each width of IMAGE_WIDTHS (never upscaled) and
+  saved as WebP and, where Pillow supports it, AVIF. CityDashboard.image() and
+  CityDashboard.background_image() offer these to the browser through srcset / image-set(),
+  falling back to the original file for images without variants.
+- The 17 SDG filter icons (sustainability tab) are packed into one sprite sheet
+  (sdg_sprite.webp and .png) with sdg_sprite.css, a class per goal. The sprite is built from
+  the RGB web icons, or from the CMYK print JPGs (converted to RGB) where one is missing.
+
+Like build_data.py, a manifest with the SHA-256 of each source is kept next to the output, so
+only changed images are rebuilt. Restart the apps after a build to pick up new variants.
+
+Usage:
+    python build_assets.py               # incremental build into assets/build/
+    python build_assets.py --force       # rebuild everything
+
+Needs Pillow (AVIF needs Pillow >= 11.3 built with libavif, or the pillow-avif-plugin package).
+"""
+import argparse
+import os
+
+from PIL import Image, features
+
+from build_data import file_hash, load_manifest, save_manifest
+from dashboard_components import sdg_goals, sdg_icon_file
+
+IMAGE_FOLDERS = ['photos', 'logos']
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+IMAGE_WIDTHS = (480, 960, 1920)
+QUALITY = {'webp': 80, 'avif': 60}
+
+SDG_WEB_ICONS = sdg_icon_file
+SDG_PRINT_ICONS = os.path.join('logos', 'SDG logos', 'SDG Print Files w- UN Emblem', 'E SDG Square Icons',
+                               'print', 'E_SDG goals_icons-individual-cmyk-{:02d}.jpg')
+SDG_GOALS = sdg_goals
+SDG_ICON_SIZE = 160  # px, twice the size the icons are shown at
+SDG_SPRITE = 'sdg_sprite'
+
+
+def image_formats():
+    """Output formats this Pillow can write, best first."""
+    try:
+        import pillow_avif  # noqa: F401 -- registers the AVIF plugin with older Pillow
+    except ImportError:
+        pass
+    return (['avif'] if features.check('avif') else []) + ['webp']
+
+
+def source_images(assets_path):
+    """Images directly in IMAGE_FOLDERS, as paths relative to `assets_path`."""
+    for folder in IMAGE_FOLDERS:
+        for filename in sorted(os.listdir(os.path.join(assets_path, folder))):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(folder, filename)
+
+
+def open_rgb(source):
+    """Open `source` as RGB(A) -- print JPGs are CMYK, which browsers render unreliably."""
+    img = Image.open(source)
+    img.load()
+    if img.mode in ('RGB', 'RGBA'):
+        return img
+    has_alpha = img.mode in ('LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    return img.convert('RGBA' if has_alpha else 'RGB')
+
+
+def build_variants(source, relpath, build_path, formats):
+    """Write the resized variants of `source`; returns its manifest entry."""
+    img = open_rgb(source)
+    stem = os.path.splitext(relpath)[0]
+    widths = [w for w in IMAGE_WIDTHS if w < img.width] + [img.width]
+    variants = {fmt: {} for fmt in formats}
+    for width in widths:
+        resized = img if width == img.width else img.resize(
+            (width, round(img.height * width / img.width)), Image.LANCZOS)
+        for fmt in formats:
+            output = f"{stem}-{width}.{fmt}"
+            target = os.path.join(build_path, output)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            resized.save(target, fmt.upper(), quality=QUALITY[fmt])
+            variants[fmt][str(width)] = output
+    return {'width': img.width, 'height': img.height, 'variants': variants}
+
+
+def sdg_icon_sources(assets_path):
+    """Icon of every goal (relative path): the web PNG, else the print JPG."""
+    return [SDG_WEB_ICONS.format(goal) if os.path.exists(os.path.join(assets_path, SDG_WEB_ICONS.format(goal)))
+            else SDG_PRINT_ICONS.format(goal) for goal in SDG_GOALS]
+
+
+def build_sdg_sprite(assets_path, build_path, icons):
+    """
+    Pack the SDG `icons` side by side into sdg_sprite.webp/.png and write sdg_sprite.css, with
+    a .sdg-icon-N class per goal. Returns the manifest entry of the sprite.
+    """
+    sources = [os.path.join(assets_path, icon) for icon in icons]
+
+    sprite = Image.new('RGB', (SDG_ICON_SIZE * len(sources), SDG_ICON_SIZE), 'white')
+    for position, source in enumerate(sources):
+        icon = open_rgb(source).convert('RGB').resize((SDG_ICON_SIZE, SDG_ICON_SIZE), Image.LANCZOS)
+        sprite.paste(icon, (position * SDG_ICON_SIZE, 0))
+    sprite.save(os.path.join(build_path, SDG_SPRITE + '.webp'), 'WEBP', quality=QUALITY['webp'])
+    sprite.save(os.path.join(build_path, SDG_SPRITE + '.png'), 'PNG', optimize=True)
+
+    # Icons are scaled with the element: the sheet is len(goals) elements wide
+    rules = [
+        ".sdg-icon {\n"
+        "    display: block;\n"
+        "    aspect-ratio: 1;\n"
+        f"    background-image: url('{SDG_SPRITE}.png');\n"
+        f"    background-image: image-set(url('{SDG_SPRITE}.webp') type('image/webp'), "
+        f"url('{SDG_SPRITE}.png') type('image/png'));\n"
+        f"    background-size: {len(sources) * 100}% 100%;\n"
+        "}\n"
+    ]
+    for position, goal in enumerate(SDG_GOALS):
+        rules.append(f".sdg-icon-{goal} {{ background-position: {100 * position / (len(sources) - 1):.4f}% 0; }}\n")
+    with open(os.path.join(build_path, SDG_SPRITE + '.css'), 'w') as f:
+        f.write("/* Generated by build_assets.py, do not edit */\n" + "".join(rules))
+
+    return {
+        'sha256': [file_hash(source) for source in sources],
+        'sources': icons,
+        'goals': list(SDG_GOALS),
+        'outputs': [SDG_SPRITE + ext for ext in ('.webp', '.png', '.css')],
+    }
+
+
+def build(assets_path, build_path, force=False):
+    """
+    Build the variants of every image whose content hash changed since the last build, and the
+    SDG sprite. Returns the list of rebuilt images (relative paths).
+    """
+    os.makedirs(build_path, exist_ok=True)
+    manifest = load_manifest(build_path)
+    formats = image_formats()
+    rebuilt = []
+
+    images = list(source_images(assets_path))
+    for relpath in images:
+        source = os.path.join(assets_path, relpath)
+        digest = file_hash(source)
+        previous = manifest.get(relpath, {})
+        outputs = [out for variants in previous.get('variants', {}).values() for out in variants.values()]
+        if (not force and previous.get('sha256') == digest and list(previous.get('variants', {})) == formats
+                and all(os.path.exists(os.path.join(build_path, out)) for out in outputs)):
+            continue
+        entry = manifest[relpath] = {'sha256': digest, **build_variants(source, relpath, build_path, formats)}
+        rebuilt.append(relpath)
+        full_width = {fmt: os.path.getsize(os.path.join(build_path, variants[str(entry['width'])]))
+                      for fmt, variants in entry['variants'].items()}
+        print(f"built {relpath} ({os.path.getsize(source):,} bytes -> "
+              + ", ".join(f"{fmt}: {size:,}" for fmt, size in full_width.items()) + " at full width)")
+
+    icons = sdg_icon_sources(assets_path)
+    previous = manifest.get('sprites/' + SDG_SPRITE, {})
+    if (force or previous.get('sources') != icons
+            or previous.get('sha256') != [file_hash(os.path.join(assets_path, icon)) for icon in icons]
+            or not all(os.path.exists(os.path.join(build_path, out)) for out in previous.get('outputs', []))):
+        manifest['sprites/' + SDG_SPRITE] = build_sdg_sprite(assets_path, build_path, icons)
+        rebuilt.append('sprites/' + SDG_SPRITE)
+        print(f"built {SDG_SPRITE} from {len(icons)} icons ("
+              f"{sum(icon == SDG_PRINT_ICONS.format(goal) for goal, icon in zip(SDG_GOALS, icons))} from print files)")
+
+    # Forget images that no longer exist
+    for relpath in [p for p in manifest if not p.startswith('sprites/') and p not in images]:
+        for variants in manifest.pop(relpath).get('variants', {}).values():
+            for output in variants.values():
+                target = os.path.join(build_path, output)
+                if os.path.exists(target):
+                    os.remove(target)
+
+    save_manifest(build_path, manifest)
+    return rebuilt
+
+
+if __name__ == '__main__':
+    homepath = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--assets', default=os.path.join(homepath, 'assets'))
+    parser.add_argument('--out', default=os.path.join(homepath, 'assets', 'build'))
+    parser.add_argument('--force', action='store_true', help='rebuild images even if unchanged')
+    args = parser.parse_args()
+
+    rebuilt = build(args.assets, args.out, force=args.force)
+    print(f"{len(rebuilt)} asset(s) rebuilt into {args.out}")
@@ -0,0 +1,219 @@
+"""
+Convert the dashboard inputs under assets/data/ into typed Parquet / GeoParquet files.
+
+The apps read these through DatasetRegistry.read_table() whenever they are present and newer
+than their source, which avoids re-parsing CSV and GeoJSON text on every start. A manifest with
+the SHA-256 of each source file is kept next to the output, so only changed files are rebuilt.
+
+The same command writes pre-simplified, coordinate-quantized copies of the boundary files in
+BOUNDARY_FILES for each zoom level in BOUNDARY_LEVELS (data_build/boundaries/), which the map
+callbacks pick from according to their zoom.
+
+Usage:
+    python build_data.py                 # incremental build into data_build/
+    python build_data.py --force         # rebuild everything
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+
+from dashboard_data import (BOUNDARY_FILES, BOUNDARY_LEVELS, GEO_EXTENSIONS, boundary_file,
+                            built_file, read_source)
+
+DATA_EXTENSIONS = ('.csv',) + GEO_EXTENSIONS
+MANIFEST = 'manifest.json'
+
+
+def file_hash(filepath, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_files(source_path):
+    """Data files under `source_path`, as paths relative to it."""
+    for root, _, files in os.walk(source_path):
+        for filename in sorted(files):
+            if filename.endswith(DATA_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, filename), source_path)
+
+
+def load_manifest(build_path):
+    try:
+        with open(os.path.join(build_path, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(build_path, manifest):
+    with open(os.path.join(build_path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def convert(source, target):
+    """Write `source` (CSV or GeoJSON) as Parquet / GeoParquet to `target`."""
+    df = read_source(source)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if source.endswith(GEO_EXTENSIONS):
+        df.to_parquet(target)
+    else:
+        df.to_parquet(target, index=False)
+
+
+def snap_to_grid(geom, grid_size):
+    """
+    `geom` with its coordinates snapped to a grid of `grid_size`. Invalid shapes (on which GEOS
+    raises, e.g. "unable to assign free hole to a shell") are repaired first; a shape that still
+    fails, or stops being a polygon, is kept unsnapped.
+    """
+    import shapely
+
+    try:
+        snapped = shapely.set_precision(shapely.make_valid(geom), grid_size=grid_size)
+    except shapely.errors.GEOSException:
+        return geom
+    return snapped if snapped.geom_type in ('Polygon', 'MultiPolygon') else geom
+
+
+def simplify_boundaries(gdf, tolerance):
+    """
+    Simplify polygons by `tolerance` (degrees) without breaking shared borders, then snap the
+    coordinates to a grid of a tenth of the tolerance. Needs topojson.
+    """
+    import topojson
+
+    # Shared edges are simplified once, so neighbouring districts stay gap-free
+    simplified = topojson.Topology(gdf, prequantize=False, toposimplify=tolerance).to_gdf()
+    simplified = simplified.set_crs(gdf.crs, allow_override=True)
+    simplified['geometry'] = [snap_to_grid(geom, tolerance / 10) for geom in simplified.geometry]
+    return simplified
+
+
+def build_boundaries(source_path, build_path, manifest, force=False):
+    """
+    Write the simplified levels of every file in BOUNDARY_FILES whose source or levels changed.
+    Skipped with a warning without topojson: simplifying each polygon on its own would open gaps
+    and slivers between districts, so the maps keep the full-detail boundaries instead.
+    """
+    rebuilt = []
+    if importlib.util.find_spec('topojson') is None:
+        print("warning: topojson is not installed, boundary files not simplified "
+              "(the maps use the full-detail boundaries)", file=sys.stderr)
+        return rebuilt
+    for filename, options in BOUNDARY_FILES.items():
+        source = os.path.join(source_path, filename)
+        if not os.path.exists(source):
+            continue
+        key = 'boundaries/' + filename
+        digest = file_hash(source)
+        levels = {str(zoom): tolerance for zoom, tolerance in BOUNDARY_LEVELS.items()}
+        outputs = [boundary_file(build_path, filename, zoom) for zoom in BOUNDARY_LEVELS]
+        previous = manifest.get(key, {})
+        if (not force and previous.get('sha256') == digest and previous.get('levels') == levels
+                and all(os.path.exists(out) for out in outputs)):
+            for out in outputs:
+                if os.path.getmtime(out) < os.path.getmtime(source):
+                    os.utime(out)
+            continue
+
+        gdf = read_source(source)
+        if gdf.crs is not None:
+            gdf = gdf.to_crs('EPSG:4326')
+        if 'filter' in options:
+            column, value = options['filter']
+            gdf = gdf[gdf[column] == value]
+        gdf = gdf[options['keep'] + ['geometry']].reset_index(drop=True)
+
+        # Outputs of levels no longer in BOUNDARY_LEVELS
+        for stale in set(previous.get('outputs', [])) - {os.path.relpath(out, build_path) for out in outputs}:
+            if os.path.exists(os.path.join(build_path, stale)):
+                os.remove(os.path.join(build_path, stale))
+
+        sizes = {}
+        for (zoom, tolerance), out in zip(BOUNDARY_LEVELS.items(), outputs):
+            geojson = json.loads(simplify_boundaries(gdf, tolerance).to_json())
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            with open(out, 'w') as f:
+                json.dump(geojson, f, separators=(',', ':'))
+            sizes[str(zoom)] = os.path.getsize(out)
+
+        manifest[key] = {
+            'sha256': digest,
+            'levels': levels,
+            'outputs': [os.path.relpath(out, build_path) for out in outputs],
+            'source_bytes': os.path.getsize(source),
+            'output_bytes': sizes,
+        }
+        rebuilt.append(key)
+        print(f"simplified {filename} ({os.path.getsize(source):,} bytes -> "
+              + ", ".join(f"z{zoom}: {size:,}" for zoom, size in sizes.items()) + ")")
+    return rebuilt
+
+
+def build(source_path, build_path, force=False):
+    """
+    Build every data file in `source_path` whose content hash changed since the last build.
+    Returns the list of rebuilt files (relative paths).
+    """
+    os.makedirs(build_path, exist_ok=True)
+    manifest = load_manifest(build_path)
+    rebuilt = []
+
+    # The manifest is saved even if a file fails, so the files built before it are not
+    # rebuilt on the next run
+    try:
+        for relpath in source_files(source_path):
+            source = os.path.join(source_path, relpath)
+            target = built_file(build_path, relpath)
+            digest = file_hash(source)
+
+            if not force and manifest.get(relpath, {}).get('sha256') == digest and os.path.exists(target):
+                # Unchanged content: keep the output but make sure it still counts as fresh
+                if os.path.getmtime(target) < os.path.getmtime(source):
+                    os.utime(target)
+                continue
+
+            start = time.perf_counter()
+            convert(source, target)
+            manifest[relpath] = {
+                'sha256': digest,
+                'output': os.path.relpath(target, build_path),
+                'source_bytes': os.path.getsize(source),
+                'output_bytes': os.path.getsize(target),
+            }
+            rebuilt.append(relpath)
+            print(f"built {relpath} ({time.perf_counter() - start:.2f}s, "
+                  f"{manifest[relpath]['source_bytes']:,} -> {manifest[relpath]['output_bytes']:,} bytes)")
+
+        rebuilt += build_boundaries(source_path, build_path, manifest, force=force)
+
+        # Forget files that no longer exist in the source folder
+        current = set(source_files(source_path)) | {'boundaries/' + f for f in BOUNDARY_FILES}
+        for relpath in [p for p in manifest if p not in current]:
+            entry = manifest.pop(relpath)
+            for output in entry.get('outputs', [entry.get('output')]):
+                target = os.path.join(build_path, output)
+                if os.path.exists(target):
+                    os.remove(target)
+    finally:
+        save_manifest(build_path, manifest)
+    return rebuilt
+
+
+if __name__ == '__main__':
+    homepath = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=os.path.join(homepath, 'assets', 'data'))
+    parser.add_argument('--out', default=os.path.join(homepath, 'data_build'))
+    parser.add_argument('--force', action='store_true', help='rebuild files even if unchanged')
+    args = parser.parse_args()
+
+    rebuilt = build(args.source, args.out, force=args.force)
+    print(f"{len(rebuilt)} file(s) rebuilt into {args.out}")
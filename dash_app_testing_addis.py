@@ -1,155 +1,88 @@
-import os
 import numpy as np
-import xarray as xr
-import rioxarray as rxr
-import matplotlib.pyplot as plt
 import pandas as pd
-import geopandas as gpd
-import matplotlib.colors as colors
-import seaborn as sns
 import plotly.express as px
 import json
 import dash
-from dash import Dash, html, dcc, Output, Input, State, callback, dash_table
+from dash import ALL, html, dcc, Output, Input, Patch, State, dash_table
 import dash_bootstrap_components as dbc
-import dash_leaflet as dl
-from dash_extensions.javascript import assign
-import random
-from matplotlib.colors import ListedColormap, LinearSegmentedColormap
 import plotly.graph_objects as go
-from lorem_text import lorem
 
+import logging
 import warnings
 warnings.filterwarnings("ignore")
 
-from dashboard_components import create_nutrition_kpi_card
-
-app = Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
-
-#colors = {
-#  'eco_green': '#AFC912',
-#  'forest_green': '#4C7A2E',
-#  'earth_brown': '#7B5E34',
-#  'harvest_yellow': '#F2D16B',
-#  'neutral_light': '#F5F5F5',
-#  'dark_text': '#333333',
-#  'accent_warm': '#E07A5F'
-#}
-
-
-green_gradient = [
-    "#095d40",
-    "#206044",
-    "#3a6649",
-    "#547d5b",
-    "#6f946d",
-    "#8aa97f",
-    "#a5be91",
-    "#b8d099",
-    "#c1d88e",
-    "#d1e7a8"
-]
-
-brand_colors = {    'Black':         '#333333',
-                    "Brown":         "#313715",
-                    "Red":           "#A80050",
-                    "Dark green":    "#939f5c",
-                    "Mid green":     "#bbce8a",
-                    "Light green":   "#E8F0DA",
-                    "White":         "#ffffff"  
+from dashboard_app import CityDashboard, debug, figure_cache
+from dashboard_components import (brand_colors, card_style, header_style, kpi_card_style_2, nutrition_kpi_sections,
+                                  sdg_filter_class_name, shared_styles)
+from dashboard_data import OutletLayerStore, TableQuery
+
+# ------------------------- City configuration ------------------------- #
+
+# Data files, column names, map zoom and tab labels of Addis Ababa. The datasets, sidebar, footer
+# and callbacks every city shares are built from this by CityDashboard (see dashboard_app.py),
+# which mounts the app under /addis/ on the server shared by all cities.
+config = {
+    'name': 'Addis Ababa',
+    'slug': 'addis',
+    'tab_labels': [
+        "Food Systems Stakeholders",                    # Populated
+        "Food Flows, Supply & Value Chains",            # Suplemented with Hanoi Data
+        "Sustainability Metrics & Indicators",          # Empty!
+        "Multidimensional Poverty",                     # Populated
+        "Labour, Skills & Green Jobs",                  # Empty!
+        "Resilience to Food System Shocks",             # Empty!
+        "Dietary Mapping & Affordability",              # Populated
+        "Food Losses & Waste",                          # Empty!
+        "Food System Policies",                         # In progress
+        "Health & Nutrition",                           # Populated
+        "Environmental Footprints of Food & Diets",     # Empty!
+        "Behaviour Change Tool (AI Chatbot & Game)",    # Empty!
+    ],
+    'sidebar_image': 'photos/urban_food_systems_6.jpg',
+    'footer_logos': [('logos/DeSIRA.png', '60px'), ('logos/IFAD.png', '65px'),
+                     ('logos/Rikolto.png', '40px'), ('logos/RyanInstitute.png', '60px')],
+    'mpi_file': 'addis_adm3_mpi.geojson',
+    'mpi_column': 'MPI',
+    'mpi_range': (0, 50),
+    'mpi_long_file': 'addis_mpi_long.csv',
+    'map_zoom': 10,
+    'district_zoom': 10,
+    'bar_label': " ",
+    'bar_row_height': None,
+    'stakeholder_file': 'addis_stakeholders_cleaned.csv',
+    # Stakeholder column behind each pie filter dropdown option
+    'stakeholder_facets': {
+        'Area': 'Area of Activity (Food Systems Value Chain)',
+        'Scale': 'Scale of Activity',
+        'Sector': 'Primary sector ',
+    },
+    'coming_soon': False,
 }
 
-greens_pie_palette = [
-    brand_colors['Light green'],   # "#E8F0DA"
-    brand_colors['Mid green'],     # "#bbce8a"
-    brand_colors['Dark green'],    # "#939f5c"
-    "#b7c49a",                     # lighter tint of Dark green
-    "#d6e5b8",                     # lighter tint of Mid green
-    "#e3f6d5",                     # very light green
-    "#c1d88e",                     # soft khaki-green
-    "#d1e7a8",                     # pastel green
-    "#aabf7e",                     # olive green
-    "#8aa97f",                     # muted green
-]
-
-reds_pie_palette = [
-    "#a80050",   # main brand red
-    "#84003d",   # deep accent red
-    "#C97A9A",   # soft pink
-    "#E07A5F",   # warm accent
-    "#F2D16B",   # harvest yellow (for contrast)
-    "#F5F5F5",   # neutral light
-    "#7B5E34",   # earth brown
-    "#C97A9A",   # repeat pink
-    "#E07A5F",   # repeat accent
-    "#F2D16B"    # repeat yellow
-]
-
-plotting_palette_cat = [
-    "#a80050",  
-    "#84003d",   
-    "#F5F5F5",   
-    '#E8F0DA',
-    "#bbce8a",
-    "#939f5c",
-    "#E07A5F",   
-    "#d33030",
-]
-
-tabs = [
-        'Food Systems Stakeholders',                #Populated
-        'Food Flows, Supply & Value Chains',        #Populated
-        'Sustainability Metrics & Indicators',      #Currently empty
-        'Multidimensional Poverty',                 #Populated
-        'Resilience to Food System Shocks',         #In progress
-        'Dietary Mapping & Affordability',          #Semi-Populated (In development)
-        'Food Losses & Waste',                      #Currently empty
-        'Food System Policies',                     #Currently empty
-        'Health & Nutrition',                       #Populated
-        'Environmental Footprints of Food & Diets', #Currently empty 
-        'Behaviour Change Tool (AI Chatbot & Game)' #Currently empty (In development)
-        ]
-
+dashboard = CityDashboard(__name__, config)
+app, datasets = dashboard.app, dashboard.datasets
+sidebar, footer = dashboard.sidebar, dashboard.footer
 
 # -------------------------- Loading and Formatting All Data ------------------------- #
 
-homepath = os.getcwd()
-
-# Loading and Formatting MPI Data
-path = homepath + "/assets/data/"
-MPI = gpd.read_file(path+"/addis_adm3_mpi.geojson")#.set_index('Dist_Name')
-MPI['MPI'] = MPI['MPI'].astype(float)
-MPI['Dist_Name'] = MPI['Dist_Name'].astype(str)
-geojson = json.loads(MPI.to_json())
+# Datasets are registered in this city's scope of the shared registry and loaded the first time a
+# tab or callback needs them (then kept in memory and re-loaded if the file changes). The MPI,
+# stakeholder and supply datasets are registered by CityDashboard.
 
-# Loading and Formatting MPI CSV Data=
-df_mpi = pd.read_csv(path+"addis_mpi_long.csv")
-variables = df_mpi['Variable'].unique()
-
-# Loading and Formatting Food Systems Stakeholders Data
-df_sh = pd.read_csv(path+"/addis_stakeholders_cleaned.csv").dropna(how='any').astype(str)
-
-# Format Website column as clickable markdown links
-if 'Website' in df_sh.columns:
-    df_sh['Website'] = df_sh['Website'].apply(
-        lambda x: f'[🔗]({x})' if x and x.startswith('http') else '--'
-    )
+# Food Outlets GeoJSON layers (each file is read into lat/lon arrays on first use, reloaded if it changes)
+outlets_path = datasets.file("jsons_addis_foodoutlets/")
+outlet_layers = OutletLayerStore(outlets_path)
 
-# Pre-calculate fixed column widths (6px per character, min 80px, max 200px)
-column_widths = {}
-for col in df_sh.columns:
-    max_len = max(len(str(col)), df_sh[col].astype(str).str.len().max())
-    column_widths[col] = min(max(max_len * 6, 80), 200)
-
-total_table_width = sum(column_widths.values())
-
-# Loading GeoJSON files for Food Outlets
-outlets_path = "/Users/jemimaofarrell/Documents/Python/EcoFoodSystems/EcoFoodSystems_Dashboard_Development/assets/data/jsons_addis_foodoutlets/"
-outlets_geojson_files = sorted(os.listdir(outlets_path))
+# Names of the outlet layers, re-listed when the folder changes (its mtime changes whenever a
+# file is added, removed or renamed)
+@datasets.register('outlet_layer_files', 'jsons_addis_foodoutlets')
+def load_outlet_layer_files():
+    return outlet_layers.filenames()
 
 # Loading and Formatting Food Environment Choropleth Data
-food_env_path = path + "addis_diet_env_mapping.geojson"
-gdf_food_env = gpd.read_file(food_env_path).to_crs('EPSG:4326')
+@datasets.register('food_env', 'addis_diet_env_mapping.geojson')
+def load_food_env():
+    return datasets.read_table("addis_diet_env_mapping.geojson").to_crs('EPSG:4326')
 
 # Define food environment metrics and their labels
 cols_food_env = ['density_healthyout', 'density_unhealthyout', 'density_mixoutlets',
@@ -182,150 +115,198 @@ green_scale = ['#e3f6d5', '#c1d88e', '#a5be91', '#6f946d', '#3a6649']
 red_scale = ['#fee5d9', '#fcbba1', '#fc9272', '#fb6a4a', '#de2d26']
 grey_scale = ['#f7f7f7', '#d9d9d9', '#bdbdbd', '#969696', '#636363']
 
-# Loading supply flow data for Sankey Diagram
-df_sankey = pd.read_csv(path+'/hanoi_supply.csv')
-
-df_policies = pd.read_csv(path+'/addis_policy_database.csv').drop('Unnamed: 0',axis=1)
-
-df_indicators = pd.read_csv(path+'/addis_policy_database_expanded_sdg.csv')
+# Precomputed choropleth cache: the geometry never changes, so it is serialized once (without
+# the attribute columns) and each metric is kept as a compact numeric array. Switching metrics
+# then only swaps the z values instead of copying and re-serializing the whole GeoDataFrame.
+def build_food_env_cache(gdf, metrics):
+    cache = {
+        'geojson': json.loads(gdf[['geometry']].to_json()),
+        'locations': gdf.index.to_numpy(),
+        'text': gdf['Dist_Name'].to_numpy() if 'Dist_Name' in gdf.columns else gdf.index.to_numpy(),
+        'z': {},
+        'colorscale': {},
+        'label': {},
+    }
+    for col, label in metrics:
+        if col not in gdf.columns:
+            continue
+        direction = metric_direction.get(col, None)
+        scale = green_scale if direction is True else red_scale if direction is False else grey_scale
+        cache['z'][col] = pd.to_numeric(gdf[col], errors='coerce').to_numpy(dtype='float32')
+        cache['colorscale'][col] = [[i / (len(scale) - 1), c] for i, c in enumerate(scale)]
+        cache['label'][col] = label
+    return cache
+
+@datasets.register('food_env_cache', depends=['food_env'])
+def load_food_env_cache():
+    return build_food_env_cache(datasets['food_env'], zip(cols_food_env, data_labels_food_env))
+
+@datasets.register('policies', 'addis_policy_database.csv')
+def load_policies():
+    return datasets.read_table('addis_policy_database.csv').drop('Unnamed: 0',axis=1)
+
+# Server-side filtering, sorting and paging of the policies table
+@datasets.register('policies_query', depends=['policies'])
+def load_policies_query():
+    return TableQuery(datasets['policies'])
 
 # Create SDG logos as list of numbers for rendering
-def get_sdg_numbers(row):
-    sdg_cols = ['SDG_1', 'SDG_2', 'SDG_3', 'SDG_4', 'SDG_5']
-    sdg_numbers = []
-    for col in sdg_cols:
-        if pd.notna(row[col]) and str(row[col]).strip():
-            # Extract just the number (e.g., "1.3.1" -> "1", "2.1" -> "2")
-            sdg_num = str(row[col]).split('.')[0]
-            if sdg_num.isdigit() and sdg_num not in sdg_numbers:
-                sdg_numbers.append(sdg_num)
-    return ', '.join(sdg_numbers) if sdg_numbers else '--'
-
-df_indicators['SDG Numbers'] = df_indicators.apply(get_sdg_numbers, axis=1)
-
-df_env = pd.read_csv(path+'/addis_lca_pivot.csv')
-df_lca = df_env  # Alias for compatibility
-
-# -------------------------- Defining Custom Styles ------------------------- #
-
-tabs_style = {
-                "backgroundColor": brand_colors['Mid green'],
-                "color": brand_colors['Brown'],
-                "width":"100%",
-                "margin-bottom": "4px",
-                "borderRadius": "8px",
-                "padding": "6px 4px",
-                "fontWeight": "bold",
-                "textAlign": "left",
-                "fontSize": "clamp(0.6em, 1vw, 1.1em)",
-                "boxShadow": "0 2px 6px rgba(0,0,0,0.08)",
-                "border": "none",
-                "textDecoration": "none",
-                "whiteSpace": "normal",
-                "box-sizing": "border-box",
-                "maxWidth": "90%",
-                "wordBreak": "normal"
-            }
-
-kpi_card_style ={"textAlign": "center", 
-                "backgroundColor": brand_colors['White'], 
-                "color":brand_colors['Brown'],
-                "font-weight":"bold",
-                "border-radius": "8px",
-                "padding":"10px",
-                "margin-bottom":"10px",
-                "flexDirection": "column",
-                "border": "2px solid " + brand_colors['White'],
-                }
-
-kpi_card_style_2 = {
-                "textAlign": "center",
-                "backgroundColor": brand_colors['White'],
-                "borderRadius": "12px",
-                "boxShadow": "0 4px 16px rgba(0,0,0,0.10)",
-                "padding": "clamp(4px, 3vw, 12px)", 
-                "padding":"6px",
-                "marginBottom": "12px",
-                "width": "100%",
-                #"maxWidth": "350px",
-                "height": "auto",
-                #"minWidth": "220px"
-            }
-
-header_style = {"color": brand_colors['Brown'], 
-                'fontWeight': 'bold',
-                "margin": "0", 
-                'textAlign': 'center',
-                "fontSize": "clamp(0.8em, 3vw, 1.25em)",
-                'whiteSpace': 'normal',
-                }
-
-card_style = {
-    "backgroundColor": brand_colors['White'],
-    "border-radius": "10px",
-    "box-shadow": "0 2px 6px rgba(0,0,0,0.1)",
-    "padding": "20px",  # Increase padding for consistency
-    "margin-bottom": "15px"
+def get_sdg_numbers(df, sdg_cols=('SDG_1', 'SDG_2', 'SDG_3', 'SDG_4', 'SDG_5')):
+    """
+    Extract the SDG goal numbers referenced by each indicator row (e.g. "1.3.1" -> "1").
+
+    Returns:
+    - labels: array with the comma-joined numbers of each row ('--' when there are none)
+    - sdg_index: inverted index mapping each SDG number (as a string) to the sorted row
+      positions that reference it
+    """
+    targets = df[list(sdg_cols)].reset_index(drop=True).stack()
+    numbers = targets.astype(str).str.strip().str.split('.').str[0]
+    numbers = numbers[numbers.str.isdigit().fillna(False).astype(bool)]  # Empty targets are NA with Arrow strings
+
+    pairs = pd.DataFrame({'row': numbers.index.get_level_values(0), 'sdg': numbers.to_numpy()}).drop_duplicates()
+    labels = pairs.groupby('row')['sdg'].agg(', '.join).reindex(range(len(df)), fill_value='--')
+    sdg_index = {sdg: rows.to_numpy() for sdg, rows in pairs.groupby('sdg')['row']}
+    return labels.to_numpy(), sdg_index
+
+@datasets.register('indicators', 'addis_policy_database_expanded_sdg.csv')
+def load_indicators():
+    df_indicators = datasets.read_table('addis_policy_database_expanded_sdg.csv')
+    df_indicators['SDG Numbers'], _ = get_sdg_numbers(df_indicators)
+    return df_indicators
+
+@datasets.register('sdg_index', depends=['indicators'])
+def load_sdg_index():
+    return get_sdg_numbers(datasets['indicators'])[1]
+
+sdg_display_cols = ['Dimensions', 'Components', 'Indicators', 'SDG impact area/target', 'SDG Numbers']
+
+# Server-side filtering, sorting and paging of the indicators table (query results are
+# cached per SDG selection, filter, sort and page until the indicators are re-loaded)
+@datasets.register('indicators_query', depends=['indicators'])
+def load_indicators_query():
+    return TableQuery(datasets['indicators'][sdg_display_cols])
+
+def filter_sdg_rows(selected, match_all=False):
+    """Row positions of the indicators referencing any (or all) of the selected SDG numbers"""
+    sdg_index = datasets['sdg_index']
+    empty = np.array([], dtype=int)
+    rows = [sdg_index.get(str(sdg), empty) for sdg in selected]
+    combine = np.intersect1d if match_all else np.union1d
+    result = rows[0]
+    for other in rows[1:]:
+        result = combine(result, other)
+    return result
+
+def sdg_selection(selected, match_all=False):
+    """Row positions of an SDG selection (None when nothing is selected) and its cache key"""
+    key = (tuple(sorted(selected or [], key=int)), bool(match_all and len(selected or []) > 1))
+    if not key[0]:
+        return None, key
+    return filter_sdg_rows(*key), key
+
+# Nutrition outcomes of Addis Ababa against the national values, per population segment
+@datasets.register('nutrition_outcomes', 'addis_nutrition_outcomes_cleaned.csv')
+def load_nutrition_outcomes():
+    return datasets.read_table('addis_nutrition_outcomes_cleaned.csv')
+
+# Section headers and card titles; outcomes not listed are shown under their own name
+nutrition_segment_titles = {
+    'CHILDREN': "Children Aged 0-59 Months",
+    'Adolescent Girls (10-19 Years)': "Adolescent Girls (10-19 Years)",
+    'WOMEN (15-49 Years)': "Women (15-49 Years)",
+}
+nutrition_labels = {
+    'Stunting': "Stunting",
+    'Wasting (%)': "Wasting",
+    'Concurrent Stunting and Wasting (%)': "Concurrent Stunting and Wasting",
+    'Underweight (%)': "Underweight",
+    'Overweight: WHZ>2 (%)': "Overweight",
+    'Any Form of Malnutrition (%)': "Malnutrition",
+    'Thinnest BMI-for-age <-2SD (%)': "Underweight (BMI)",
+    'Overweight BMI-for-age > 1SD and <2SD (%)': "Overweight (BMI)",
+    'Obese BMI-for-age > 2SD (%)': "Obese (BMI)",
+    'Underweight (<18.5) (%)': "Underweight",
+    'Overweight/Obese (?25) (%)': "Overweight",
 }
+# Neither end of the normal range is better
+nutrition_hidden = ['Normal BMI-for-age ? -2 to < -1 (%)']
+
+# Header and row of KPI cards per segment, built in one pass and cached until the CSV changes
+@datasets.register('nutrition_kpi_sections', depends=['nutrition_outcomes'])
+def build_nutrition_kpi_sections():
+    return nutrition_kpi_sections(datasets['nutrition_outcomes'], dashboard.name, segment_titles=nutrition_segment_titles,
+                                  labels=nutrition_labels, hidden=nutrition_hidden)
+
+@datasets.register('lca', 'addis_lca_pivot.csv')
+def load_lca():
+    return datasets.read_table('addis_lca_pivot.csv')
+
+# Environmental indicators shown on each food item card: (column, label, unit, number format)
+lca_indicators = [
+    ('Total GHG Emissions', 'GHG', 'kg CO₂-eq', '.4f'),
+    ('Freshwater Comsumption (l)', 'Water', 'liters', '.2f'),
+    ('Acidification (kg SO2eq)', 'Acidification', 'kg SO₂-eq', '.6f'),
+    ('Eutrophication (kg PO43-eq)', 'Eutrophication', 'kg PO₄³⁻-eq', '.6f'),
+]
 
+# Traffic light colors by tercile class (0 = green, 1 = yellow, 2 = red; lower impact is better)
+traffic_light_colors = [
+    {"border": "#2e7d32", "shadow": "#a5d6a7"},  # Dark green border, light green shadow
+    {"border": "#f57f17", "shadow": "#fff59d"},  # Dark yellow border, light yellow shadow
+    {"border": "#c62828", "shadow": "#ef9a9a"},  # Dark red border, light red shadow
+]
 
-# ----------------------- App Layout Components -------------------------- #
-
-sidebar = dbc.Card([
-    #html.Img(src="/assets/logos/temp_efs_logo.png", style={"width": "40%", "margin-bottom": "10px", "justifyContent": "center"}),
-    dbc.Nav([
-        dbc.NavItem(dbc.NavLink("Food Systems Stakeholders", id="tab-1-stakeholders", href="#", active="exact"), style=tabs_style),                         # Populated
-        dbc.NavItem(dbc.NavLink("Food Flows, Supply & Value Chains", id="tab-2-supply", href="#", active="exact"), style=tabs_style),                       # Suplemented with Hanoi Data    
-        dbc.NavItem(dbc.NavLink("Sustainability Metrics & Indicators", id="tab-3-sustainability", href="#", active="exact"), style=tabs_style),             # Empty!
-        dbc.NavItem(dbc.NavLink("Multidimensional Poverty", id="tab-4-poverty", href="#", active="exact"), style=tabs_style),                               # Populated
-        dbc.NavItem(dbc.NavLink("Labour, Skills & Green Jobs", id="tab-5-labour", href="#", active="exact"), style=tabs_style),                             # Empty!
-        dbc.NavItem(dbc.NavLink("Resilience to Food System Shocks", id="tab-6-resilience", href="#", active="exact"), style=tabs_style),                    # Empty!
-        dbc.NavItem(dbc.NavLink("Dietary Mapping & Affordability", id="tab-7-affordability", href="#", active="exact"), style=tabs_style),                  # Populated
-        dbc.NavItem(dbc.NavLink("Food Losses & Waste", id="tab-8-losses", href="#", active="exact"), style=tabs_style),                                     # Empty!
-        dbc.NavItem(dbc.NavLink("Food System Policies", id="tab-9-policies", href="#", active="exact"), style=tabs_style),                                  # In progress
-        dbc.NavItem(dbc.NavLink("Health & Nutrition", id="tab-10-nutrition", href="#", active="exact"), style=tabs_style),                                  # Populated
-        dbc.NavItem(dbc.NavLink("Environmental Footprints of Food & Diets", id="tab-11-footprints", href="#", active="exact"), style=tabs_style),           # Empty!
-        dbc.NavItem(dbc.NavLink("Behaviour Change Tool (AI Chatbot & Game)", id="tab-12-behaviour", href="#", active="exact"), style=tabs_style),           # Empty!
-    ], 
-    vertical="md", 
-    pills=True, 
-    fill=True,
-    style={"marginTop": "20px",
-           "alignItems": "center",
-           "textAlign": "center",
-           "zIndex": 1000})
-
-], style={
-    #"backgroundColor": brand_colors['Light green'],
-    "boxShadow": "0 2px 8px rgba(0,0,0,0.08)",
-    "borderRadius": "12px",
+# Food item card styles, shared as CSS classes instead of being repeated inline on every card
+food_card_class = shared_styles.add('food-card', {
+    "backgroundColor": brand_colors['White'],
+    "borderRadius": "10px",
+    "boxShadow": "0 2px 6px rgba(0,0,0,0.1)",
     "padding": "10px",
-    "height": "100%",
-    "width": "100%",
-    "display": "flex",
-    "flexDirection": "column",
-    "justifyContent": "flex-start",
-    "overflowY": "auto",  
-    "backgroundImage": "url('/assets/photos/urban_food_systems_6.jpg')",  
-    "backgroundSize": "cover",        
-    "backgroundPosition": "center",  
-    "backgroundRepeat": "no-repeat" ,
+    "height": "100%"
 })
-
-footer = html.Footer([
-            html.Div([
-            html.Img(src="/assets/logos/DeSIRA.png", style={'height': '60px', 'margin': '0 30px'}),
-            html.Img(src="/assets/logos/IFAD.png", style={'height': '65px', 'margin': '0 30px'}),
-            html.Img(src="/assets/logos/Rikolto.png", style={'height': '40px', 'margin': '0 30px'}),
-            html.Img(src="/assets/logos/RyanInstitute.png", style={'height': '60px', 'margin': '0 30px'})
-            ], style={
-                "display": "flex",
-                "justifyContent": "center",
-                "alignItems": "baseline",
-                "margin": "20px 0px",
-            })
-        ])
-   
+food_card_title_class = shared_styles.add('food-card-title', {
+    "color": brand_colors['Brown'],
+    "fontWeight": "bold",
+    "marginBottom": "10px",
+    "textAlign": "center",
+    "fontSize": "clamp(0.9em, 1em, 1.1em)"
+})
+lca_kpi_class = shared_styles.add('lca-kpi', {
+    "flex": "1", "textAlign": "center", "padding": "8px",
+    "backgroundColor": brand_colors['White'],
+    "borderRadius": "5px", "margin": "3px"
+})
+lca_kpi_tercile_classes = [
+    shared_styles.add(f'lca-kpi-{name}', {
+        "border": f"2px solid {colors['border']}",
+        "boxShadow": f"0 2px 8px {colors['shadow']}"
+    })
+    for name, colors in zip(['green', 'yellow', 'red'], traffic_light_colors)
+]
+lca_kpi_label_class = shared_styles.add('lca-kpi-label', {"fontSize": "0.7em", "color": brand_colors['Brown'], "marginBottom": "2px"})
+lca_kpi_value_class = shared_styles.add('lca-kpi-value', {"fontSize": "1em", "fontWeight": "bold", "color": brand_colors['Brown']})
+lca_kpi_unit_class = shared_styles.add('lca-kpi-unit', {"fontSize": "0.6em", "color": brand_colors['Brown']})
+lca_kpi_row_class = shared_styles.add('lca-kpi-row', {"display": "flex"})
+lca_kpi_first_row_class = shared_styles.add('lca-kpi-first-row', {"marginBottom": "5px"})
+
+# Traffic light class of every food item for each indicator, binned once against the
+# 33rd/67th percentiles across all foods
+@datasets.register('lca_traffic_lights', depends=['lca'])
+def load_lca_traffic_lights():
+    df_lca = datasets['lca']
+    classes = {}
+    for col, *_ in lca_indicators:
+        values = df_lca[col].to_numpy(dtype=float)
+        thresholds = np.nanquantile(values, [0.33, 0.67])
+        classes[col] = np.digitize(values, thresholds, right=True).astype('int8')
+    return pd.DataFrame(classes, index=df_lca.index)
+
+# Food item cards memoized per food group of the LCA table, built on first selection (a fresh
+# cache whenever the LCA data is re-loaded)
+@datasets.register('lca_card_cache', depends=['lca_traffic_lights'])
+def load_lca_card_cache():
+    return dict.fromkeys(datasets['lca']['Food Group'].dropna().unique())
 
 # ------------------------- Main app layout ------------------------- #
 
@@ -441,7 +422,7 @@ def landing_page_layout():
                                         "height":"auto",
                                         "display": "block",
                                         "marginTop": "auto",
-                                        "backgroundImage": "url('/assets/photos/addis_header.png')",  
+                                        "backgroundImage": dashboard.background_image('photos/addis_header.png'),
                                         "backgroundSize": "cover",        # Image covers the whole area
                                         "backgroundPosition": "center",   # Center the image
                                         "backgroundRepeat": "no-repeat"   # Don't repeat the image
@@ -464,6 +445,7 @@ def landing_page_layout():
 # ------------------------- Defining tab layouts ------------------------- #
 
 def stakeholders_tab_layout():
+    df_sh = datasets['stakeholders']
     return html.Div([
 
         html.Div([sidebar], style={
@@ -545,7 +527,8 @@ def stakeholders_tab_layout():
                         "box-shadow": "0 2px 6px rgba(0,0,0,0.1)",
                         "backgroundColor": brand_colors['White'],
                         "border-radius": "10px"}),
-            dcc.Store(id='selected_slice', data=None)
+            dcc.Store(id='selected_slice', data=None),
+            dcc.Store(id='stakeholder-client-data', data=dashboard.stakeholder_client_data())
         ], style={
             #"flex": "1 1 30%",
             "maxWidth": "30%",
@@ -565,7 +548,7 @@ def stakeholders_tab_layout():
                 dbc.CardBody([
                     dash_table.DataTable(
                         id='sh_table',
-                        data=df_sh.to_dict('records'),
+                        data=[] if dashboard.stakeholder_clientside else dashboard.stakeholder_records(),
                         columns=[
                             {"name": str(i), "id": str(i), "presentation": "markdown"} 
                             if i == "Website" 
@@ -598,7 +581,7 @@ def stakeholders_tab_layout():
                             {
                                 column: {'value': str(row[column]), 'type': 'markdown'}
                                 for column in df_sh.columns
-                            } for row in df_sh.to_dict('records')
+                            } for row in dashboard.stakeholder_records()
                         ],
                         tooltip_duration=None,
                         css=[{
@@ -773,6 +756,7 @@ def supply_tab_layout():
         })
 
 def poverty_tab_layout():
+    variables = datasets['mpi_variables']
     return html.Div([
         html.Div([sidebar], style={
                                         "width": "15%",
@@ -858,10 +842,13 @@ def poverty_tab_layout():
         html.Div([
             dcc.Graph(
                 id='map',
+                figure=datasets['mpi_map_figure'],
                 style={"height": "100%",
                        "width": "100%",  # fill the parent div
                        "padding": "0",
-                       "margin": "0"})
+                       "margin": "0"}),
+            # Zoom whose simplified boundaries the map shows (see update_map_on_bar_click)
+            dcc.Store(id='map-boundary-zoom', data=config['map_zoom'])
         ], style={
             "flex": "1",
             "height": "100%",
@@ -884,6 +871,7 @@ def poverty_tab_layout():
     })
 
 def affordability_tab_layout():
+    outlets_geojson_files = datasets['outlet_layer_files']
     return html.Div([
             html.Div([sidebar], style={
                                 "width": "15%",
@@ -1020,7 +1008,9 @@ def affordability_tab_layout():
                             paper_bgcolor=brand_colors['White']
                         ),
                         style={"height": "100%", "width": "100%", "padding": "0", "margin": "0"}
-                    )
+                    ),
+                    # Metric and outlet layers currently drawn on the map (see update_affordability_map)
+                    dcc.Store(id='affordability-map-drawn')
                 ], style={
                 "flex": "1",
                 "height": "100%",
@@ -1045,9 +1035,9 @@ def affordability_tab_layout():
         })
 
 def sustainability_tab_layout():
-    # Select display columns (use SDG Numbers instead of SDG Logos)
-    display_cols = ['Dimensions', 'Components', 'Indicators', 'SDG impact area/target', 'SDG Numbers']
-    df_display = df_indicators[display_cols]
+    # Select display columns (use SDG Numbers instead of SDG Logos); the rows and their
+    # tooltips are served a page at a time by update_indicators_table
+    display_cols = sdg_display_cols
     
     return html.Div([
         html.Div([sidebar], style={
@@ -1071,24 +1061,19 @@ def sustainability_tab_layout():
                             "color": brand_colors['Brown'],
                             "fontSize": "clamp(0.9em, 1.1vw, 1.2em)"
                         }),
-                        html.Div([
-                            html.Button([
-                                html.Img(src=f"/assets/logos/SDG%20logos/SDG%20Web%20Files%20w-%20UN%20Emblem/E%20SDG%20Icons%20Square/E_SDG%20goals_icons-individual-rgb-{str(i).zfill(2)}.png",
-                                        style={"height": "80px", "display": "block"}),
-                            ], 
-                            id=f"sdg-filter-{i}",
-                            n_clicks=0,
-                            style={
-                                "border": "3px solid transparent",
-                                "borderRadius": "8px",
-                                "padding": "5px",
-                                "margin": "5px",
-                                "cursor": "pointer",
-                                "backgroundColor": "transparent",
-                                "transition": "all 0.2s"
-                            })
-                            for i in range(1, 18)
-                        ], style={"display": "grid", "gridTemplateColumns": "repeat(9, 1fr)", "gap": "5px", "justifyItems": "center", "maxWidth": "100%"}),
+                        dashboard.sdg_filter_bar(),
+                        dcc.RadioItems(
+                            id="sdg-match-mode",
+                            options=[
+                                {'label': ' Match any selected SDG', 'value': 'any'},
+                                {'label': ' Match all selected SDGs', 'value': 'all'}
+                            ],
+                            value='any',
+                            inline=True,
+                            inputStyle={"marginLeft": "12px"},
+                            style={"marginTop": "10px", "color": brand_colors['Brown']}
+                        ),
+                        dcc.Store(id='sdg-selected', data=[]),
                         html.Button("Clear Filter", 
                                    id="sdg-clear-filter",
                                    n_clicks=0,
@@ -1124,16 +1109,19 @@ def sustainability_tab_layout():
                 dbc.CardBody([
                     dash_table.DataTable(
                         id='indicators_table',
-                        data=df_display.to_dict('records'),
+                        data=[],
                         columns=[
                             {"name": "SDG Goals" if col == "SDG Numbers" else str(col), "id": str(col)} 
                             for col in display_cols
                         ],
                         page_size=14,
-                        page_action='native',
-                        filter_action='native',
-                        sort_action='native',
+                        page_current=0,
+                        page_action='custom',
+                        filter_action='custom',
+                        filter_query='',
+                        sort_action='custom',
                         sort_mode='multi',
+                        sort_by=[],
                         style_cell={
                             'textAlign': 'left',
                             'padding': '8px',
@@ -1167,12 +1155,7 @@ def sustainability_tab_layout():
                         style_data_conditional=[
                             {'if': {'row_index': 'odd'}, 'backgroundColor': '#f9f9f9'}
                         ],
-                        tooltip_data=[
-                            {
-                                column: {'value': str(row[column]), 'type': 'text'}
-                                for column in display_cols
-                            } for row in df_display.to_dict('records')
-                        ],
+                        tooltip_data=[],
                         tooltip_duration=None,
                         css=[{
                             'selector': '.dash-table-tooltip',
@@ -1210,6 +1193,7 @@ def sustainability_tab_layout():
 
 
 def policies_tab_layout():
+    df_policies = datasets['policies']
     return html.Div([
         html.Div([sidebar], style={
             "width": "15%",
@@ -1227,16 +1211,19 @@ def policies_tab_layout():
                 dbc.CardBody([
                     dash_table.DataTable(
                         id='policies_table',
-                        data=df_policies.to_dict('records'),
+                        data=[],
                         columns=[
                             {"name": str(col), "id": str(col)}
                             for col in df_policies.columns
                         ],
                         page_size=14,
-                        page_action='native',
-                        filter_action='native',
-                        sort_action='native',
+                        page_current=0,
+                        page_action='custom',
+                        filter_action='custom',
+                        filter_query='',
+                        sort_action='custom',
                         sort_mode='multi',
+                        sort_by=[],
                         style_cell={
                             'textAlign': 'left',
                             'padding': '8px',
@@ -1293,7 +1280,6 @@ def policies_tab_layout():
     }) 
 
 def health_nutrition_tab_layout():
-    tile_width, lg = 12, 4  # Tile width in columns, large screen size, height in pixels
     return html.Div([
                 html.Div([sidebar], style={
                                         "width": "15%",
@@ -1306,59 +1292,8 @@ def health_nutrition_tab_layout():
                 # Main content area
 
                 html.Div([
-                    # CHILDREN Section (6 cards)
-                    html.H3("Children Aged 0-59 Months", style={
-                        "color": brand_colors['Brown'],
-                        "fontWeight": "bold",
-                        "marginTop": "20px",
-                        "marginBottom": "15px",
-                        "borderBottom": f"3px solid {brand_colors['Mid green']}",
-                        "paddingBottom": "10px"
-                    }),
-                    dbc.Row([
-                        
-                        dbc.Col([create_nutrition_kpi_card("Stunting", 13.9, 40.9, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Wasting", 3.8, 11.2, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Concurrent Stunting and Wasting", 0.7, 2.9, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Underweight", 5.5, 23.3, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Overweight", 6.9, 3.9, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Malnutrition", 21.9, 51.5, lower_is_better=True)], width=tile_width, lg=lg),
-            
-                    ]),
-
-                                     
-                    # ADOLESCENT GIRLS Section (4 cards)
-                    html.H3("Adolescent Girls (10-19 Years)", style={
-                        "color": brand_colors['Brown'],
-                        "fontWeight": "bold",
-                        "marginTop": "30px",
-                        "marginBottom": "15px",
-                        "borderBottom": f"3px solid {brand_colors['Mid green']}",
-                        "paddingBottom": "10px"
-                    }),
-                    dbc.Row([
-
-                        dbc.Col([create_nutrition_kpi_card("Underweight (BMI)", 5.3, 9.3, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Overweight (BMI)", 12.5, 5.1, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Obese (BMI)", 3.5, 1, lower_is_better=True)], width=tile_width, lg=lg),
-            
-                    ]),
-                    
-                    # WOMEN Section (2 cards)
-                    html.H3("Women (15-49 Years)", style={
-                        "color": brand_colors['Brown'],
-                        "fontWeight": "bold",
-                        "marginTop": "30px",
-                        "marginBottom": "15px",
-                        "borderBottom": f"3px solid {brand_colors['Mid green']}",
-                        "paddingBottom": "10px"
-                    }),
-                    dbc.Row([
-
-                        dbc.Col([create_nutrition_kpi_card("Underweight", 10.7, 20.1, lower_is_better=True)], width=tile_width, lg=lg),
-                        dbc.Col([create_nutrition_kpi_card("Overweight", 35.8, 11.4, lower_is_better=True)], width=tile_width, lg=lg),
-            
-                    ]),
+                    # One header and row of cards per population segment (see nutrition_kpi_sections)
+                    *datasets['nutrition_kpi_sections'],
                 ], style={  "overflowY": "auto",
                             "flex": "1 1 85%",
                             "padding": "10px",
@@ -1372,6 +1307,7 @@ def health_nutrition_tab_layout():
         })
 
 def footprints_tab_layout():
+    df_lca = datasets['lca']
     return html.Div([
         html.Div([sidebar], style={
             "width": "15%",
@@ -1436,144 +1372,21 @@ def footprints_tab_layout():
     })
 
 
-#------------------------- App Layout ----------------------- #
-
-app.layout = html.Div([
-
-                    html.Div(id="tab-content", children=landing_page_layout(), style={"width": "100%",
-                                                                                            "height": "100%"})
-
-                    # Parent container for full page
-                    ], style={
-                        "display": "flex",
-                        "flexDirection": "column",
-                        "height": "100vh",
-                        "width": "100vw"
-            })
-
 # ------------------------- Callbacks ------------------------- #
 
-# Linking the dropdown to the bar chart for the MPI page    
-@app.callback(
-    Output('bar-plot', 'figure'),
-    Input('variable-dropdown', 'value'),
-    prevent_initial_call=False
-    
-)
-def update_bar(selected_variable):
-    # Sort by selected variable, descending
-    filtered_df = df_mpi[df_mpi["Variable"]==selected_variable]
-    sorted_df = filtered_df.sort_values('Value', ascending=False)
-    fig = px.bar(
-        sorted_df,
-        x='Value',
-        y='Dist_Name',
-        orientation='h',
-        hover_data=['Dist_Name'],
-        labels={'Dist_Name': " ",
-                'Value':"Percentage of Deprived Households"},
-        color_discrete_sequence=[brand_colors['Red']]
-    )
-    fig.update_layout(
-        yaxis={'categoryorder':'total ascending'},
-        autosize=True,  # Allow figure to fill container
-        #height=25 * len(sorted_df),
-        margin=dict(l=0.15, r=0.1, t=0.15, b=1),
-        hoverlabel=dict(
-            bgcolor="white",      # Tooltip background color
-            font_color="black",   # Tooltip text color
-        )
-    )
-
-    return fig
-
-# Adding MPI map and linking it to the bar chart via click
-@app.callback(
-    Output('map', 'figure'),
-    Input('bar-plot', 'clickData'),
-    Input('variable-dropdown', 'value')
-)
-def update_map_on_bar_click(clickData, selected_variable):
-    center = {
-        "lat": MPI.geometry.centroid.y.mean(),
-        "lon": MPI.geometry.centroid.x.mean()
-    }
-    zoom = 10
-
-    MPI_display = MPI.copy()
-    MPI_display['opacity'] = 0.7
-    MPI_display['line_width'] = 0.8
-
-    # If a bar is clicked, zoom to that district
-    if clickData and 'points' in clickData:
-        selected_dist = clickData['points'][0]['y']  # y is Dist_Name for horizontal bar
-        match = MPI[MPI['Dist_Name'] == selected_dist]
-        if not match.empty:
-            #centroid = match.geometry.centroid
-            center = {
-                "lat": match.geometry.centroid.y.values[0],
-                "lon": match.geometry.centroid.x.values[0]
-            }
-            #area = match.geometry.area.values[0]
-            #zoom = max(8, min(12, 12 - area * 150))  # Zoom in closer
-            # Highlight: set opacity and line_width for the selected district
-
-            zoom = 10
-            MPI_display.loc[MPI_display['Dist_Name'] == selected_dist, 'opacity'] = 1
-            MPI_display.loc[MPI_display['Dist_Name'] == selected_dist, 'line_width'] = 2
-
-
-    fig = px.choropleth_mapbox(
-        MPI,
-        geojson=geojson,
-        locations="Dist_Name",
-        featureidkey="properties.Dist_Name",
-        color='MPI',
-        color_continuous_scale="Reds",
-        opacity=0.7,
-        range_color=(0, 50),
-        labels={'MPI':'MPI','Dist_Name':'District Name'},
-        mapbox_style="carto-positron",
-        zoom=zoom,
-        center=center
-    )
-
-    
-    fig.update_layout(coloraxis_colorbar=None)
-    fig.update_coloraxes(showscale=False)
-
-    fig.update_layout(
-    paper_bgcolor=brand_colors['White'],
-    plot_bgcolor=brand_colors['White'],
-    margin=dict(l=0, r=0, t=0, b=0)
-    )
-
-    # Update per-feature opacity and line width upon click to highlight 
-    fig.update_traces(
-        marker=dict(
-            opacity=MPI_display['opacity'],
-            line=dict(width=MPI_display['line_width'], color='black')
-        )
-    )
-
-    return fig
-
-
-
 @app.callback(
     Output('map_foodoutlets', 'figure'),
     Input('variable-dropdown', 'value')
 )
+@figure_cache.memoize(datasets, depends=['mpi', 'mpi_centroids'])
 def add_outlets_map(selected_variable):
-    center = {
-        "lat": MPI.geometry.centroid.y.mean(),
-        "lon": MPI.geometry.centroid.x.mean()
-    }
+    MPI = datasets['mpi']
+    center = datasets['mpi_centroids']['center']
     zoom = 10
 
     fig = px.choropleth_mapbox(
         MPI,
-        geojson=geojson,
+        geojson=dashboard.mpi_geojson_for_zoom(zoom),
         locations="Dist_Name",
         featureidkey="properties.Dist_Name",
         color='MPI',
@@ -1599,76 +1412,61 @@ def add_outlets_map(selected_variable):
     return fig
 
 
-# Update Piechart 1 UI on click while filtering table
-@app.callback(
-    Output('piechart', 'figure'),
-    Output('selected_slice', 'data'),
-    Input('pie-filter-dropdown', 'value'),
-    Input('piechart', 'clickData'),
-    State('selected_slice', 'data')
-)
-def update_pie(filter_by, clickData, current_selected):
-    if filter_by == 'Area':
-        df_count = df_sh['Area of Activity (Food Systems Value Chain)'].value_counts().reset_index()
-        df_count.columns = ['name', 'count']
-    elif filter_by == 'Scale':
-        df_count = df_sh['Scale of Activity'].value_counts().reset_index()
-        df_count.columns = ['name', 'count']
-    elif filter_by == 'Sector':
-        df_count = df_sh['Primary sector '].value_counts().reset_index()
-        df_count.columns = ['name', 'count']
-
-    # Handle click to select/unselect slice
-    new_selected = current_selected
-    pull = [0]*len(df_count)
-    if clickData:
-        clicked = clickData['points'][0]['label']
-        new_selected = None if clicked == current_selected else clicked
-        pull = [0.2 if name==new_selected else 0 for name in df_count['name']]
-
-    slice_colors = plotting_palette_cat  # or greens_pie_palette
-    text_colors = []
-    for color in slice_colors:
-        # Simple luminance check for hex color
-        rgb = tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-        luminance = 0.299*rgb[0] + 0.587*rgb[1] + 0.114*rgb[2]
-        text_colors.append('white' if luminance < 180 else brand_colors['Brown'])
-
-
-    fig = px.pie(df_count, values='count', names='name', hole=0,
-                 color_discrete_sequence=slice_colors)
-    fig.update_traces(textfont_color=text_colors, pull=pull, hoverinfo='percent', textinfo='label', textposition='inside', insidetextorientation='radial')
-    fig.update_layout(margin=dict(t=0.1, l=0.1, r=0.1, b=0.1), showlegend=False)
-
-    return fig, new_selected
-
-
-# Table filtering based on both selections made in piecharts
-@app.callback(
-    Output('sh_table', 'data'),
-    Input('pie-filter-dropdown', 'value'),
-    Input('selected_slice', 'data')
-)
-def filter_table(filter_by, selected):
-    if selected:
-        if filter_by == 'Area':
-            df_filtered = df_sh[df_sh['Area of Activity (Food Systems Value Chain)'] == selected]
-        elif filter_by == 'Scale':
-            df_filtered = df_sh[df_sh['Scale of Activity'] == selected] 
-        elif filter_by == 'Sector':
-            df_filtered = df_sh[df_sh['Primary sector '] == selected]
-        return df_filtered.to_dict('records')
-    else:
-        return df_sh.to_dict('records')
-    
+# Dark/vivid blue color palette for outlet markers (stands out against light red/green choropleth)
+outlet_palette = ["#1a3a3a", "#4a2c2a", "#2d4263", "#3d1f1f", "#2c4a2c"]
 
+def outlet_traces(selected_outlets):
+    traces = []
+    for i, filename in enumerate(selected_outlets or []):
+        lat, lon = outlet_layers.get(filename)
+        
+        # Cycle through blue palette colors
+        marker_color = outlet_palette[i % len(outlet_palette)]
+        
+        traces.append(go.Scattermapbox(
+            lat=lat,
+            lon=lon,
+            mode='markers',
+            marker=dict(size=6, color=marker_color, opacity=0.8),
+            name=filename.split('_')[1] if len(filename.split('_')) < 4 else f"{filename.split('_')[1]} {filename.split('_')[2]}",
+            hoverinfo='skip'
+        ))
+    return traces
+
+def metric_hovertemplate(metric_label):
+    return '<b>' + metric_label + '</b>: %{z:.2f}<extra></extra>'
+
+# The district polygons are only sent when the choropleth is first drawn: switching metrics
+# patches its z values and colors, and toggling outlet layers replaces only the marker traces
 @app.callback(
-    Output('affordability-map', 'figure'),
+    [Output('affordability-map', 'figure'),
+     Output('affordability-map-drawn', 'data')],
     [Input("choropleth-select", "value"),
      Input("outlets-layer-select", "value")],
-    [State('affordability-map', 'relayoutData')]
+    [State('affordability-map', 'relayoutData'),
+     State('affordability-map-drawn', 'data')]
 )
-def update_affordability_map(selected_metric, selected_outlets, relayout_data):
+def update_affordability_map(selected_metric, selected_outlets, relayout_data, drawn):
+    food_env_cache = datasets['food_env_cache']
+    if selected_metric not in food_env_cache['z']:
+        selected_metric = None
+    selected_outlets = list(selected_outlets or [])
+    drawn_now = {'metric': selected_metric, 'outlets': selected_outlets}
+
+    if drawn and (drawn['metric'] is None) == (selected_metric is None):
+        patched_fig = Patch()
+        if selected_metric is not None and selected_metric != drawn['metric']:
+            patched_fig['data'][0]['z'] = food_env_cache['z'][selected_metric]
+            patched_fig['data'][0]['colorscale'] = food_env_cache['colorscale'][selected_metric]
+            patched_fig['data'][0]['hovertemplate'] = metric_hovertemplate(food_env_cache['label'][selected_metric])
+        if selected_outlets != drawn['outlets']:
+            first = 0 if selected_metric is None else 1
+            for i in reversed(range(first, first + len(drawn['outlets']))):
+                del patched_fig['data'][i]
+            patched_fig['data'].extend([trace.to_plotly_json() for trace in outlet_traces(selected_outlets)])
+            patched_fig['layout']['showlegend'] = bool(selected_outlets)
+        return patched_fig, drawn_now
+
     # Preserve current zoom and center if available
     if relayout_data and 'mapbox.center' in relayout_data:
         center = relayout_data['mapbox.center']
@@ -1680,65 +1478,20 @@ def update_affordability_map(selected_metric, selected_outlets, relayout_data):
     fig = go.Figure()
     
     # Add choropleth layer if metric selected
-    if selected_metric:
-        gdf = gdf_food_env.copy()
-        
-        if selected_metric in gdf.columns:
-            gdf[selected_metric] = pd.to_numeric(gdf[selected_metric], errors='coerce')
-            
-            # Get human-readable label for the metric
-            metric_label = data_labels_food_env[cols_food_env.index(selected_metric)] if selected_metric in cols_food_env else selected_metric
-            
-            # Choose color scale based on metric direction
-            direction = metric_direction.get(selected_metric, None)
-            if direction is True:
-                colorscale = [[0, green_scale[0]], [0.25, green_scale[1]], [0.5, green_scale[2]], 
-                             [0.75, green_scale[3]], [1, green_scale[4]]]
-            elif direction is False:
-                colorscale = [[0, red_scale[0]], [0.25, red_scale[1]], [0.5, red_scale[2]], 
-                             [0.75, red_scale[3]], [1, red_scale[4]]]
-            else:
-                colorscale = [[0, grey_scale[0]], [0.25, grey_scale[1]], [0.5, grey_scale[2]], 
-                             [0.75, grey_scale[3]], [1, grey_scale[4]]]
-            
-            geojson_data = json.loads(gdf.to_json())
-            
-            fig.add_trace(go.Choroplethmapbox(
-                geojson=geojson_data,
-                locations=gdf.index,
-                z=gdf[selected_metric],
-                colorscale=colorscale,
-                marker=dict(opacity=0.7, line=dict(color='#222', width=1)),
-                hovertemplate='<b>' + metric_label + '</b>: %{z:.2f}<extra></extra>',
-                text=gdf.get('Dist_Name', gdf.index),
-                showscale=False
-            ))
+    if selected_metric is not None:
+        fig.add_trace(go.Choroplethmapbox(
+            geojson=food_env_cache['geojson'],
+            locations=food_env_cache['locations'],
+            z=food_env_cache['z'][selected_metric],
+            colorscale=food_env_cache['colorscale'][selected_metric],
+            marker=dict(opacity=0.7, line=dict(color='#222', width=1)),
+            hovertemplate=metric_hovertemplate(food_env_cache['label'][selected_metric]),
+            text=food_env_cache['text'],
+            showscale=False
+        ))
     
     # Add outlet markers if selected
-    if selected_outlets:
-        # Dark/vivid blue color palette for outlet markers (stands out against light red/green choropleth)
-        blue_palette = [
-                    "#1a3a3a",  
-                    "#4a2c2a",  
-                    "#2d4263",  
-                    "#3d1f1f",  
-                    "#2c4a2c",  
-                ]
-        
-        for i, filename in enumerate(selected_outlets):
-            outlet_gdf = gpd.read_file(outlets_path + filename).to_crs('EPSG:4326')
-            
-            # Cycle through blue palette colors
-            marker_color = blue_palette[i % len(blue_palette)]
-            
-            fig.add_trace(go.Scattermapbox(
-                lat=outlet_gdf.geometry.y,
-                lon=outlet_gdf.geometry.x,
-                mode='markers',
-                marker=dict(size=6, color=marker_color, opacity=0.8),
-                name=filename.split('_')[1] if len(filename.split('_')) < 4 else f"{filename.split('_')[1]} {filename.split('_')[2]}",
-                hoverinfo='skip'
-            ))
+    fig.add_traces(outlet_traces(selected_outlets))
     
     # Update layout
     fig.update_layout(
@@ -1754,74 +1507,8 @@ def update_affordability_map(selected_metric, selected_outlets, relayout_data):
         uirevision='constant'  # Preserve zoom/pan state
     )
     
-    return fig
-
-
-@app.callback(
-    [Output("kpi-total-flow", "children"),
-     Output("urban-indicator", "figure"),
-     Output("sankey-graph", "figure")],
-    Input("slider", "value"))
-
-def update_sankey(value):
-    df_sankey_filt = df_sankey[df_sankey['Year']==int(value)]
-    flow1 = df_sankey_filt[['province', 'Target', 'Supply to Hanoi']].rename(
-        columns={'province':'source', 'Target':'target', 'Supply to Hanoi':'supply'})
-
-    flow2 = df_sankey_filt[['Target', 'Target_1', 'Rice supply']].rename(
-        columns={'Target':'source', 'Target_1':'target', 'Rice supply':'supply'})
-
-    df_sankey_final = pd.concat([flow1.drop_duplicates(), flow2.groupby(['source','target']).sum().reset_index()], ignore_index=True)
-    labels = list(pd.unique(df_sankey_final[['source','target']].values.ravel('K')))
-
-    # Map sources and targets to indices
-    source_indices = df_sankey_final['source'].apply(lambda x: labels.index(x))
-    target_indices = df_sankey_final['target'].apply(lambda x: labels.index(x))
-    weights = df_sankey_final['supply']
-
-    node_colors = [brand_colors['Red'] for l in labels]
-    link_colors = ["rgba(209, 231, 168, 0.5)" for link in df_sankey_final['source']]
-
-
-    # Calculating KPIs 
-    total_flow = flow1.drop_duplicates()["supply"].sum()
-    total_flow_text = f"{total_flow:,.0f}"
-
-    total = flow2.groupby(['source','target']).sum().reset_index()['supply'].sum()
-    urban_only = flow2.groupby(['source','target']).sum().reset_index().set_index('target').loc['Hanoi urban'].values[1]
-    urban_share = urban_only/total *100
-    urban_share_text = f"{urban_share:.1f}%"
-
-    fig = go.Figure(go.Sankey(
-        node=dict(label=labels, color=node_colors, pad=15, thickness=20),
-        link=dict(source=source_indices, target=target_indices, value=weights, color=link_colors, 
-                  hovertemplate='From %{source.label} → %{target.label}<br>Flow: %{value}<extra></extra>')
-    ))
-
-    fig.update_layout(
-        hovermode='x',
-        font=dict(size=12, color='black'),
-        paper_bgcolor=brand_colors['White'],
-        plot_bgcolor=brand_colors['White'],
-        margin=dict(l=10, r=10, t=20, b=20), 
-        width=None)
-
-    urban_fig = go.Figure(go.Pie(
-        values=[urban_share, 100-urban_share],
-        hole=0.6,
-        marker=dict(colors=[brand_colors['Red'], brand_colors['Light green']]),
-        textinfo="none",
-        labels=["Urban", "Rural"],  # Add labels for clarity
-        hoverinfo="label+percent",  # Show label, percent, and value on hover
-        hovertext=[f"Urban: {urban_share:.1f}%", f"Rural: {100-urban_share:.1f}%"]  # Custom hover text
-    ))
-    
-    urban_fig.update_layout(showlegend=False, margin=dict(l=0,r=0,t=0,b=0.1),
-                            paper_bgcolor="rgba(0,0,0,0)",  
-                            plot_bgcolor="rgba(0,0,0,0)")
-
+    return fig, drawn_now
 
-    return total_flow_text, urban_fig, fig
 
 # Populate food items grid based on selected food group
 @app.callback(
@@ -1829,267 +1516,151 @@ def update_sankey(value):
     [Input('food-group-select', 'value')]
 )
 def update_food_items_grid(selected_group):
+    # Any other value (a cleared select, a scripted request) matches no food item and is not cached
+    card_cache = datasets['lca_card_cache']
+    if not isinstance(selected_group, str) or selected_group not in card_cache:
+        return []
+    if card_cache[selected_group] is None:
+        card_cache[selected_group] = build_food_item_cards(selected_group)
+    return card_cache[selected_group]
+
+def build_food_item_cards(selected_group):
+    df_lca, traffic_lights = datasets['lca'], datasets['lca_traffic_lights']
+
     # Filter items by selected group
     filtered_df = df_lca[df_lca['Food Group'] == selected_group].sort_values('Item Cd')
-    
-    # Calculate percentile thresholds for traffic light system across all foods
-    # Lower values are better for environmental impact
-    thresholds = {
-        'Total GHG Emissions': {
-            'green': df_lca['Total GHG Emissions'].quantile(0.33),
-            'yellow': df_lca['Total GHG Emissions'].quantile(0.67)
-        },
-        'Freshwater Comsumption (l)': {
-            'green': df_lca['Freshwater Comsumption (l)'].quantile(0.33),
-            'yellow': df_lca['Freshwater Comsumption (l)'].quantile(0.67)
-        },
-        'Acidification (kg SO2eq)': {
-            'green': df_lca['Acidification (kg SO2eq)'].quantile(0.33),
-            'yellow': df_lca['Acidification (kg SO2eq)'].quantile(0.67)
-        },
-        'Eutrophication (kg PO43-eq)': {
-            'green': df_lca['Eutrophication (kg PO43-eq)'].quantile(0.33),
-            'yellow': df_lca['Eutrophication (kg PO43-eq)'].quantile(0.67)
-        }
-    }
-    
-    def get_traffic_light_colors(value, indicator):
-        """Return border and shadow colors based on traffic light system (green=good, yellow=medium, red=bad)"""
-        if value <= thresholds[indicator]['green']:
-            return {"border": "#2e7d32", "shadow": "#a5d6a7"}  # Dark green border, light green shadow
-        elif value <= thresholds[indicator]['yellow']:
-            return {"border": "#f57f17", "shadow": "#fff59d"}  # Dark yellow border, light yellow shadow
-        else:
-            return {"border": "#c62828", "shadow": "#ef9a9a"}  # Dark red border, light red shadow
-    
+    classes = traffic_lights.loc[filtered_df.index]
+
+    def mini_kpi(value, tercile, label, unit, fmt):
+        return html.Div([
+            html.Div(label, className=lca_kpi_label_class),
+            html.Div(f"{value:{fmt}}", className=lca_kpi_value_class),
+            html.Div(unit, className=lca_kpi_unit_class)
+        ], className=f"{lca_kpi_class} {lca_kpi_tercile_classes[tercile]}")
+
     # Create a card for each food item
     food_cards = []
-    for _, row in filtered_df.iterrows():
-        # Create 2x2 grid of mini KPI cards with traffic light colors
+    for position, item in enumerate(filtered_df['Item Cd']):
+        kpis = [
+            mini_kpi(filtered_df[col].iat[position], classes[col].iat[position], label, unit, fmt)
+            for col, label, unit, fmt in lca_indicators
+        ]
+
+        # 2x2 grid of mini KPI cards with traffic light colors
+        # Row 1: GHG and Water, Row 2: Acidification and Eutrophication
         mini_kpis = html.Div([
-            # Row 1: GHG and Water
-            html.Div([
-                # GHG mini card
-                html.Div([
-                    html.Div("GHG", style={"fontSize": "0.7em", "color": brand_colors['Brown'], "marginBottom": "2px"}),
-                    html.Div(f"{row['Total GHG Emissions']:.4f}", style={"fontSize": "1em", "fontWeight": "bold", "color": brand_colors['Brown']}),
-                    html.Div("kg CO₂-eq", style={"fontSize": "0.6em", "color": brand_colors['Brown']})
-                ], style={"flex": "1", "textAlign": "center", "padding": "8px", 
-                         "backgroundColor": brand_colors['White'], 
-                         "border": f"2px solid {get_traffic_light_colors(row['Total GHG Emissions'], 'Total GHG Emissions')['border']}",
-                         "boxShadow": f"0 2px 8px {get_traffic_light_colors(row['Total GHG Emissions'], 'Total GHG Emissions')['shadow']}",
-                         "borderRadius": "5px", "margin": "3px"}),
-                
-                # Water mini card
-                html.Div([
-                    html.Div("Water", style={"fontSize": "0.7em", "color": brand_colors['Brown'], "marginBottom": "2px"}),
-                    html.Div(f"{row['Freshwater Comsumption (l)']:.2f}", style={"fontSize": "1em", "fontWeight": "bold", "color": brand_colors['Brown']}),
-                    html.Div("liters", style={"fontSize": "0.6em", "color": brand_colors['Brown']})
-                ], style={"flex": "1", "textAlign": "center", "padding": "8px", 
-                         "backgroundColor": brand_colors['White'], 
-                         "border": f"2px solid {get_traffic_light_colors(row['Freshwater Comsumption (l)'], 'Freshwater Comsumption (l)')['border']}",
-                         "boxShadow": f"0 2px 8px {get_traffic_light_colors(row['Freshwater Comsumption (l)'], 'Freshwater Comsumption (l)')['shadow']}",
-                         "borderRadius": "5px", "margin": "3px"})
-            ], style={"display": "flex", "marginBottom": "5px"}),
-            
-            # Row 2: Acidification and Eutrophication
-            html.Div([
-                # Acidification mini card
-                html.Div([
-                    html.Div("Acidification", style={"fontSize": "0.7em", "color": brand_colors['Brown'], "marginBottom": "2px"}),
-                    html.Div(f"{row['Acidification (kg SO2eq)']:.6f}", style={"fontSize": "1em", "fontWeight": "bold", "color": brand_colors['Brown']}),
-                    html.Div("kg SO₂-eq", style={"fontSize": "0.6em", "color": brand_colors['Brown']})
-                ], style={"flex": "1", "textAlign": "center", "padding": "8px", 
-                         "backgroundColor": brand_colors['White'], 
-                         "border": f"2px solid {get_traffic_light_colors(row['Acidification (kg SO2eq)'], 'Acidification (kg SO2eq)')['border']}",
-                         "boxShadow": f"0 2px 8px {get_traffic_light_colors(row['Acidification (kg SO2eq)'], 'Acidification (kg SO2eq)')['shadow']}",
-                         "borderRadius": "5px", "margin": "3px"}),
-                
-                # Eutrophication mini card
-                html.Div([
-                    html.Div("Eutrophication", style={"fontSize": "0.7em", "color": brand_colors['Brown'], "marginBottom": "2px"}),
-                    html.Div(f"{row['Eutrophication (kg PO43-eq)']:.6f}", style={"fontSize": "1em", "fontWeight": "bold", "color": brand_colors['Brown']}),
-                    html.Div("kg PO₄³⁻-eq", style={"fontSize": "0.6em", "color": brand_colors['Brown']})
-                ], style={"flex": "1", "textAlign": "center", "padding": "8px", 
-                         "backgroundColor": brand_colors['White'], 
-                         "border": f"2px solid {get_traffic_light_colors(row['Eutrophication (kg PO43-eq)'], 'Eutrophication (kg PO43-eq)')['border']}",
-                         "boxShadow": f"0 2px 8px {get_traffic_light_colors(row['Eutrophication (kg PO43-eq)'], 'Eutrophication (kg PO43-eq)')['shadow']}",
-                         "borderRadius": "5px", "margin": "3px"})
-            ], style={"display": "flex"})
+            html.Div(kpis[:2], className=f"{lca_kpi_row_class} {lca_kpi_first_row_class}"),
+            html.Div(kpis[2:], className=lca_kpi_row_class)
         ])
         
         # Main card for this food item
         food_card = dbc.Card([
             dbc.CardBody([
-                html.H5(row['Item Cd'], style={
-                    "color": brand_colors['Brown'],
-                    "fontWeight": "bold",
-                    "marginBottom": "10px",
-                    "textAlign": "center",
-                    "fontSize": "clamp(0.9em, 1em, 1.1em)"
-                }),
+                html.H5(item, className=food_card_title_class),
                 mini_kpis
             ])
-        ], style={
-            "backgroundColor": brand_colors['White'],
-            "borderRadius": "10px",
-            "boxShadow": "0 2px 6px rgba(0,0,0,0.1)",
-            "padding": "10px",
-            "height": "100%"
-        })
+        ], className=food_card_class)
         
         food_cards.append(food_card)
     
     return food_cards
 
-# Callback for SDG filter buttons
+# Callback for SDG filter buttons: each icon toggles its SDG in the selection, which is
+# matched against the indicators through the inverted SDG index
 @app.callback(
-    [Output('indicators_table', 'data'),
+    [Output('indicators_table', 'page_current'),
      Output('sdg-filter-status', 'children'),
-     Output('sdg-filter-1', 'style'),
-     Output('sdg-filter-2', 'style'),
-     Output('sdg-filter-3', 'style'),
-     Output('sdg-filter-4', 'style'),
-     Output('sdg-filter-5', 'style'),
-     Output('sdg-filter-6', 'style'),
-     Output('sdg-filter-7', 'style'),
-     Output('sdg-filter-8', 'style'),
-     Output('sdg-filter-9', 'style'),
-     Output('sdg-filter-10', 'style'),
-     Output('sdg-filter-11', 'style'),
-     Output('sdg-filter-12', 'style'),
-     Output('sdg-filter-13', 'style'),
-     Output('sdg-filter-14', 'style'),
-     Output('sdg-filter-15', 'style'),
-     Output('sdg-filter-16', 'style'),
-     Output('sdg-filter-17', 'style')],
-    [Input('sdg-filter-1', 'n_clicks'),
-     Input('sdg-filter-2', 'n_clicks'),
-     Input('sdg-filter-3', 'n_clicks'),
-     Input('sdg-filter-4', 'n_clicks'),
-     Input('sdg-filter-5', 'n_clicks'),
-     Input('sdg-filter-6', 'n_clicks'),
-     Input('sdg-filter-7', 'n_clicks'),
-     Input('sdg-filter-8', 'n_clicks'),
-     Input('sdg-filter-9', 'n_clicks'),
-     Input('sdg-filter-10', 'n_clicks'),
-     Input('sdg-filter-11', 'n_clicks'),
-     Input('sdg-filter-12', 'n_clicks'),
-     Input('sdg-filter-13', 'n_clicks'),
-     Input('sdg-filter-14', 'n_clicks'),
-     Input('sdg-filter-15', 'n_clicks'),
-     Input('sdg-filter-16', 'n_clicks'),
-     Input('sdg-filter-17', 'n_clicks'),
-     Input('sdg-clear-filter', 'n_clicks')]
+     Output({'type': 'sdg-filter', 'index': ALL}, 'className'),
+     Output('sdg-selected', 'data')],
+    [Input({'type': 'sdg-filter', 'index': ALL}, 'n_clicks'),
+     Input('sdg-clear-filter', 'n_clicks'),
+     Input('sdg-match-mode', 'value')],
+    State('sdg-selected', 'data')
 )
-def filter_by_sdg(*args):
+def filter_by_sdg(sdg_clicks, clear_clicks, match_mode, selected):
     ctx = dash.callback_context
-    
-    # Default style for buttons
-    default_style = {
-        "border": "3px solid transparent",
-        "borderRadius": "8px",
-        "padding": "5px",
-        "margin": "5px",
-        "cursor": "pointer",
-        "backgroundColor": "transparent",
-        "transition": "all 0.2s"
-    }
-    
-    # Selected style
-    selected_style = {
-        "border": f"3px solid {brand_colors['Red']}",
-        "borderRadius": "8px",
-        "padding": "5px",
-        "margin": "5px",
-        "cursor": "pointer",
-        "backgroundColor": brand_colors['Light green'],
-        "transition": "all 0.2s",
-        "boxShadow": "0 2px 8px rgba(168, 0, 80, 0.3)"
-    }
-    
-    # All buttons default style
-    button_styles = [default_style.copy() for _ in range(17)]
-    
-    # Get all columns including SDG Numbers
-    display_cols = ['Dimensions', 'Components', 'Indicators', 'SDG impact area/target', 'SDG Numbers']
-    
-    if not ctx.triggered:
-        return df_indicators[display_cols].to_dict('records'), "Click an SDG icon to filter indicators", *button_styles
-    
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    selected = list(selected or [])
+    button_id = ctx.triggered_id
     
     # Clear filter
     if button_id == 'sdg-clear-filter':
-        return df_indicators[display_cols].to_dict('records'), "Showing all indicators", *button_styles
-    
-    # Extract SDG number from button id
-    if button_id.startswith('sdg-filter-'):
-        sdg_num = button_id.split('-')[-1]
-        
-        # Filter dataframe to rows containing this SDG number
-        filtered_df = df_indicators[df_indicators['SDG Numbers'].str.contains(sdg_num, na=False)]
-        
-        # Update button style for selected SDG
-        sdg_index = int(sdg_num) - 1
-        button_styles[sdg_index] = selected_style
-        
-        status = f"Showing {len(filtered_df)} indicators for SDG {sdg_num}"
-        
-        return filtered_df[display_cols].to_dict('records'), status, *button_styles
-    
-    return df_indicators[display_cols].to_dict('records'), "Click an SDG icon to filter indicators", *button_styles
-
-# Linking the tabs to page content loading 
-@app.callback(
-    Output("tab-content", "children"),
-    [
-        Input("tab-1-stakeholders", "n_clicks"),
-        Input("tab-2-supply", "n_clicks"),
-        Input("tab-3-sustainability", "n_clicks"),
-        Input("tab-4-poverty", "n_clicks"),
-        Input("tab-5-labour", "n_clicks"),
-        Input("tab-6-resilience", "n_clicks"),
-        Input("tab-7-affordability", "n_clicks"),
-        Input("tab-8-losses", "n_clicks"),
-        Input("tab-9-policies", "n_clicks"),
-        Input("tab-10-nutrition", "n_clicks"),
-        Input("tab-11-footprints", "n_clicks"),
-        Input("tab-12-behaviour", "n_clicks"),
-    ]
-)
-def render_tab_content(n1, n2, n3, n4, n5, n6, n7, n8, n9, n10, n11, n12):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return landing_page_layout()
-    tab_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    if tab_id == "tab-1-stakeholders":
-        return stakeholders_tab_layout()
-        
-    elif tab_id == "tab-2-supply":
-        return supply_tab_layout()
+        selected = []
     
-    elif tab_id == "tab-3-sustainability":
-        return sustainability_tab_layout()
+    # Toggle the SDG number from the button id
+    elif isinstance(button_id, dict):
+        sdg_num = str(button_id['index'])
+        selected = [s for s in selected if s != sdg_num] if sdg_num in selected else selected + [sdg_num]
     
-    elif tab_id == "tab-4-poverty":
-        return poverty_tab_layout()
+    button_classes = [sdg_filter_class_name(output['id']['index'], selected) for output in ctx.outputs_list[2]]
+    match_all = match_mode == 'all'
+    rows, _ = sdg_selection(selected, match_all)
     
-    elif tab_id == "tab-7-affordability":
-        return affordability_tab_layout()
+    if not selected:
+        status = "Showing all indicators" if button_id == 'sdg-clear-filter' else "Click an SDG icon to filter indicators"
+    elif len(selected) == 1:
+        status = f"Showing {len(rows)} indicators for SDG {selected[0]}"
+    else:
+        joined = (" and " if match_all else " or ").join(sorted(selected, key=int))
+        status = f"Showing {len(rows)} indicators for SDG {joined}"
     
-    elif tab_id == "tab-9-policies":
-        return policies_tab_layout()
+    # Back to the first page of the new selection
+    return 0, status, button_classes, selected
 
-    elif tab_id == "tab-10-nutrition":
-        return health_nutrition_tab_layout()
-    
-    elif tab_id == "tab-11-footprints":
-        return footprints_tab_layout()
+# Server-side paging, filtering and sorting of the indicators table, within the SDG selection
+@app.callback(
+    [Output('indicators_table', 'data'),
+     Output('indicators_table', 'page_count'),
+     Output('indicators_table', 'tooltip_data')],
+    [Input('indicators_table', 'page_current'),
+     Input('indicators_table', 'page_size'),
+     Input('indicators_table', 'sort_by'),
+     Input('indicators_table', 'filter_query'),
+     Input('sdg-selected', 'data'),
+     Input('sdg-match-mode', 'value')]
+)
+def update_indicators_table(page_current, page_size, sort_by, filter_query, selected, match_mode):
+    rows, rows_key = sdg_selection(selected, match_mode == 'all')
+    records, page_count, _ = datasets['indicators_query'].page(
+        page_current, page_size, filter_query, sort_by, rows=rows, rows_key=rows_key)
+    tooltip_data = [
+        {column: {'value': str(value), 'type': 'text'} for column, value in row.items()}
+        for row in records
+    ]
+    return records, page_count, tooltip_data
 
-    else:
-        return landing_page_layout()
+# Server-side paging, filtering and sorting of the policies table
+@app.callback(
+    [Output('policies_table', 'data'),
+     Output('policies_table', 'page_count')],
+    [Input('policies_table', 'page_current'),
+     Input('policies_table', 'page_size'),
+     Input('policies_table', 'sort_by'),
+     Input('policies_table', 'filter_query')]
+)
+def update_policies_table(page_current, page_size, sort_by, filter_query):
+    records, page_count, _ = datasets['policies_query'].page(page_current, page_size, filter_query, sort_by)
+    return records, page_count
+
+# Tab layouts are built on first visit and cached in the dataset registry, so switching tabs
+# reuses the same component trees until the data embedded in them is re-loaded
+dashboard.add_tab("tab-1-stakeholders", stakeholders_tab_layout, depends=['stakeholders', 'stakeholder_pies'])
+dashboard.add_tab("tab-2-supply", supply_tab_layout)
+dashboard.add_tab("tab-3-sustainability", sustainability_tab_layout, depends=['indicators'])
+dashboard.add_tab("tab-4-poverty", poverty_tab_layout, depends=['mpi_variables', 'mpi_map_figure'])
+dashboard.add_tab("tab-7-affordability", affordability_tab_layout, depends=['outlet_layer_files'])
+dashboard.add_tab("tab-9-policies", policies_tab_layout, depends=['policies'])
+dashboard.add_tab("tab-10-nutrition", health_nutrition_tab_layout, depends=['nutrition_kpi_sections'])
+dashboard.add_tab("tab-11-footprints", footprints_tab_layout, depends=['lca'])
+dashboard.set_landing(landing_page_layout)
+# Food item cards of every group, as sent by update_food_items_grid
+dashboard.add_payload_output("tab-11-footprints: food items grid", lambda: [
+    card for group in sorted(datasets['lca']['Food Group'].dropna().unique())
+    for card in update_food_items_grid(group)
+])
 
 
 if __name__ == '__main__':
-    app.run(debug=True, port=8051)
+    logging.basicConfig(level=logging.INFO)
+    # Build the supply figures (and MPI bar figures in warm-start mode) before serving
+    dashboard.warm()
+    app.run(debug=debug, port=8051)
@@ -1,340 +1,121 @@
-import os
-import numpy as np
-import xarray as xr
-import rioxarray as rxr
-import matplotlib.pyplot as plt
-import pandas as pd
-import geopandas as gpd
-import matplotlib.colors as colors
-import seaborn as sns
-import plotly.express as px
-import json
-from lorem_text import lorem
-import dash
-from dash import Dash, html, dcc, Output, Input, State, callback, dash_table
+from dash import html, dcc, Output, Input, dash_table, no_update
 import dash_bootstrap_components as dbc
-import random
-from matplotlib.colors import ListedColormap, LinearSegmentedColormap
-import plotly.graph_objects as go
 
+import logging
 import warnings
 warnings.filterwarnings("ignore")
 
-app = Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
-
-#colors = {
-#  'eco_green': '#AFC912',
-#  'forest_green': '#4C7A2E',
-#  'earth_brown': '#7B5E34',
-#  'harvest_yellow': '#F2D16B',
-#  'neutral_light': '#F5F5F5',
-#  'dark_text': '#333333',
-#  'accent_warm': '#E07A5F'
-#}
-
-
-green_gradient = [
-    "#095d40",
-    "#206044",
-    "#3a6649",
-    "#547d5b",
-    "#6f946d",
-    "#8aa97f",
-    "#a5be91",
-    "#b8d099",
-    "#c1d88e",
-    "#d1e7a8"
-]
-
-brand_colors = {    'Black':         '#333333',
-                    "Brown":         "#313715",
-                    "Red":           "#A80050",
-                    "Dark green":    "#939f5c",
-                    "Mid green":     "#bbce8a",
-                    "Light green":   "#E8F0DA",
-                    "White":         "#ffffff"  
+from dashboard_app import CityDashboard, debug, figure_cache
+from dashboard_components import brand_colors, card_style, header_style, kpi_card_style_2
+from dashboard_data import TrendStore
+from dashboard_figures import dumbbell_figure, supply_figures, trend_figure
+
+# ------------------------- City configuration ------------------------- #
+
+# Data files, column names, map zoom and tab labels of Hanoi. The datasets, sidebar, footer and
+# callbacks every city shares are built from this by CityDashboard (see dashboard_app.py), which
+# mounts the app under /hanoi/ on the server shared by all cities.
+config = {
+    'name': 'Hanoi',
+    'slug': 'hanoi',
+    'tab_labels': [
+        "Food systems stakeholders",
+        "Food flows, supply & value chains",
+        "Sustainability Metrics & Indicators",
+        "Multidimensional Poverty",
+        "Labour, skills & green jobs",
+        "Resilience to food system shocks",
+        "Dietry mapping & Affordability",
+        "Food losses & waste",
+        "Food system policies",
+        "Health & Nutrition",
+        "Environmental footprints of food & diets",
+        "Behaviour change tool (AI Chatbot & Game)",
+    ],
+    'sidebar_image': None,
+    'footer_logos': [('logos/DeSIRA.png', '60px'), ('logos/IFAD.png', '50px'),
+                     ('logos/RyanInstitute.png', '100px')],
+    'mpi_file': 'Hanoi_districts_MPI.geojson',
+    'mpi_column': 'Normalized',
+    'mpi_range': (0, 1),
+    'mpi_long_file': 'Hanoi_districts_MPI_long.csv',
+    'map_zoom': 7.75,
+    'district_zoom': 10,
+    'bar_label': "District",
+    'bar_row_height': 25,
+    'stakeholder_file': 'hanoi_stakeholders.csv',
+    # Stakeholder column behind each pie filter dropdown option
+    'stakeholder_facets': {
+        'Area': 'Area of Activity in the food system',
+        'Category': 'Stakeholder catagorization ',
+    },
+    'coming_soon': True,
 }
 
-greens_pie_palette = [
-    brand_colors['Light green'],   # "#E8F0DA"
-    brand_colors['Mid green'],     # "#bbce8a"
-    brand_colors['Dark green'],    # "#939f5c"
-    "#b7c49a",                     # lighter tint of Dark green
-    "#d6e5b8",                     # lighter tint of Mid green
-    "#e3f6d5",                     # very light green
-    "#c1d88e",                     # soft khaki-green
-    "#d1e7a8",                     # pastel green
-    "#aabf7e",                     # olive green
-    "#8aa97f",                     # muted green
-]
-
-reds_pie_palette = [
-    "#a80050",   # main brand red
-    "#84003d",   # deep accent red
-    "#C97A9A",   # soft pink
-    "#E07A5F",   # warm accent
-    "#F2D16B",   # harvest yellow (for contrast)
-    "#F5F5F5",   # neutral light
-    "#7B5E34",   # earth brown
-    "#C97A9A",   # repeat pink
-    "#E07A5F",   # repeat accent
-    "#F2D16B"    # repeat yellow
-]
-
-plotting_palette_cat = [
-    "#a80050",  
-    "#84003d",   
-    "#F5F5F5",   
-    '#E8F0DA',
-    "#bbce8a",
-    "#939f5c",
-    "#E07A5F",   
-    "#d33030",
-]
-
-tabs = [
-        'Food systems stakeholders',                #Populated
-        'Food flows, supply & value chains',        #Populated
-        'Sustainability Metrics & Indicators',      #Currently empty
-        'Multidimensional Poverty',                 #Populated
-        'Resilience to food system shocks',         #In progress
-        'Dietary mapping & affordability',          #Semi-Populated (In development)
-        'Food losses & waste',                      #Currently empty
-        'Food system policies',                     #Currently empty
-        'Health & nutrition',                       #Populated
-        'Environmental footprints of food & diets', #Currently empty 
-        'Behaviour change tool (AI Chatbot & Game)' #Currently empty (In development)
-        ]
-
+dashboard = CityDashboard(__name__, config)
+app, datasets = dashboard.app, dashboard.datasets
+sidebar = dashboard.sidebar
 
 # -------------------------- Loading and Formatting All Data ------------------------- #
 
-# Loading and Formatting MPI Data
-path = "/home/jemima/Data/EcoFoodSystems_Dashboard_Development/assets/data/"
-MPI = gpd.read_file(path+"Hanoi_districts_MPI.geojson")#.set_index('Dist_Name')
-MPI['Normalized'] = MPI['Normalized'].astype(float)
-MPI['Dist_Name'] = MPI['Dist_Name'].astype(str)
-geojson = json.loads(MPI.to_json())
-
-# Loading and Formatting MPI CSV Data=
-df_mpi = pd.read_csv(path+"Hanoi_districts_MPI_long.csv")
-variables = df_mpi['Variable'].unique()
-
-# Loading and Formatting Food Systems Stakeholders Data
-df_sh = pd.read_csv(path+"/hanoi_stakeholders.csv").dropna(how='any').astype(str)
+# Datasets are registered in this city's scope of the shared registry and loaded the first time a
+# tab or callback needs them (then kept in memory and re-loaded if the file changes). The MPI,
+# stakeholder and supply datasets are registered by CityDashboard.
 
 # Pre-calculate fixed column widths
-column_widths = {}
-for col in df_sh.columns:
-    max_len = max(len(str(col)), df_sh[col].astype(str).str.len().max())
-    column_widths[col] = max(max_len * 10, 100)  # minimum 100px per column
-
-# Loading supply flow data for Sankey Diagram
-df_sankey = pd.read_csv(path+'/hanoi_supply.csv')
+@datasets.register('stakeholder_column_widths', depends=['stakeholders'])
+def load_stakeholder_column_widths():
+    df_sh = datasets['stakeholders']
+    column_widths = {}
+    for col in df_sh.columns:
+        max_len = max(len(str(col)), df_sh[col].astype(str).str.len().max())
+        column_widths[col] = max(max_len * 10, 100)  # minimum 100px per column
+    return column_widths
 
 # Loading affordability data
-df_affordability =  pd.read_csv(path+'/hanoi_affordability_cleaned.csv')
+@datasets.register('affordability', 'hanoi_affordability_cleaned.csv')
+def load_affordability():
+    return datasets.read_table('hanoi_affordability_cleaned.csv')
 
 # Loading dietary data
-df_diet = pd.read_csv(path+'/hanoi_health_nutrition_cleaned.csv')
-df_diet_2 = pd.read_csv(path+'hanoi_health_nutrition_cleaned_2.csv')
+@datasets.register('diet', 'hanoi_health_nutrition_cleaned.csv')
+def load_diet():
+    return datasets.read_table('hanoi_health_nutrition_cleaned.csv')
+
+# Affordability and health indicators split once into per-category Year/value arrays by region;
+# the trend figure of each category is built on first selection and then served from memory
+@datasets.register('affordability_trends', depends=['affordability'])
+def load_affordability_trends():
+    return TrendStore(datasets['affordability'])
+
+@datasets.register('health_trends', depends=['diet_2'])
+def load_health_trends():
+    return TrendStore(datasets['diet_2'])
+
+trend_colors = [brand_colors['Red'], brand_colors['Dark green']]
+
+# Diet indicators pivoted once into a Year x Cat matrix (categories in order of appearance),
+# so the dumbbell chart of any start year is a row lookup
+@datasets.register('diet_matrix', depends=['diet'])
+def load_diet_matrix():
+    df_diet = datasets['diet']
+    matrix = df_diet.drop_duplicates(['Year', 'Cat']).pivot(index='Year', columns='Cat', values='value')
+    return matrix.reindex(columns=df_diet['Cat'].unique())
+
+@datasets.register('diet_2', 'hanoi_health_nutrition_cleaned_2.csv')
+def load_diet_2():
+    return datasets.read_table('hanoi_health_nutrition_cleaned_2.csv')
 
 # ------------------------- Preloading Figures ------------------------- #
-# Adding MPI Choropleth to the map
-fig_ch = px.choropleth_mapbox(MPI, geojson=geojson, 
-                    locations="Dist_Name", 
-                    featureidkey="properties.Dist_Name",
-                    color='Normalized',
-                    color_continuous_scale="Reds",
-                    opacity=0.7,
-                    range_color=(0, 1),
-                    labels={'Normalized':'MPI',
-                            'Dist_Name':'District Name'},
-
-                    mapbox_style="carto-positron",
-                    zoom=7.75,
-                    center={"lat": MPI.geometry.centroid.y.mean(), 
-                            "lon": MPI.geometry.centroid.x.mean()}
-                    )
-
-fig_ch.update_layout(coloraxis_colorbar=None)
-fig_ch.update_coloraxes(showscale=False)
-
-fig_ch.update_layout(
-    paper_bgcolor=brand_colors['White'],
-    plot_bgcolor=brand_colors['White'],
-    margin=dict(l=0, r=0, t=0, b=0)
-)
-
-# Initialising the stakeholder piechart
-df_sh_area_count = pd.DataFrame(df_sh['Area of Activity in the food system'].value_counts()).reset_index()
-df_sh_area_count.columns = ['name','count']
-slice_colors = plotting_palette_cat  # or greens_pie_palette
-text_colors = []
-for color in slice_colors:
-    # Simple luminance check for hex color
-    rgb = tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-    luminance = 0.299*rgb[0] + 0.587*rgb[1] + 0.114*rgb[2]
-    text_colors.append('white' if luminance < 180 else brand_colors['Brown'])
-
-initial_piechart_1 = px.pie(df_sh_area_count, values='count', names='name', hole=0, 
-                color_discrete_sequence=slice_colors)
-
-initial_piechart_1.update(layout_showlegend=False)
-initial_piechart_1.update_traces(textfont_color=text_colors, hoverinfo='percent', textinfo='label', textposition='inside', insidetextorientation='radial')
-initial_piechart_1.update_layout(margin = dict(t=0.25, l=0.25, r=0.25, b=0.25))
+# Initial figures are built from the datasets on first use and memoized alongside them
 
 # Preloading Sankey Diagram 2022
-df_sankey_2022 = df_sankey[df_sankey['Year']==2022]
-flow1 = df_sankey_2022[['province', 'Target', 'Supply to Hanoi']].rename(
-    columns={'province':'source', 'Target':'target', 'Supply to Hanoi':'supply'})
-
-flow2 = df_sankey_2022[['Target', 'Target_1', 'Rice supply']].rename(
-    columns={'Target':'source', 'Target_1':'target', 'Rice supply':'supply'})
-
-df_sankey_final = pd.concat([flow1.drop_duplicates(), flow2.groupby(['source','target']).sum().reset_index()], ignore_index=True)
-labels = list(pd.unique(df_sankey_final[['source','target']].values.ravel('K')))
-
-source_indices = df_sankey_final['source'].apply(lambda x: labels.index(x))
-target_indices = df_sankey_final['target'].apply(lambda x: labels.index(x))
-weights = df_sankey_final['supply']
-
-#node_colors = [brand_colors['Seagreen'] if l in [ 'Hanoi rural', 'Hanoi urban'] else brand_colors['Dark khaki'] if "Hanoi" == l else brand_colors['Dark slate grey'] for l in labels]
-node_colors = [brand_colors['Red'] for l in labels]
-link_colors = ["rgba(209, 231, 168, 0.5)" for link in df_sankey_final['source']]
-fig_sankey = go.Figure(data=[go.Sankey(
-    node=dict(label=labels, color=node_colors, pad=15, thickness=20),
-    link=dict(source=source_indices, target=target_indices, value=weights, color=link_colors)
-    )])
-
-fig_sankey.update_layout(
-    hovermode='x',
-    font=dict(size=12, color='black'),
-    paper_bgcolor=brand_colors['White'],
-    plot_bgcolor=brand_colors['White'],
-    margin=dict(l=10, r=10, t=30, b=10),  # reduce margins
-)
-
-# Custom styling 
-tabs_style = {
-                "backgroundColor": brand_colors['Mid green'],
-                "color": brand_colors['Brown'],
-                "width":"100%",
-                "margin-bottom": "4px",
-                "borderRadius": "8px",
-                "padding": "6px 4px",
-                "fontWeight": "bold",
-                "textAlign": "left",
-                "fontSize": "clamp(0.6em, 1vw, 1.1em)",
-                "boxShadow": "0 2px 6px rgba(0,0,0,0.08)",
-                "border": "none",
-                "textDecoration": "none",
-                "whiteSpace": "normal",
-                "box-sizing": "border-box",
-                "maxWidth": "90%",
-                "wordBreak": "normal"
-            }
-
-kpi_card_style ={"textAlign": "center", 
-                "backgroundColor": brand_colors['White'], 
-                "color":brand_colors['Brown'],
-                "font-weight":"bold",
-                "border-radius": "8px",
-                "padding":"10px",
-                "margin-bottom":"10px",
-                "flexDirection": "column",
-                "border": "2px solid " + brand_colors['White'],
-                }
-
-kpi_card_style_2 = {
-                "textAlign": "center",
-                "backgroundColor": brand_colors['White'],
-                "borderRadius": "12px",
-                "boxShadow": "0 4px 16px rgba(0,0,0,0.10)",
-                "padding": "clamp(4px, 3vw, 12px)", 
-                "padding":"6px",
-                "marginBottom": "12px",
-                "width": "100%",
-                #"maxWidth": "350px",
-                "height": "auto",
-                #"minWidth": "220px"
-            }
-
-header_style = {"color": brand_colors['Brown'], 
-                'fontWeight': 'bold',
-                "margin": "0", 
-                'textAlign': 'center',
-                "fontSize": "clamp(0.8em, 3vw, 1.25em)",
-                'whiteSpace': 'normal',
-                }
-
-card_style = {
-    "backgroundColor": brand_colors['White'],
-    "border-radius": "10px",
-    "box-shadow": "0 2px 6px rgba(0,0,0,0.1)",
-    "padding": "20px",  # Increase padding for consistency
-    "margin-bottom": "15px"
-}
+@datasets.register('initial_sankey', depends=['sankey_links'])
+def build_initial_sankey():
+    return supply_figures(dashboard.slug, datasets.version('sankey_links'), 2022, datasets['sankey_links'])[2]
 
-
-# ----------------------- App Layout Components -------------------------- #
-
-sidebar = dbc.Card([
-    #html.Img(src="/assets/logos/temp_efs_logo.png", style={"width": "40%", "margin-bottom": "10px", "justifyContent": "center"}),
-    dbc.Nav([
-        dbc.NavItem(dbc.NavLink("Food systems stakeholders", id="tab-1-stakeholders", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Food flows, supply & value chains", id="tab-2-supply", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Sustainability Metrics & Indicators", id="tab-3-sustainability", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Multidimensional Poverty", id="tab-4-poverty", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Labour, skills & green jobs", id="tab-5-labour", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Resilience to food system shocks", id="tab-6-resilience", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Dietry mapping & Affordability", id="tab-7-affordability", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Food losses & waste", id="tab-8-losses", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Food system policies", id="tab-9-policies", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Health & Nutrition", id="tab-10-nutrition", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Environmental footprints of food & diets", id="tab-11-footprints", href="#", active="exact"), style=tabs_style),
-        dbc.NavItem(dbc.NavLink("Behaviour change tool (AI Chatbot & Game)", id="tab-12-behaviour", href="#", active="exact"), style=tabs_style),
-    ], 
-    vertical="md", 
-    pills=True, 
-    fill=True,
-    style={"marginTop": "20px",
-           "alignItems": "center",
-           "zIndex": 1000})
-
-], style={
-    "backgroundColor": brand_colors['Light green'],
-    "boxShadow": "0 2px 8px rgba(0,0,0,0.08)",
-    "borderRadius": "12px",
-    "padding": "10px",
-    "height": "100%",
-    "width": "100%",
-    "display": "flex",
-    "flexDirection": "column",
-    "justifyContent": "flex-start",
-    "overflowY": "auto",  
-})
-
-footer = html.Footer([
-        html.Div([
-            html.Img(src="/assets/logos/DeSIRA.png", style={'height': '60px', 'margin': '0 10px'}),
-            html.Img(src="/assets/logos/IFAD.png", style={'height': '50px', 'margin': '0 10px'}),
-            html.Img(src="/assets/logos/RyanInstitute.png", style={'height': '100px', 'margin': '0 10px'})
-        ], style={"display": "flex", "align-items": "center"})
-    ], style={
-        "width": "100%",
-        "height": "100px",
-        "backgroundColor": brand_colors['Mid green'],
-        "display": "flex",
-        "alignItems": "center",
-        "justifyContent": "space-between",
-        "margin-top": "0",
-        "border-radius": "10px 10px 0 0"
-    })
-   
 # ------------------------- Main app layout ------------------------- #
 
-
 def landing_page_layout():
     tab_labels = [
         "Food systems stakeholders", "Food flows, supply & value chains", "Sustainability Metrics / Indicators", "Multidimensional Poverty",
@@ -439,7 +220,7 @@ def landing_page_layout():
                                         "height":"auto",
                                         "display": "block",
                                         "marginTop": "auto",
-                                        "backgroundImage": "url('/assets/photos/sample_header.png')",  # <-- Path to your image
+                                        "backgroundImage": dashboard.background_image('photos/sample_header.png'),
                                         "backgroundSize": "cover",        # Image covers the whole area
                                         "backgroundPosition": "center",   # Center the image
                                         "backgroundRepeat": "no-repeat"   # Don't repeat the image
@@ -448,9 +229,9 @@ def landing_page_layout():
         # Footer logos (optional)
         html.Footer([
             html.Div([
-                html.Img(src="/assets/logos/DeSIRA.png", style={'height': '40px', 'margin': '0 10px'}),
-                html.Img(src="/assets/logos/IFAD.png", style={'height': '35px', 'margin': '0 10px'}),
-                html.Img(src="/assets/logos/RyanInstitute.png", style={'height': '70px', 'margin': '0 10px'})
+                dashboard.image("logos/DeSIRA.png", style={'height': '40px', 'margin': '0 10px'}),
+                dashboard.image("logos/IFAD.png", style={'height': '35px', 'margin': '0 10px'}),
+                dashboard.image("logos/RyanInstitute.png", style={'height': '70px', 'margin': '0 10px'})
             ], style={
                 "display": "flex",
                 "justifyContent": "center",
@@ -472,23 +253,11 @@ def landing_page_layout():
 
 #------------------------- App Layout ----------------------- #
 
-app.layout = html.Div([
-
-                    html.Div(id="tab-content", children=landing_page_layout(), style={"width": "100%",
-                                                                                            "height": "100%"})
-
-                    # Parent container for full page
-                    ], style={
-                        "display": "flex",
-                        "flexDirection": "column",
-                        "height": "100vh",
-                        "width": "100vw"
-            })
-
 
 # ------------------------- Defining tab layouts ------------------------- #
 
 def stakeholders_tab_layout():
+    df_sh, column_widths = datasets['stakeholders'], datasets['stakeholder_column_widths']
     return html.Div([
 
         html.Div([sidebar], style={
@@ -556,7 +325,7 @@ def stakeholders_tab_layout():
             dbc.Card([
                 dbc.CardBody([
                     dcc.Graph(id='piechart', 
-                              figure=initial_piechart_1, 
+                              figure=datasets['stakeholder_pies']['Area'], 
                               style={
                                 "flex": "1 1 auto",
                                 "height":"90%",
@@ -575,7 +344,8 @@ def stakeholders_tab_layout():
                         "box-shadow": "0 2px 6px rgba(0,0,0,0.1)",
                         "backgroundColor": brand_colors['White'],
                         "border-radius": "10px"}),
-            dcc.Store(id='selected_slice', data=None)
+            dcc.Store(id='selected_slice', data=None),
+            dcc.Store(id='stakeholder-client-data', data=dashboard.stakeholder_client_data())
         ], style={
             "flex": "1 1 30%",
             "height": "100%",
@@ -594,7 +364,7 @@ def stakeholders_tab_layout():
                 dbc.CardBody([
                     dash_table.DataTable(
                         id='sh_table',
-                        data=df_sh.to_dict('records'),
+                        data=[] if dashboard.stakeholder_clientside else dashboard.stakeholder_records(),
                         columns=[{"name": str(i), "id": str(i)} for i in df_sh.columns],
                         style_header={
                             'fontWeight': 'bold',
@@ -742,7 +512,7 @@ def supply_tab_layout():
                                 type="circle",
                                 children=dcc.Graph(
                                     id="sankey-graph", 
-                                    figure=fig_sankey,
+                                    figure=datasets['initial_sankey'],
                                     style={"width": "100%", "height":"70vh"}  
                                 )
                             ),
@@ -805,6 +575,7 @@ def supply_tab_layout():
 
 
 def poverty_tab_layout():
+    variables = datasets['mpi_variables']
     return html.Div([
 
         html.Div([sidebar], style={
@@ -896,11 +667,13 @@ def poverty_tab_layout():
         html.Div([
             dcc.Graph(
                 id='map',
-                figure=fig_ch,
+                figure=datasets['mpi_map_figure'],
                 style={"height": "100%",
                        "width": "100%",  # fill the parent div
                        "padding": "0",
-                       "margin": "0"})
+                       "margin": "0"}),
+            # Zoom whose simplified boundaries the map shows (see update_map_on_bar_click)
+            dcc.Store(id='map-boundary-zoom', data=config['map_zoom'])
         ], style={
             "flex": "1",
             "height": "100%",
@@ -1029,6 +802,7 @@ def affordability_tab_layout():
         })
 
 def diet_nutrition_layout():
+    df_diet_2 = datasets['diet_2']
     labels = df_diet_2['Cat'].unique()
     return html.Div([
                 # sidebar container
@@ -1180,252 +954,22 @@ def diet_nutrition_layout():
                     "backgroundColor": brand_colors['Light green']
         })
 
-# ------------------------- Callbacks ------------------------- #
-
-# Linking the dropdown to the bar chart for the MPI page    
-@app.callback(
-    Output('bar-plot', 'figure'),
-    Input('variable-dropdown', 'value')
-)
-def update_bar(selected_variable):
-    # Sort by selected variable, descending
-    filtered_df = df_mpi[df_mpi["Variable"]==selected_variable]
-    sorted_df = filtered_df.sort_values('Value', ascending=False)
-    fig = px.bar(
-        sorted_df,
-        x='Value',
-        y='Dist_Name',
-        orientation='h',
-        hover_data=['Dist_Name'],
-        labels={'Dist_Name': "District",
-                'Value':"Percentage of Deprived Households"},
-        color_discrete_sequence=[brand_colors['Red']]
-    )
-    fig.update_layout(yaxis={'categoryorder':'total ascending'},
-                      height=25 * len(sorted_df),
-                      margin=dict(l=0.15, r=0.1, t=0.15, b=0.3),
-                      hoverlabel=dict(
-                        bgcolor="white",      # Tooltip background color
-                        font_color="black",   # Tooltip text color
-    ))
-
-    return fig
-
-# Adding MPI map and linking it to the bar chart via click
-@app.callback(
-    Output('map', 'figure'),
-    Input('bar-plot', 'clickData'),
-    Input('variable-dropdown', 'value'),
-    prevent_initial_call=True
-)
-def update_map_on_bar_click(clickData, selected_variable):
-    center = {
-        "lat": MPI.geometry.centroid.y.mean(),
-        "lon": MPI.geometry.centroid.x.mean()
-    }
-    zoom = 7.75
-
-    MPI_display = MPI.copy()
-    MPI_display['opacity'] = 0.7
-    MPI_display['line_width'] = 0.8
-
-    # If a bar is clicked, zoom to that district
-    if clickData and 'points' in clickData:
-        selected_dist = clickData['points'][0]['y']  # y is Dist_Name for horizontal bar
-        match = MPI[MPI['Dist_Name'] == selected_dist]
-        if not match.empty:
-            #centroid = match.geometry.centroid
-            center = {
-                "lat": match.geometry.centroid.y.values[0],
-                "lon": match.geometry.centroid.x.values[0]
-            }
-            #area = match.geometry.area.values[0]
-            #zoom = max(8, min(12, 12 - area * 150))  # Zoom in closer
-            # Highlight: set opacity and line_width for the selected district
-
-            zoom = 10
-            MPI_display.loc[MPI_display['Dist_Name'] == selected_dist, 'opacity'] = 1
-            MPI_display.loc[MPI_display['Dist_Name'] == selected_dist, 'line_width'] = 2
-
-
-    fig = px.choropleth_mapbox(
-        MPI,
-        geojson=geojson,
-        locations="Dist_Name",
-        featureidkey="properties.Dist_Name",
-        color='Normalized',
-        color_continuous_scale="Reds",
-        opacity=0.7,
-        range_color=(0, 1),
-        labels={'Normalized':'MPI','Dist_Name':'District Name'},
-        mapbox_style="carto-positron",
-        zoom=zoom,
-        center=center
-    )
-
-    
-    fig.update_layout(coloraxis_colorbar=None)
-    fig.update_coloraxes(showscale=False)
-
-    fig.update_layout(
-    paper_bgcolor=brand_colors['White'],
-    plot_bgcolor=brand_colors['White'],
-    margin=dict(l=0, r=0, t=0, b=0)
-    )
-
-    # Update per-feature opacity and line width upon click to highlight 
-    fig.update_traces(
-        marker=dict(
-            opacity=MPI_display['opacity'],
-            line=dict(width=MPI_display['line_width'], color='black')
-        )
-    )
-
-    return fig
-
-# Update Piechart 1 UI on click while filtering table
-@app.callback(
-    Output('piechart', 'figure'),
-    Output('selected_slice', 'data'),
-    Input('pie-filter-dropdown', 'value'),
-    Input('piechart', 'clickData'),
-    State('selected_slice', 'data'),
-    prevent_initial_call=True
-)
-def update_pie(filter_by, clickData, current_selected):
-    if filter_by == 'Area':
-        df_count = df_sh['Area of Activity in the food system'].value_counts().reset_index()
-        df_count.columns = ['name', 'count']
-    else:
-        df_count = df_sh['Stakeholder catagorization '].value_counts().reset_index()
-        df_count.columns = ['name', 'count']
-
-    # Handle click to select/unselect slice
-    new_selected = current_selected
-    pull = [0]*len(df_count)
-    if clickData:
-        clicked = clickData['points'][0]['label']
-        new_selected = None if clicked == current_selected else clicked
-        pull = [0.2 if name==new_selected else 0 for name in df_count['name']]
-
-    slice_colors = plotting_palette_cat  # or greens_pie_palette
-    text_colors = []
-    for color in slice_colors:
-        # Simple luminance check for hex color
-        rgb = tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-        luminance = 0.299*rgb[0] + 0.587*rgb[1] + 0.114*rgb[2]
-        text_colors.append('white' if luminance < 180 else brand_colors['Brown'])
-
-
-    fig = px.pie(df_count, values='count', names='name', hole=0,
-                 color_discrete_sequence=slice_colors)
-    fig.update_traces(textfont_color=text_colors, pull=pull, hoverinfo='percent', textinfo='label', textposition='inside', insidetextorientation='radial')
-    fig.update_layout(margin=dict(t=0.1, l=0.1, r=0.1, b=0.1), showlegend=False)
-
-    return fig, new_selected
-
-
-# Table filtering based on both selections made in piecharts
-@app.callback(
-    Output('sh_table', 'data'),
-    Input('pie-filter-dropdown', 'value'),
-    Input('selected_slice', 'data')
-)
-def filter_table(filter_by, selected):
-    if selected:
-        if filter_by == 'Area':
-            df_filtered = df_sh[df_sh['Area of Activity in the food system'] == selected]
-        else:
-            df_filtered = df_sh[df_sh['Stakeholder catagorization '] == selected]
-        return df_filtered.to_dict('records')
-    else:
-        return df_sh.to_dict('records')
-    
-# Update Sankey based on timeslider
-
-@app.callback(
-    [Output("kpi-total-flow", "children"),
-    #Output("kpi-urban-share", "children"),
-     Output("urban-indicator", "figure"),
-     Output("sankey-graph", "figure")],
-    Input("slider", "value"),
-    prevent_initial_call=False)
-
-def update_sankey(value):
-    df_sankey_filt = df_sankey[df_sankey['Year']==int(value)]
-    flow1 = df_sankey_filt[['province', 'Target', 'Supply to Hanoi']].rename(
-        columns={'province':'source', 'Target':'target', 'Supply to Hanoi':'supply'})
-
-    flow2 = df_sankey_filt[['Target', 'Target_1', 'Rice supply']].rename(
-        columns={'Target':'source', 'Target_1':'target', 'Rice supply':'supply'})
-
-    df_sankey_final = pd.concat([flow1.drop_duplicates(), flow2.groupby(['source','target']).sum().reset_index()], ignore_index=True)
-    labels = list(pd.unique(df_sankey_final[['source','target']].values.ravel('K')))
-
-    # Map sources and targets to indices
-    source_indices = df_sankey_final['source'].apply(lambda x: labels.index(x))
-    target_indices = df_sankey_final['target'].apply(lambda x: labels.index(x))
-    weights = df_sankey_final['supply']
-
-    node_colors = [brand_colors['Red'] for l in labels]
-    link_colors = ["rgba(209, 231, 168, 0.5)" for link in df_sankey_final['source']]
-
-
-    # Calculating KPIs 
-    total_flow = flow1.drop_duplicates()["supply"].sum()
-    total_flow_text = f"{total_flow:,.0f}"
-
-    total = flow2.groupby(['source','target']).sum().reset_index()['supply'].sum()
-    urban_only = flow2.groupby(['source','target']).sum().reset_index().set_index('target').loc['Hanoi urban'].values[1]
-    urban_share = urban_only/total *100
-    urban_share_text = f"{urban_share:.1f}%"
-
-    fig = go.Figure(go.Sankey(
-        node=dict(label=labels, color=node_colors, pad=15, thickness=20),
-        link=dict(source=source_indices, target=target_indices, value=weights, color=link_colors, 
-                  hovertemplate='From %{source.label} → %{target.label}<br>Flow: %{value}<extra></extra>')
-    ))
-
-    fig.update_layout(
-        hovermode='x',
-        font=dict(size=12, color='black'),
-        paper_bgcolor=brand_colors['White'],
-        plot_bgcolor=brand_colors['White'],
-        margin=dict(l=10, r=10, t=20, b=20), 
-        width=None)
-
-    urban_fig = go.Figure(go.Pie(
-        values=[urban_share, 100-urban_share],
-        hole=0.6,
-        marker=dict(colors=[brand_colors['Red'], brand_colors['Light green']]),
-        textinfo="none",
-        labels=["Urban", "Rural"],  # Add labels for clarity
-        hoverinfo="label+percent",  # Show label, percent, and value on hover
-        hovertext=[f"Urban: {urban_share:.1f}%", f"Rural: {100-urban_share:.1f}%"]  # Custom hover text
-    ))
-    
-    urban_fig.update_layout(showlegend=False, margin=dict(l=0,r=0,t=0,b=0.1),
-                            paper_bgcolor="rgba(0,0,0,0)",  
-                            plot_bgcolor="rgba(0,0,0,0)")
-
-
-    return total_flow_text, urban_fig, fig
+# Tab layouts are built on first visit and cached in the dataset registry, so switching tabs
+# reuses the same component trees until the data embedded in them is re-loaded
+dashboard.add_tab("tab-1-stakeholders", stakeholders_tab_layout, depends=['stakeholder_column_widths', 'stakeholder_pies'])
+dashboard.add_tab("tab-2-supply", supply_tab_layout, depends=['initial_sankey'])
+dashboard.add_tab("tab-4-poverty", poverty_tab_layout, depends=['mpi_variables', 'mpi_map_figure'])
+dashboard.add_tab("tab-7-affordability", affordability_tab_layout)
+dashboard.add_tab("tab-10-nutrition", diet_nutrition_layout, depends=['diet_2'])
+dashboard.set_landing(landing_page_layout)
 
+# ------------------------- Callbacks ------------------------- #
 
 @app.callback(
     Output('affordability-trend','figure'),
     Input('affordability-filter-dropdown','value')
 )
-
 def update_affordability_trend(selected_variable):
-
-    titles = {
-        'foodExp_totalExp': 'Food Expenditure from Total Expenses (%)',
-        'foodExp_totalInc': 'Food Expenditure from Household Income (%)',
-        'riceExp_House': 'Rice Expenditure from Household Income (%)',
-        'riceAfford': 'Rice Affordability'
-    }
-
     y_labels = {
         'foodExp_totalExp': '%',
         'foodExp_totalInc': '%',
@@ -1433,216 +977,33 @@ def update_affordability_trend(selected_variable):
         'riceAfford': '%'
     }
 
-    df_filt = df_affordability[df_affordability['Cat']==selected_variable]
-
-    fig = px.line(df_filt, 
-                  x='Year', 
-                  y='value', 
-                  color='Reg', 
-                  markers=True,
-                  labels={selected_variable: selected_variable.replace('_',' ').title(), 'Year':'Year'},
-                  color_discrete_sequence=[brand_colors['Red'], brand_colors['Dark green']],
-                  #title=titles[selected_variable]
-                  )
-    
-    fig.update_traces(marker=dict(size=8))
-    fig.update_layout(
-        margin=dict(l=0.25, r=0, t=0, b=0.25),
-        hoverlabel=dict(bgcolor="white", font_color="black"),
-        legend=dict(
-            title=None,
-            x=1.1, y=1.1,
-            xanchor='right', yanchor='top',
-            bgcolor='rgba(255,255,255,0.7)',
-            bordercolor='rgba(0,0,0,0.1)',
-            borderwidth=1,
-            font=dict(size=12)
-        )
-    )
-    fig.update_xaxes(title_text=None)  
-    fig.update_yaxes(title_text=y_labels[selected_variable]) #titles[selected_variable])  
-    return fig
+    # None for a cleared dropdown or a value that is not in the table: keep the current chart
+    figure = datasets['affordability_trends'].figure(
+        selected_variable,
+        lambda series: trend_figure(series, y_labels.get(selected_variable, '%'), trend_colors))
+    return figure if figure is not None else no_update
 
 
 @app.callback(
     Output('health-trend','figure'),
     Input('health-filter-dropdown','value')
 )
-
 def update_health_trend(selected_variable):
-    df_filt = df_diet_2[df_diet_2['Cat']==selected_variable]
-
-    fig = px.line(df_filt, 
-                  x='Year', 
-                  y='value', 
-                  color='Reg', 
-                  markers=True,
-                  labels={selected_variable: selected_variable, 'Year':'Year'},
-                  color_discrete_sequence=[brand_colors['Red'], brand_colors['Dark green']],
-                  #title=titles[selected_variable]
-                  )
-    
-    fig.update_traces(marker=dict(size=8))
-    fig.update_layout(
-        margin=dict(l=0.25, r=0, t=0, b=0.25),
-        hoverlabel=dict(bgcolor="white", font_color="black"),
-        legend=dict(
-            title=None,
-            x=1.1, y=1.1,
-            xanchor='right', yanchor='top',
-            bgcolor='rgba(255,255,255,0.7)',
-            bordercolor='rgba(0,0,0,0.1)',
-            borderwidth=1,
-            font=dict(size=12)
-        )
-    )
-
-    fig.update_xaxes(title_text=None)  
-    fig.update_yaxes(title_text=selected_variable) #titles[selected_variable])  
-    return fig
+    figure = datasets['health_trends'].figure(
+        selected_variable,
+        lambda series: trend_figure(series, selected_variable, trend_colors))
+    return figure if figure is not None else no_update
 
 
 @app.callback(Output('diet-dumbell', 'figure'),
               Input('dumbell-slider', 'value'))
-
+@figure_cache.memoize(datasets, depends=['diet_matrix'])
 def update_diet_dumbell(year_start):
-    categories = df_diet['Cat'].unique()
-  
-    line_x, line_y, x_2013, x_2023, y_labels = [], [], [], [], []
-
-    for cat in categories:
-        val_2013 = df_diet.loc[(df_diet.Year == year_start) & (df_diet.Cat == cat), "value"].values[0]
-        val_2023 = df_diet.loc[(df_diet.Year == 2023) & (df_diet.Cat == cat), "value"].values[0]
-        line_x.extend([val_2013, val_2023, None])
-        line_y.extend([cat, cat, None])
-        x_2013.append(val_2013)
-        x_2023.append(val_2023)
-        y_labels.append(cat)
-
-    fig = go.Figure()
-
-    # Line connecting 2013 and 2023
-    fig.add_trace(go.Scatter(
-        x=line_x,
-        y=line_y,
-        mode="lines",
-        line=dict(color="grey"),
-        showlegend=False
-    ))
-
-    # 2013 markers
-    fig.add_trace(go.Scatter(
-        x=x_2013,
-        y=y_labels,
-        mode="markers",
-        name=str(year_start),
-        marker=dict(
-                    color=brand_colors['Red'],
-                    size=8,
-                    symbol="circle",
-                    line=dict(
-                        color=brand_colors['Brown'],  # outline color
-                        width=2                      # outline thickness
-                    )
-                )
-    ))
-
-    # 2023 markers
-    fig.add_trace(go.Scatter(
-        x=x_2023,
-        y=y_labels,
-        mode="markers",
-        name="2023",
-        marker=dict(
-                    color=brand_colors['Light green'],
-                    size=8,
-                    symbol="circle",
-                    line=dict(
-                        color=brand_colors['Brown'],  # outline color
-                        width=2                      # outline thickness
-                    )
-                )
-    ))
-
-    # Optional: Add arrows as annotations for direction
-    for x0, x1, y in zip(x_2013, x_2023, y_labels):
-        if pd.notnull(x0) and pd.notnull(x1):
-            fig.add_annotation(
-                x=x1, y=y,
-                ax=x0, ay=y,
-                xref="x", yref="y",
-                axref="x", ayref="y",
-                showarrow=True,
-                arrowhead=3,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor=brand_colors['Brown'],
-            )
-
-    fig.update_layout(
-    yaxis=dict(
-        tickfont=dict(size=12),
-        automargin=True,
-        ticklabelposition="outside right",
-        showgrid=True,                # Show horizontal grid lines
-        gridcolor='#949494',  
-        gridwidth=0.7                  
-    ),
-    xaxis=dict(
-        showgrid=True,               
-        gridcolor="#949494",
-        gridwidth=0.7
-    ),
-    margin=dict(l=120, r=20, t=40, b=20),
-    paper_bgcolor=brand_colors['White'],
-    plot_bgcolor=brand_colors['White'],
-    #title_text="Health and Nutrition trends from selected year to 2023", 
-    #title_x=0.5
-    )
-
-    return fig
-
-# Linking the tabs to page content loading 
-@app.callback(
-    Output("tab-content", "children"),
-    [
-        Input("tab-1-stakeholders", "n_clicks"),
-        Input("tab-2-supply", "n_clicks"),
-        Input("tab-3-sustainability", "n_clicks"),
-        Input("tab-4-poverty", "n_clicks"),
-        Input("tab-5-labour", "n_clicks"),
-        Input("tab-6-resilience", "n_clicks"),
-        Input("tab-7-affordability", "n_clicks"),
-        Input("tab-8-losses", "n_clicks"),
-        Input("tab-9-policies", "n_clicks"),
-        Input("tab-10-nutrition", "n_clicks"),
-        Input("tab-11-footprints", "n_clicks"),
-        Input("tab-12-behaviour", "n_clicks"),
-    ]
-)
-def render_tab_content(n1, n2, n3, n4, n5, n6, n7, n8, n9, n10, n11, n12):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return landing_page_layout()
-    tab_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    if tab_id == "tab-1-stakeholders":
-        return stakeholders_tab_layout()
-    
-    elif tab_id == "tab-2-supply":
-        return supply_tab_layout()
-    
-    elif tab_id == "tab-4-poverty":
-        return poverty_tab_layout()
-    
-    elif tab_id == "tab-7-affordability":
-        return affordability_tab_layout()
-
-    elif tab_id == "tab-10-nutrition":
-        return diet_nutrition_layout()
-
-    else:
-        return html.Div([html.H2("Coming soon...")])
+    return dumbbell_figure(datasets['diet_matrix'], year_start, 2023)
 
 
 if __name__ == '__main__':
-    app.run(debug=True, port=8051)
+    logging.basicConfig(level=logging.INFO)
+    # Build the supply figures (and MPI bar figures in warm-start mode) before serving
+    dashboard.warm()
+    app.run(debug=debug, port=8051)
@@ -0,0 +1,657 @@
+"""
+Multi-city dashboard engine.
+
+Every city dashboard is a Dash app mounted on the shared Flask `server` under /<slug>/ and
+described by a config dict (data files, column names, map zoom, tab labels). The parts the
+cities have in common -- sidebar, footer, tab router, MPI bar chart and map, stakeholder pie
+and table, supply Sankey -- are built here by CityDashboard, and all the cities served by one
+process share the dataset registry, the records cache and the figure caches.
+
+Usage (in a city module):
+    dashboard = CityDashboard(__name__, config)
+    app, datasets = dashboard.app, dashboard.datasets
+    ...  # city specific datasets, tab layouts and callbacks
+    dashboard.add_tab('tab-4-poverty', poverty_tab_layout, depends=['mpi_map_figure'])
+    dashboard.set_landing(landing_page_layout)
+
+`python dashboards.py` serves every city in CITY_MODULES from one process (development server);
+wsgi.py is the entry point for gunicorn/uwsgi.
+"""
+import gc
+import html as html_text
+import importlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import time
+from urllib.parse import quote
+
+import dash
+import dash_bootstrap_components as dbc
+import flask
+import numpy as np
+import plotly.express as px
+import plotly.io.json as pio_json
+from dash import ClientsideFunction, Dash, Input, Output, Patch, State, html
+
+from dashboard_cache import FigureCache, make_backend
+from dashboard_components import (brand_colors, sdg_filter_bar, sdg_icon_file, shared_styles, slice_colors,
+                                  tabs_style, text_colors)
+from dashboard_data import DatasetRegistry, FacetIndex, RecordsCache
+from dashboard_figures import (mpi_bar_figure, mpi_bar_figures, pull_slice, sankey_year_links,
+                               stakeholder_pie, supply_figures, warm_supply_figures)
+
+homepath = os.path.dirname(os.path.abspath(__file__))
+data_path = os.path.join(homepath, "assets", "data") + os.sep
+
+# City modules served by dashboards.py, in index page order
+CITY_MODULES = ['dash_app_testing_addis', 'dash_app_testing_hanoi']
+
+logger = logging.getLogger(__name__)
+
+
+def env_flag(name, default=False):
+    """Boolean environment setting: 1/true/yes turn it on, 0/false/no off."""
+    value = os.environ.get(name)
+    return default if value is None else value.strip().lower() in ('1', 'true', 'yes')
+
+# Dash debug mode (dev tools, hot reload, Flask reloader) of the development servers, off unless
+# DASHBOARD_DEBUG=1 is set
+debug = env_flag('DASHBOARD_DEBUG')
+
+# Warm-start mode (DASHBOARD_WARM_START=1): the MPI bar figure of every variable is built at
+# startup, so the variable dropdown only selects a precomputed figure
+warm_start = env_flag('DASHBOARD_WARM_START')
+
+# The Flask server every city app is mounted on
+server = flask.Flask(__name__)
+
+# Asset files left out of the pages and not served: the print versions of the logos (PDFs, CMYK
+# and black-and-white JPGs). Like Dash's assets_ignore, matched against the file name.
+ASSETS_IGNORE = r'(?i)(\.pdf|cmyk[^/]*\.jpg|_bw\d*\.jpg|\.ds_store)$'
+
+# Width (px) of the image variant used for full-width background images
+BACKGROUND_WIDTH = 1920
+
+# Datasets are registered here and loaded the first time a tab or callback needs them (then
+# kept in memory and re-loaded if the file changes). Each city registers its own datasets in a
+# scope of this registry (e.g. 'addis/mpi'), next to the shared ones below. Typed Parquet
+# copies built by build_data.py in data_build/ are used when present.
+datasets = DatasetRegistry(data_path, build_path=os.path.join(homepath, "data_build") + os.sep)
+
+# DataTable records per (dataset, filter), dropped whenever the registry re-loads the dataset
+records_cache = RecordsCache(datasets)
+
+# Figure JSON of the pure figure callbacks, per callback, inputs and data version (in memory,
+# on disk or in Redis depending on DASHBOARD_CACHE, see dashboard_cache.make_backend)
+figure_cache = FigureCache(make_backend(os.path.join(homepath, "figure_cache")))
+
+# Stakeholder tables up to this size are sent to the browser once, where pie clicks filter them
+# (assets/stakeholder_filters.js); larger tables are filtered by the server callbacks
+stakeholder_clientside_max_bytes = 2 * 1024 * 1024
+
+# City dashboards created in this process, by slug
+cities = {}
+
+# Sidebar tab ids, in order (the landing page buttons use the same ids)
+tab_ids = [
+    "tab-1-stakeholders", "tab-2-supply", "tab-3-sustainability", "tab-4-poverty",
+    "tab-5-labour", "tab-6-resilience", "tab-7-affordability", "tab-8-losses",
+    "tab-9-policies", "tab-10-nutrition", "tab-11-footprints", "tab-12-behaviour",
+]
+
+# Loading supply flow data for Sankey Diagram (Hanoi flows, shown by every city for now)
+@datasets.register('sankey', 'hanoi_supply.csv')
+def load_sankey():
+    return datasets.read_table('hanoi_supply.csv')
+
+# Sankey link arrays and KPIs of every year, precomputed so slider moves are lookups
+@datasets.register('sankey_links', depends=['sankey'])
+def load_sankey_links():
+    return sankey_year_links(datasets['sankey'])
+
+# Image variants written by build_assets.py into assets/build/, by asset path (empty until built)
+@datasets.register('asset_variants')
+def load_asset_variants():
+    try:
+        with open(os.path.join(homepath, 'assets', 'build', 'manifest.json')) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+@server.route('/')
+def index():
+    """Links to every city dashboard, or straight to it when only one is served."""
+    if len(cities) == 1:
+        return flask.redirect(next(iter(cities.values())).app.config.url_base_pathname)
+    links = "".join(
+        f'<li><a href="{city.app.config.url_base_pathname}">{html_text.escape(city.name)}</a></li>'
+        for city in cities.values()
+    )
+    return f"<h1>Food Systems Dashboards</h1><ul>{links}</ul>"
+
+
+@server.before_request
+def hide_ignored_assets():
+    """assets_ignore only keeps files out of the pages; Dash would still serve them."""
+    path = flask.request.path
+    if '/assets/' in path and re.search(ASSETS_IGNORE, path):
+        flask.abort(404)
+
+
+@server.route('/cache-stats')
+def cache_stats():
+    """Figure cache hits and misses per callback, in this worker."""
+    return flask.jsonify(figure_cache.stats())
+
+
+@server.route('/shared-styles.css')
+def shared_stylesheet():
+    """
+    The style classes the city modules registered in dashboard_components.shared_styles, built
+    from them on request so nothing is written to the source tree.
+    """
+    response = flask.Response(shared_styles.css(), mimetype='text/css')
+    response.add_etag()
+    return response.make_conditional(flask.request)
+
+
+def load_cities(modules=None):
+    """Import the city modules (each mounts its app on `server`) and return the server."""
+    for module in modules or CITY_MODULES:
+        importlib.import_module(module)
+    return server
+
+
+def payload_report():
+    """
+    Serialized JSON size (bytes) of the landing page, every tab layout and the callback outputs
+    added with CityDashboard.add_payload_output, for each city, as sent to the browser and as
+    it would be with the shared style classes inlined back as style dicts:
+    list of (city, tab, inline bytes, class bytes).
+    """
+    rows = []
+    for dashboard in cities.values():
+        payloads = [(tab, lambda name=name: dashboard.datasets[name])
+                    for tab, name in {'landing': 'layout_landing', **dashboard.tab_layouts}.items()]
+        payloads += list(dashboard.payload_outputs.items())
+        for tab, build in payloads:
+            output = build()
+            rows.append((dashboard.name, tab,
+                         len(pio_json.to_json_plotly(shared_styles.inline(output))),
+                         len(pio_json.to_json_plotly(output))))
+    return rows
+
+
+def preload():
+    """
+    Load every registered dataset (figures and tab layouts included) and every city's supply
+    figures, then exclude all of it from garbage collection (gc.freeze). Called before forking
+    workers (see wsgi.py), so they share the loaded data instead of each loading it, and their
+    garbage collector never writes to -- and so copies -- the shared pages.
+    """
+    start = time.perf_counter()
+    datasets.preload()
+    for dashboard in cities.values():
+        dashboard.warm()
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded datasets and figures in %.2fs", time.perf_counter() - start)
+
+
+class CityDashboard:
+    """
+    A city dashboard: a Dash app on the shared `server` under /<slug>/, with the datasets,
+    sidebar, footer and callbacks every city has in common.
+
+    Parameters:
+    - import_name: the city module's __name__ (Dash locates the assets folder from it)
+    - config: dict with
+        - name, slug: display name and URL prefix
+        - tab_labels: sidebar label of each tab in tab_ids
+        - sidebar_image: background photo of the sidebar (asset path), else a plain background
+        - footer_logos: list of (asset path, height) shown in the footer
+        - mpi_file, mpi_column, mpi_range: MPI choropleth data, value column and color range
+        - mpi_long_file: MPI indicators in long format for the bar chart
+        - map_zoom, district_zoom: MPI map zoom for the whole city and for a clicked district
+        - bar_label, bar_row_height: district axis label of the MPI bar chart and its height
+          per bar in px (None to fill the container)
+        - stakeholder_file, stakeholder_facets: stakeholder table and the column behind each
+          pie filter dropdown option
+        - coming_soon: show "Coming soon..." for tabs without a layout, else the landing page
+    """
+
+    def __init__(self, import_name, config):
+        self.config = config
+        self.name, self.slug = config['name'], config['slug']
+        self.app = Dash(import_name, server=server, url_base_pathname=f"/{self.slug}/",
+                        suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP, '/shared-styles.css'],
+                        assets_ignore=ASSETS_IGNORE)
+        self.datasets = datasets.scope(self.slug + "/")
+        self.tab_layouts = {}
+        self.payload_outputs = {}  # label -> function building a callback output (see payload_report)
+
+        stakeholder_file = self.datasets.file(config['stakeholder_file'])
+        self.stakeholder_clientside = os.path.getsize(stakeholder_file) <= stakeholder_clientside_max_bytes
+
+        self._register_datasets()
+        self.sidebar = self._sidebar()
+        self.footer = self._footer()
+        self._register_callbacks()
+        cities[self.slug] = self
+
+    def asset(self, path):
+        """URL of an asset file under this city's URL prefix"""
+        return self.app.get_asset_url(path)
+
+    def image(self, path, sizes=None, **props):
+        """
+        Image of the asset `path`: an html.Picture offering its AVIF/WebP variants (see
+        build_assets.py) by width, falling back to the original file, or a plain html.Img if it
+        has no variants. `props` go to the img element.
+
+        Parameters:
+        - sizes: displayed width for the browser to pick a variant by, by default the width the
+          image takes at its style height if that is in px, else the viewport width
+        """
+        img = html.Img(src=self.asset(path), **props)
+        entry = datasets['asset_variants'].get(path)
+        if not entry:
+            return img
+        if sizes is None:
+            height = str(props.get('style', {}).get('height', ''))
+            sizes = (f"{round(float(height[:-2]) * entry['width'] / entry['height'])}px"
+                     if height.endswith('px') else "100vw")
+        return html.Picture([
+            *[html.Source(type=f"image/{fmt}", sizes=sizes, srcSet=", ".join(
+                f"{self.asset('build/' + quote(output))} {width}w" for width, output in variants.items()))
+              for fmt, variants in entry['variants'].items()],
+            img,
+        ])
+
+    def background_image(self, path):
+        """
+        CSS background-image of the asset `path`: an image-set() of its AVIF/WebP variants of
+        BACKGROUND_WIDTH px (see build_assets.py) and the original file, or url() if it has none.
+        """
+        original = f"url('{self.asset(path)}')"
+        entry = datasets['asset_variants'].get(path)
+        if not entry:
+            return original
+        width = str(min(entry['width'], BACKGROUND_WIDTH))
+        sources = [f"url('{self.asset('build/' + quote(variants[width]))}') type('image/{fmt}')"
+                   for fmt, variants in entry['variants'].items()]
+        sources.append(f"{original} type('{mimetypes.guess_type(path)[0]}')")
+        return f"image-set({', '.join(sources)})"
+
+    def sdg_filter_bar(self, id_type='sdg-filter'):
+        """
+        SDG filter buttons (see dashboard_components.sdg_filter_bar), drawn from the SDG sprite
+        sheet once build_assets.py has built it, else from the individual icons.
+        """
+        if 'sprites/sdg_sprite' in datasets['asset_variants']:
+            return sdg_filter_bar(id_type)
+        return sdg_filter_bar(id_type, icon_url=lambda goal: self.asset(quote(sdg_icon_file.format(goal))))
+
+    def add_tab(self, tab_id, layout, depends=()):
+        """Serve `layout()` for the sidebar tab `tab_id`, cached until its `depends` re-load"""
+        name = 'layout_' + tab_id.split('-', 2)[2]
+        self.datasets.register(name, depends=depends)(layout)
+        self.tab_layouts[tab_id] = name
+
+    def add_payload_output(self, label, build):
+        """Include the callback output `build()` in payload_report, as `label`."""
+        self.payload_outputs[label] = build
+
+    def set_landing(self, layout):
+        """Use `layout()` as the landing page and build the app layout around it"""
+        self.datasets.register('layout_landing')(layout)
+        self.app.layout = html.Div([
+
+                    html.Div(id="tab-content", children=self.datasets['layout_landing'], style={"width": "100%",
+                                                                                                  "height": "100%"})
+
+                    # Parent container for full page
+                    ], style={
+                        "display": "flex",
+                        "flexDirection": "column",
+                        "height": "100vh",
+                        "width": "100vw"
+            })
+
+    def warm(self):
+        """
+        Serialize the supply tab figures of every slider year before serving, and in warm-start
+        mode the MPI bar figure of every variable, logging how long it took.
+        """
+        start = time.perf_counter()
+        warm_supply_figures(self.slug, self.datasets.version('sankey_links'), self.datasets['sankey_links'])
+        if warm_start:
+            self.datasets.preload('mpi_bar_figures')
+        logger.info("%s: figures warmed in %.2fs", self.name, time.perf_counter() - start)
+
+    def mpi_geojson_for_zoom(self, zoom):
+        """District boundaries pre-simplified for `zoom` by build_data.py, else full detail"""
+        return self.datasets.read_boundaries(self.config['mpi_file'], zoom) or self.datasets['mpi_geojson']
+
+    def stakeholder_records(self, filter_by=None, selected=None):
+        """Stakeholder table records, filtered to one pie slice if `selected` is given"""
+        df_sh = self.datasets['stakeholders']
+        name = self.datasets.name('stakeholders')
+        if selected:
+            return records_cache.records(name, (filter_by, selected),
+                                         lambda: df_sh.iloc[self.datasets['stakeholder_index'].select({filter_by: selected})])
+        return records_cache.records(name, None, lambda: df_sh)
+
+    def stakeholder_client_data(self):
+        """Payload of the 'stakeholder-client-data' store used by the clientside filtering"""
+        if not self.stakeholder_clientside:
+            return None
+        return {
+            'records': self.stakeholder_records(),
+            'columns': self.config['stakeholder_facets'],
+            'pies': self.datasets['stakeholder_pies'],
+        }
+
+    # ------------------------- Datasets ------------------------- #
+
+    def _register_datasets(self):
+        config, scope = self.config, self.datasets
+
+        # Loading and Formatting MPI Data
+        @scope.register('mpi', config['mpi_file'])
+        def load_mpi():
+            return scope.read_table(config['mpi_file'])
+
+        @scope.register('mpi_geojson', depends=['mpi'])
+        def load_mpi_geojson():
+            return json.loads(scope['mpi'].to_json())
+
+        # District centroids, computed once so bar clicks only look up the map center
+        @scope.register('mpi_centroids', depends=['mpi'])
+        def load_mpi_centroids():
+            MPI = scope['mpi']
+            centroids = MPI.geometry.centroid
+            return {
+                'names': MPI['Dist_Name'].to_numpy(),
+                'center': {"lat": centroids.y.mean(), "lon": centroids.x.mean()},
+                'by_name': {name: {"lat": lat, "lon": lon}
+                            for name, lat, lon in zip(MPI['Dist_Name'], centroids.y, centroids.x)},
+            }
+
+        # Base MPI choropleth: built once, then bar clicks only patch the highlight and map center
+        @scope.register('mpi_map_figure', depends=['mpi', 'mpi_centroids'])
+        def build_mpi_map_figure():
+            MPI = scope['mpi']
+            n_districts = len(MPI)
+            fig = px.choropleth_mapbox(
+                MPI,
+                geojson=self.mpi_geojson_for_zoom(config['map_zoom']),
+                locations="Dist_Name",
+                featureidkey="properties.Dist_Name",
+                color=config['mpi_column'],
+                color_continuous_scale="Reds",
+                opacity=0.7,
+                range_color=config['mpi_range'],
+                labels={config['mpi_column']: 'MPI', 'Dist_Name': 'District Name'},
+                mapbox_style="carto-positron",
+                zoom=config['map_zoom'],
+                center=scope['mpi_centroids']['center']
+            )
+
+            fig.update_layout(coloraxis_colorbar=None)
+            fig.update_coloraxes(showscale=False)
+
+            fig.update_layout(
+                paper_bgcolor=brand_colors['White'],
+                plot_bgcolor=brand_colors['White'],
+                margin=dict(l=0, r=0, t=0, b=0)
+            )
+
+            # Per-feature opacity and line width, patched by update_map_on_bar_click to highlight
+            fig.update_traces(
+                marker=dict(
+                    opacity=[0.7] * n_districts,
+                    line=dict(width=[0.8] * n_districts, color='black')
+                )
+            )
+            return fig
+
+        # Loading and Formatting MPI CSV Data
+        @scope.register('mpi_long', config['mpi_long_file'])
+        def load_mpi_long():
+            return scope.read_table(config['mpi_long_file'])
+
+        @scope.register('mpi_variables', depends=['mpi_long'])
+        def load_mpi_variables():
+            return scope['mpi_long']['Variable'].unique()
+
+        # Bar figure of every MPI variable, used by update_bar in warm-start mode
+        @scope.register('mpi_bar_figures', depends=['mpi_long'])
+        def build_mpi_bar_figures():
+            return mpi_bar_figures(scope['mpi_long'], config['bar_label'], config.get('bar_row_height'))
+
+        # Loading and Formatting Food Systems Stakeholders Data
+        @scope.register('stakeholders', config['stakeholder_file'])
+        def load_stakeholders():
+            df_sh = scope.read_table(config['stakeholder_file']).dropna(how='any')
+
+            # Format Website column as clickable markdown links
+            if 'Website' in df_sh.columns:
+                df_sh['Website'] = df_sh['Website'].apply(
+                    lambda x: f'[🔗]({x})' if x and x.startswith('http') else '--'
+                )
+            return df_sh
+
+        # Category counts and row positions of each filter option, so filtering never scans the table
+        @scope.register('stakeholder_index', depends=['stakeholders'])
+        def load_stakeholder_index():
+            return FacetIndex(scope['stakeholders'], config['stakeholder_facets'])
+
+        # Serialized pie of each filter option, only the pulled slice changes on click
+        @scope.register('stakeholder_pies', depends=['stakeholder_index'])
+        def load_stakeholder_pies():
+            index = scope['stakeholder_index']
+            return {facet: stakeholder_pie(index.counts(facet), slice_colors, text_colors)
+                    for facet in config['stakeholder_facets']}
+
+    # ------------------------- Layout Components ------------------------- #
+
+    def _sidebar(self):
+        style = {
+            "boxShadow": "0 2px 8px rgba(0,0,0,0.08)",
+            "borderRadius": "12px",
+            "padding": "10px",
+            "height": "100%",
+            "width": "100%",
+            "display": "flex",
+            "flexDirection": "column",
+            "justifyContent": "flex-start",
+            "overflowY": "auto",
+        }
+        if self.config.get('sidebar_image'):
+            style.update({
+                "backgroundImage": self.background_image(self.config['sidebar_image']),
+                "backgroundSize": "cover",
+                "backgroundPosition": "center",
+                "backgroundRepeat": "no-repeat",
+            })
+        else:
+            style["backgroundColor"] = brand_colors['Light green']
+
+        return dbc.Card([
+            dbc.Nav([
+                dbc.NavItem(dbc.NavLink(label, id=tab_id, href="#", active="exact"), style=tabs_style)
+                for tab_id, label in zip(tab_ids, self.config['tab_labels'])
+            ],
+            vertical="md",
+            pills=True,
+            fill=True,
+            style={"marginTop": "20px",
+                   "alignItems": "center",
+                   "textAlign": "center",
+                   "zIndex": 1000})
+        ], style=style)
+
+    def _footer(self):
+        return html.Footer([
+            html.Div([
+                self.image(logo, style={'height': height, 'margin': '0 30px'})
+                for logo, height in self.config.get('footer_logos', [])
+            ], style={
+                "display": "flex",
+                "justifyContent": "center",
+                "alignItems": "baseline",
+                "margin": "20px 0px",
+            })
+        ])
+
+    # ------------------------- Callbacks ------------------------- #
+
+    def _register_callbacks(self):
+        app, config, scope = self.app, self.config, self.datasets
+
+        # Linking the dropdown to the bar chart for the MPI page
+        @app.callback(
+            Output('bar-plot', 'figure'),
+            Input('variable-dropdown', 'value')
+        )
+        def update_bar(selected_variable):
+            # A cleared dropdown (None) or a value that is not an MPI variable keeps the current chart
+            if not isinstance(selected_variable, str) or selected_variable not in scope['mpi_variables']:
+                return dash.no_update
+            if warm_start:
+                return scope['mpi_bar_figures'][selected_variable]
+            return build_bar(selected_variable)
+
+        @figure_cache.memoize(scope, depends=['mpi_long'])
+        def build_bar(selected_variable):
+            df_mpi = scope['mpi_long']
+            # Sort by selected variable, descending
+            filtered_df = df_mpi[df_mpi["Variable"]==selected_variable]
+            sorted_df = filtered_df.sort_values('Value', ascending=False, kind='stable')
+            return mpi_bar_figure(sorted_df, config['bar_label'], config.get('bar_row_height'))
+
+        # Linking the MPI map to the bar chart via click: only the per-feature highlight arrays,
+        # the map center and, when the new zoom has another simplification level, the boundaries
+        # are sent (as a Patch); the base choropleth is served once with the tab layout. Picking
+        # another variable resets the map to the whole city.
+        @app.callback(
+            Output('map', 'figure'),
+            Output('map-boundary-zoom', 'data'),
+            Input('bar-plot', 'clickData'),
+            Input('variable-dropdown', 'value'),
+            State('map-boundary-zoom', 'data'),
+            prevent_initial_call=True
+        )
+        def update_map_on_bar_click(clickData, selected_variable, drawn_zoom):
+            selected_dist = None
+            if dash.ctx.triggered_id == 'bar-plot' and clickData and 'points' in clickData:
+                selected_dist = clickData['points'][0]['y']  # y is Dist_Name for horizontal bar
+            return district_map_patch(selected_dist, drawn_zoom or config['map_zoom'])
+
+        # Cached per district and drawn boundaries: clickData itself also holds the click
+        # position and bounding box
+        @figure_cache.memoize(scope, depends=['mpi', 'mpi_centroids'])
+        def district_map_patch(selected_dist, drawn_zoom):
+            centroids = scope['mpi_centroids']
+            names = centroids['names']
+            center = centroids['center']
+            zoom = config['map_zoom']
+
+            opacity = np.full(len(names), 0.7)
+            line_width = np.full(len(names), 0.8)
+
+            # If a bar is clicked, zoom to that district and highlight it
+            if selected_dist in centroids['by_name']:
+                center = centroids['by_name'][selected_dist]
+                zoom = config['district_zoom']
+                opacity[names == selected_dist] = 1
+                line_width[names == selected_dist] = 2
+
+            patched_fig = Patch()
+            patched_fig['data'][0]['marker']['opacity'] = opacity.tolist()
+            patched_fig['data'][0]['marker']['line']['width'] = line_width.tolist()
+            patched_fig['layout']['mapbox']['center'] = center
+            patched_fig['layout']['mapbox']['zoom'] = zoom
+            geojson = self.mpi_geojson_for_zoom(zoom)
+            if geojson is not self.mpi_geojson_for_zoom(drawn_zoom):
+                patched_fig['data'][0]['geojson'] = geojson
+            return patched_fig, zoom
+
+        # Update Piechart UI on click while filtering table: in the browser for small stakeholder
+        # tables (see stakeholder_clientside), else on the server
+        if self.stakeholder_clientside:
+            app.clientside_callback(
+                ClientsideFunction(namespace='stakeholders', function_name='updatePie'),
+                Output('piechart', 'figure'),
+                Output('selected_slice', 'data'),
+                Input('pie-filter-dropdown', 'value'),
+                Input('piechart', 'clickData'),
+                State('selected_slice', 'data'),
+                State('stakeholder-client-data', 'data')
+            )
+            app.clientside_callback(
+                ClientsideFunction(namespace='stakeholders', function_name='filterTable'),
+                Output('sh_table', 'data'),
+                Input('pie-filter-dropdown', 'value'),
+                Input('selected_slice', 'data'),
+                State('stakeholder-client-data', 'data')
+            )
+        else:
+            @app.callback(
+                Output('piechart', 'figure'),
+                Output('selected_slice', 'data'),
+                Input('pie-filter-dropdown', 'value'),
+                Input('piechart', 'clickData'),
+                State('selected_slice', 'data')
+            )
+            def update_pie(filter_by, clickData, current_selected):
+                ctx = dash.callback_context
+                triggered = [t['prop_id'] for t in ctx.triggered]
+
+                # Toggle the clicked slice; switching the dropdown clears the selection
+                new_selected = None
+                if clickData and 'piechart.clickData' in triggered:
+                    clicked = clickData['points'][0]['label']
+                    new_selected = None if clicked == current_selected else clicked
+
+                return pull_slice(scope['stakeholder_pies'][filter_by], new_selected), new_selected
+
+            # Table filtering based on both selections made in piecharts
+            @app.callback(
+                Output('sh_table', 'data'),
+                Input('pie-filter-dropdown', 'value'),
+                Input('selected_slice', 'data')
+            )
+            def filter_table(filter_by, selected):
+                return self.stakeholder_records(filter_by, selected)
+
+        # Update Sankey based on timeslider
+        @app.callback(
+            [Output("kpi-total-flow", "children"),
+             Output("urban-indicator", "figure"),
+             Output("sankey-graph", "figure")],
+            Input("slider", "value"))
+        def update_sankey(value):
+            year = int(value) if isinstance(value, (int, float)) else None
+            return supply_figures(self.slug, scope.version('sankey_links'), year, scope['sankey_links'])
+
+        # Linking the tabs to page content loading
+        @app.callback(
+            Output("tab-content", "children"),
+            [Input(tab_id, "n_clicks") for tab_id in tab_ids]
+        )
+        def render_tab_content(*n_clicks):
+            ctx = dash.callback_context
+            if not ctx.triggered:
+                return scope['layout_landing']
+            tab_id = ctx.triggered[0]['prop_id'].split('.')[0]
+            if tab_id in self.tab_layouts:
+                return scope[self.tab_layouts[tab_id]]
+            if config.get('coming_soon'):
+                return html.Div([html.H2("Coming soon...")])
+            return scope['layout_landing']
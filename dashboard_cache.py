@@ -0,0 +1,238 @@
+"""
+Memoization of figure-producing callbacks.
+
+Callbacks that are pure functions of their inputs and of some datasets are wrapped with
+FigureCache.memoize, which stores their output as serialized figure JSON keyed by the callback
+name, its arguments and the data version (file modification times) of the datasets it reads.
+The store is pluggable:
+
+- MemoryBackend: in-process LRU, one per worker
+- DiskBackend: one file per entry, shared by the workers of a host and kept across restarts,
+  least recently used entries removed beyond a total size
+- RedisBackend: any Redis-compatible client, shared by every host (e.g. redis.Redis, or
+  fakeredis.FakeRedis as a local stand-in), entries expiring after a day by default
+
+make_backend() picks one from the DASHBOARD_CACHE environment variable. Entries are only keyed
+by the data, not by the callback code, so clear persistent caches after changing a callback.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+
+import plotly.io.json as pio_json
+
+from dashboard_data import LRUCache
+
+
+class MemoryBackend:
+    """In-process LRU of serialized entries, bounded by entry count and total size (bytes)."""
+
+    def __init__(self, maxsize=256, max_bytes=64 * 1024 * 1024):
+        self._cache = LRUCache(maxsize, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache.set(key, value, size=len(value))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class DiskBackend:
+    """
+    One JSON file per entry in `folder`, written atomically so other workers never read a partial
+    file. Once the files add up to more than `max_bytes`, the least recently used ones (by file
+    modification time, refreshed on every hit) are removed down to 80% of it.
+    """
+
+    def __init__(self, folder, max_bytes=512 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        # Size of the folder as seen by this process: exact after a scan, then grown by our writes
+        self._bytes = sum(size for _, size, _ in self._entries())
+
+    def _file(self, key):
+        return os.path.join(self.folder, key + '.json')
+
+    def _entries(self):
+        """(path, size, mtime) of every entry file"""
+        entries = []
+        for filename in os.listdir(self.folder):
+            if filename.endswith('.json'):
+                path = os.path.join(self.folder, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # Removed by another worker
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key):
+        path = self._file(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = f.read()
+            os.utime(path)  # Most recently used
+        except FileNotFoundError:
+            return None
+        return value
+
+    def set(self, key, value):
+        target = self._file(key)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(value)
+        os.replace(tmp, target)
+        with self._lock:
+            self._bytes += len(value)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._bytes <= 0.8 * self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._bytes -= size
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._bytes = 0
+
+
+class RedisBackend:
+    """
+    Entries stored through a Redis-compatible `client` (anything with get, set, scan_iter and
+    delete, such as redis.Redis or fakeredis.FakeRedis) under `prefix`.
+
+    Parameters:
+    - client: connected client
+    - prefix: key prefix of the entries, so clear() leaves other keys alone
+    - ttl: seconds before an entry expires (None to keep entries until evicted by Redis)
+    """
+
+    def __init__(self, client, prefix='dashboard:figures:', ttl=24 * 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+def make_backend(default_folder):
+    """
+    Backend chosen by DASHBOARD_CACHE:
+    - 'memory' (default): MemoryBackend
+    - 'disk': DiskBackend in DASHBOARD_CACHE_DIR, else `default_folder`, of at most
+      DASHBOARD_CACHE_MAX_MB megabytes (512 by default)
+    - 'redis': RedisBackend at DASHBOARD_REDIS_URL (needs the redis package), entries expiring
+      after DASHBOARD_CACHE_TTL seconds (a day by default)
+    """
+    kind = os.environ.get('DASHBOARD_CACHE', 'memory')
+    if kind == 'memory':
+        return MemoryBackend()
+    if kind == 'disk':
+        return DiskBackend(os.environ.get('DASHBOARD_CACHE_DIR', default_folder),
+                           max_bytes=int(os.environ.get('DASHBOARD_CACHE_MAX_MB', 512)) * 1024 * 1024)
+    if kind == 'redis':
+        import redis
+        url = os.environ.get('DASHBOARD_REDIS_URL', 'redis://localhost:6379/0')
+        return RedisBackend(redis.Redis.from_url(url), ttl=int(os.environ.get('DASHBOARD_CACHE_TTL', 24 * 3600)))
+    raise ValueError(f"Unknown DASHBOARD_CACHE backend: {kind!r}")
+
+
+class FigureCache:
+    """
+    Memoizes callback outputs as serialized figure JSON in `backend`, counting hits and misses
+    per callback.
+
+    Usage:
+        @app.callback(Output('bar-plot', 'figure'), Input('variable-dropdown', 'value'))
+        @figure_cache.memoize(datasets, depends=['mpi_long'])
+        def update_bar(selected_variable):
+            ...
+
+    Hits return the stored JSON (as a dict), which Dash sends to the browser as is.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name, args, data_version):
+        payload = json.dumps([name, args, data_version], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def memoize(self, datasets, depends=(), name=None):
+        """
+        Decorator caching a callback's output until its arguments or the files behind the
+        datasets in `depends` change.
+
+        Parameters:
+        - datasets: DatasetRegistry (or city scope of one) the callback reads `depends` from
+        - depends: names of the datasets the output is computed from
+        - name: cache name of the callback, by default its module, dataset scope and name
+        """
+        def decorator(func):
+            callback_name = name or ':'.join([func.__module__, getattr(datasets, 'prefix', ''), func.__qualname__])
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = self.key(callback_name, args, datasets.fingerprint(*depends))
+                value = self.backend.get(key)
+                self._count(self._hits if value is not None else self._misses, callback_name)
+                if value is None:
+                    value = pio_json.to_json_plotly(func(*args))
+                    self.backend.set(key, value)
+                return json.loads(value)
+            return wrapper
+        return decorator
+
+    def _count(self, counter, name):
+        with self._lock:
+            counter[name] = counter.get(name, 0) + 1
+
+    def stats(self):
+        """Hit and miss counts of this process per callback: {name: {'hits': n, 'misses': n}}"""
+        with self._lock:
+            return {name: {'hits': self._hits.get(name, 0), 'misses': self._misses.get(name, 0)}
+                    for name in sorted(set(self._hits) | set(self._misses))}
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self.backend.clear()
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
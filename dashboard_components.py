@@ -1,7 +1,12 @@
+import copy
+import re
+
 import dash_bootstrap_components as dbc
+import numpy as np
 from dash import html
+from dash.development.base_component import Component
 
-# Your brand colors (import or redefine)
+# Brand colors, palettes and styles shared by every city dashboard
 brand_colors = {
     'Black': '#333333',
     "Brown": "#313715",
@@ -11,6 +16,111 @@ brand_colors = {
     "Light green": "#E8F0DA",
     "White": "#ffffff"  
 }
+
+green_gradient = [
+    "#095d40",
+    "#206044",
+    "#3a6649",
+    "#547d5b",
+    "#6f946d",
+    "#8aa97f",
+    "#a5be91",
+    "#b8d099",
+    "#c1d88e",
+    "#d1e7a8"
+]
+
+greens_pie_palette = [
+    brand_colors['Light green'],   # "#E8F0DA"
+    brand_colors['Mid green'],     # "#bbce8a"
+    brand_colors['Dark green'],    # "#939f5c"
+    "#b7c49a",                     # lighter tint of Dark green
+    "#d6e5b8",                     # lighter tint of Mid green
+    "#e3f6d5",                     # very light green
+    "#c1d88e",                     # soft khaki-green
+    "#d1e7a8",                     # pastel green
+    "#aabf7e",                     # olive green
+    "#8aa97f",                     # muted green
+]
+
+reds_pie_palette = [
+    "#a80050",   # main brand red
+    "#84003d",   # deep accent red
+    "#C97A9A",   # soft pink
+    "#E07A5F",   # warm accent
+    "#F2D16B",   # harvest yellow (for contrast)
+    "#F5F5F5",   # neutral light
+    "#7B5E34",   # earth brown
+    "#C97A9A",   # repeat pink
+    "#E07A5F",   # repeat accent
+    "#F2D16B"    # repeat yellow
+]
+
+plotting_palette_cat = [
+    "#a80050",  
+    "#84003d",   
+    "#F5F5F5",   
+    '#E8F0DA',
+    "#bbce8a",
+    "#939f5c",
+    "#E07A5F",   
+    "#d33030",
+]
+
+# Pie slice label colors: white on dark slices, brown on light ones (simple luminance check)
+slice_colors = plotting_palette_cat  # or greens_pie_palette
+text_colors = []
+for color in slice_colors:
+    rgb = tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+    luminance = 0.299*rgb[0] + 0.587*rgb[1] + 0.114*rgb[2]
+    text_colors.append('white' if luminance < 180 else brand_colors['Brown'])
+
+tabs_style = {
+                "backgroundColor": brand_colors['Mid green'],
+                "color": brand_colors['Brown'],
+                "width":"100%",
+                "margin-bottom": "4px",
+                "borderRadius": "8px",
+                "padding": "6px 4px",
+                "fontWeight": "bold",
+                "textAlign": "left",
+                "fontSize": "clamp(0.6em, 1vw, 1.1em)",
+                "boxShadow": "0 2px 6px rgba(0,0,0,0.08)",
+                "border": "none",
+                "textDecoration": "none",
+                "whiteSpace": "normal",
+                "box-sizing": "border-box",
+                "maxWidth": "90%",
+                "wordBreak": "normal"
+            }
+
+kpi_card_style ={"textAlign": "center", 
+                "backgroundColor": brand_colors['White'], 
+                "color":brand_colors['Brown'],
+                "font-weight":"bold",
+                "border-radius": "8px",
+                "padding":"10px",
+                "margin-bottom":"10px",
+                "flexDirection": "column",
+                "border": "2px solid " + brand_colors['White'],
+                }
+
+header_style = {"color": brand_colors['Brown'], 
+                'fontWeight': 'bold',
+                "margin": "0", 
+                'textAlign': 'center',
+                "fontSize": "clamp(0.8em, 3vw, 1.25em)",
+                'whiteSpace': 'normal',
+                }
+
+card_style = {
+    "backgroundColor": brand_colors['White'],
+    "border-radius": "10px",
+    "box-shadow": "0 2px 6px rgba(0,0,0,0.1)",
+    "padding": "20px",  # Increase padding for consistency
+    "margin-bottom": "15px"
+}
+
 kpi_card_style_2 = {
                 "textAlign": "center",
                 "backgroundColor": brand_colors['White'],
@@ -23,6 +133,104 @@ kpi_card_style_2 = {
                 "height": "auto",
             }
 
+# ------------------------- Shared styles ------------------------- #
+
+class StyleSheet:
+    """
+    Style dicts shared by many components, emitted once as CSS classes rather than repeated
+    inline in every component of the layout JSON.
+
+    Usage:
+        kpi_label = shared_styles.add('kpi-label', {"fontSize": "0.9em", "color": "#666"})
+        html.Span("National: ", className=kpi_label)
+
+    The rules are served as CSS by the dashboard server (/shared-styles.css, see dashboard_app),
+    which every city page loads after the Bootstrap stylesheet.
+    """
+
+    # Properties whose numeric values have no unit (everything else numeric is in px)
+    unitless = {'flex', 'flexGrow', 'flexShrink', 'fontWeight', 'lineHeight', 'opacity', 'order', 'zIndex'}
+
+    def __init__(self):
+        self.rules = {}  # class name -> style dict
+
+    def add(self, name, style):
+        """Register `style` under the class `name` and return the class name."""
+        if self.rules.get(name, style) != style:
+            raise ValueError(f"Style class {name!r} is already defined with other rules")
+        self.rules[name] = dict(style)
+        return name
+
+    def css(self):
+        blocks = []
+        for name, style in self.rules.items():
+            declarations = "".join(
+                f"    {re.sub(r'(?<!^)(?=[A-Z])', '-', prop).lower()}: "
+                f"{value}{'px' if isinstance(value, (int, float)) and prop not in self.unitless else ''};\n"
+                for prop, value in style.items()
+            )
+            blocks.append(f".{name} {{\n{declarations}}}\n")
+        return "/* Generated from dashboard_components.shared_styles, do not edit */\n\n" + "\n".join(blocks)
+
+    def inline(self, layout):
+        """
+        Copy of `layout` (a component or list of components) with the classes of this sheet
+        expanded back into inline styles, i.e. the layout as it was before using them. Only the
+        components are copied; other props (figures, data) are shared with `layout`.
+        """
+        if isinstance(layout, (list, tuple)):
+            return [self.inline(item) for item in layout]
+        if not isinstance(layout, Component):
+            return layout
+        component = copy.copy(layout)
+        if getattr(component, 'children', None) is not None:
+            component.children = self.inline(component.children)
+
+        classes = (getattr(component, 'className', None) or '').split()
+        shared = [c for c in classes if c in self.rules]
+        if shared:
+            style = {}
+            for name in shared:
+                style.update(self.rules[name])
+            component.style = {**style, **(getattr(component, 'style', None) or {})}
+            rest = " ".join(c for c in classes if c not in self.rules)
+            if rest:
+                component.className = rest
+            else:
+                del component.className
+        return component
+
+
+shared_styles = StyleSheet()
+
+# Nutrition KPI cards
+nutrition_card_class = shared_styles.add('nutrition-card', kpi_card_style_2)
+nutrition_title_class = shared_styles.add('nutrition-title', {
+    "fontWeight": "bold",
+    "fontSize": "1em",
+    "color": brand_colors['Brown'],
+    "marginBottom": "10px"
+})
+nutrition_label_class = shared_styles.add('nutrition-label', {"fontSize": "0.9em", "color": "#666"})
+nutrition_value_class = shared_styles.add('nutrition-value', {"fontSize": "1.5em", "fontWeight": "bold"})
+nutrition_region_class = shared_styles.add('nutrition-region', {"marginBottom": "5px"})
+nutrition_reference_class = shared_styles.add('nutrition-reference', {"marginBottom": "10px"})
+nutrition_arrow_class = shared_styles.add('nutrition-arrow', {"fontSize": "1.5em"})
+nutrition_difference_class = shared_styles.add('nutrition-difference', {"fontSize": "1.2em", "fontWeight": "bold"})
+nutrition_status_class = shared_styles.add('nutrition-status', {"fontSize": "0.8em", "color": "#666", "marginLeft": "5px"})
+nutrition_better_class = shared_styles.add('nutrition-better', {"color": brand_colors['Dark green']})
+nutrition_worse_class = shared_styles.add('nutrition-worse', {"color": brand_colors['Red']})
+nutrition_muted_class = shared_styles.add('nutrition-muted', {"color": "#999"})
+nutrition_section_class = shared_styles.add('nutrition-section', {
+    "color": brand_colors['Brown'],
+    "fontWeight": "bold",
+    "marginTop": "30px",
+    "marginBottom": "15px",
+    "borderBottom": f"3px solid {brand_colors['Mid green']}",
+    "paddingBottom": "10px"
+})
+nutrition_first_section_class = shared_styles.add('nutrition-first-section', {"marginTop": "20px"})
+
 def create_nutrition_kpi_card(outcome_name, addis_value, national_value, lower_is_better=True):
     """
     Create a KPI card comparing Addis Ababa vs National nutrition outcomes.
@@ -40,60 +248,168 @@ def create_nutrition_kpi_card(outcome_name, addis_value, national_value, lower_i
         is_better = difference < 0
     else:
         is_better = difference > 0
-    
+
+    return nutrition_kpi_card(outcome_name, "Addis Ababa", addis_value, "National", national_value,
+                              difference, is_better, lower_is_better)
+
+
+def nutrition_kpi_card(outcome_name, region, value, reference, reference_value, difference, is_better,
+                       lower_is_better=True):
+    """
+    KPI card of one nutrition outcome in `region` against `reference` (e.g. National), with
+    the difference and better/worse flag already computed (see create_nutrition_kpi_card and
+    nutrition_kpi_sections).
+    """
     # Set colors and symbols based on performance
     if is_better:
-        color = brand_colors['Dark green']
+        color = nutrition_better_class
         arrow = "↓" if lower_is_better else "↑"
         status_text = "better"
     else:
-        color = brand_colors['Red']
+        color = nutrition_worse_class
         arrow = "↑" if lower_is_better else "↓"
         status_text = "worse"
     
     return dbc.Card([
         dbc.CardBody([
-            html.H5(outcome_name, style={
-                "fontWeight": "bold",
-                "fontSize": "1em",
-                "color": brand_colors['Brown'],
-                "marginBottom": "10px"
-            }),
+            html.H5(outcome_name, className=nutrition_title_class),
             
-            # Addis Value
+            # Region Value
             html.Div([
-                html.Span("Addis Ababa: ", style={"fontSize": "0.9em", "color": "#666"}),
-                html.Span(f"{addis_value}%", style={
-                    "fontSize": "1.5em",
-                    "fontWeight": "bold",
-                    "color": color
-                })
-            ], style={"marginBottom": "5px"}),
+                html.Span(f"{region}: ", className=nutrition_label_class),
+                html.Span(f"{value:g}%", className=f"{nutrition_value_class} {color}")
+            ], className=nutrition_region_class),
             
-            # National Value
+            # Reference Value
             html.Div([
-                html.Span("National: ", style={"fontSize": "0.9em", "color": "#666"}),
-                html.Span(f"{national_value}%", style={
-                    "fontSize": "1.5em",
-                    "fontWeight": "bold",
-                    "color": "#999"
-                })
-            ], style={"marginBottom": "10px"}),
+                html.Span(f"{reference}: ", className=nutrition_label_class),
+                html.Span(f"{reference_value:g}%", className=f"{nutrition_value_class} {nutrition_muted_class}")
+            ], className=nutrition_reference_class),
             
             # Difference indicator
             html.Div([
-                html.Span(f"{arrow} ", style={"fontSize": "1.5em", "color": color}),
-                html.Span(f"{abs(difference):.1f}%", style={
-                    "fontSize": "1.2em",
-                    "fontWeight": "bold",
-                    "color": color
-                }),
-                html.Span(f" {status_text}", style={
-                    "fontSize": "0.8em", 
-                    "color": "#666", 
-                    "marginLeft": "5px"
-                })
+                html.Span(f"{arrow} ", className=f"{nutrition_arrow_class} {color}"),
+                html.Span(f"{abs(difference):.1f}%", className=f"{nutrition_difference_class} {color}"),
+                html.Span(f" {status_text}", className=nutrition_status_class)
             ])
         ])
-    ], style=kpi_card_style_2)
+    ], className=nutrition_card_class)
+
+
+def nutrition_kpi_sections(df, region, reference="National", segment_titles=None, labels=None,
+                           hidden=(), higher_is_better=(), tile_width=12, lg=4):
+    """
+    Section header and row of KPI cards for every population segment of a nutrition outcomes
+    table, comparing `region` against `reference`. Differences and better/worse flags are
+    computed for all outcomes at once; new outcomes, segments or regions in the table need
+    no code changes.
+
+    Parameters:
+    - df: long table with 'Age groups' (segment), 'Outcomes', 'Reg' and 'Value' columns
+    - region, reference: 'Reg' values compared on each card
+    - segment_titles: header of each segment (listed segments first, in that order; others
+      follow in table order under their own name)
+    - labels: card title of each outcome (listed outcomes first, in that order); by default the
+      outcome name without its "(%)" suffix. Outcome names are matched with their whitespace
+      normalized
+    - hidden: outcomes not shown
+    - higher_is_better: outcomes where a higher value is better (lower is better for the rest)
+    - tile_width, lg: card column width on small and large screens
+    """
+    segment_titles, labels = segment_titles or {}, labels or {}
+    df = df.assign(Outcomes=df['Outcomes'].str.split().str.join(' '))
+    table = df.pivot_table(index=['Age groups', 'Outcomes'], columns='Reg', values='Value',
+                           aggfunc='first', sort=False)
+    table = table[~table.index.get_level_values('Outcomes').isin(list(hidden))]
+    table = table.dropna(subset=[region, reference])
+
+    # Listed segments and outcomes first (in listed order), then the others in table order
+    segments = table.index.get_level_values('Age groups')
+    outcomes = table.index.get_level_values('Outcomes')
+    segment_rank = {s: i for i, s in enumerate(dict.fromkeys([*segment_titles, *segments]))}
+    label_rank = {o: i for i, o in enumerate(dict.fromkeys([*labels, *outcomes]))}
+    order = np.lexsort((outcomes.map(label_rank).to_numpy(), segments.map(segment_rank).to_numpy()))
+    table = table.iloc[order]
+    segments, outcomes = segments[order], outcomes[order]
+
+    values = table[region].to_numpy(dtype=float)
+    reference_values = table[reference].to_numpy(dtype=float)
+    difference = values - reference_values
+    lower_is_better = ~outcomes.isin(list(higher_is_better))
+    is_better = np.where(lower_is_better, difference < 0, difference > 0)
+    titles = [labels.get(o, o.removesuffix('(%)').strip()) for o in outcomes]
+
+    cards = {}
+    for segment, title, value, reference_value, diff, better, lower in zip(
+            segments, titles, values, reference_values, difference, is_better, lower_is_better):
+        cards.setdefault(segment, []).append(dbc.Col([
+            nutrition_kpi_card(title, region, value, reference, reference_value, diff, better, lower)
+        ], width=tile_width, lg=lg))
+
+    sections = []
+    for i, (segment, row) in enumerate(cards.items()):
+        sections += [
+            html.H3(segment_titles.get(segment, segment), className=(
+                f"{nutrition_section_class} {nutrition_first_section_class}" if i == 0 else nutrition_section_class)),
+            dbc.Row(row),
+        ]
+    return sections
+
+
+# ------------------------- SDG filter bar ------------------------- #
+
+sdg_goals = range(1, 18)
+
+# Square web icon of each goal (asset path); build_assets.py packs them into one sprite sheet
+sdg_icon_file = 'logos/SDG logos/SDG Web Files w- UN Emblem/E SDG Icons Square/E_SDG goals_icons-individual-rgb-{:02d}.png'
+
+sdg_filter_bar_class = shared_styles.add('sdg-filter-bar', {
+    "display": "grid",
+    "gridTemplateColumns": "repeat(9, 1fr)",
+    "gap": "5px",
+    "justifyItems": "center",
+    "maxWidth": "100%"
+})
+sdg_filter_class = shared_styles.add('sdg-filter', {
+    "border": "3px solid transparent",
+    "borderRadius": "8px",
+    "padding": "5px",
+    "margin": "5px",
+    "cursor": "pointer",
+    "backgroundColor": "transparent",
+    "transition": "all 0.2s"
+})
+sdg_filter_selected_class = shared_styles.add('sdg-filter-selected', {
+    "border": f"3px solid {brand_colors['Red']}",
+    "backgroundColor": brand_colors['Light green'],
+    "boxShadow": "0 2px 8px rgba(168, 0, 80, 0.3)"
+})
+sdg_filter_icon_class = shared_styles.add('sdg-filter-icon', {"display": "block", "width": "80px", "height": "80px"})
+
+
+def sdg_filter_class_name(goal, selected):
+    """className of the filter button of `goal` given the `selected` goals (as strings)"""
+    return f"{sdg_filter_class} {sdg_filter_selected_class}" if str(goal) in selected else sdg_filter_class
+
+
+def sdg_filter_bar(id_type='sdg-filter', icon_url=None):
+    """
+    Grid of SDG icon toggle buttons with pattern-matching ids {'type': id_type, 'index': goal},
+    so one callback with ALL inputs/outputs handles every goal.
+
+    Parameters:
+    - id_type: 'type' of the button ids
+    - icon_url: function giving the URL of a goal's icon, used when the sprite sheet (the
+      .sdg-icon classes of sdg_sprite.css, see build_assets.py) is not built; None to draw
+      every icon from the sprite
+    """
+    def icon(goal):
+        if icon_url is None:
+            return html.Span(className=f"sdg-icon sdg-icon-{goal} {sdg_filter_icon_class}")
+        return html.Img(src=icon_url(goal), alt=f"SDG {goal}", className=sdg_filter_icon_class)
 
+    return html.Div([
+        html.Button(icon(goal), id={'type': id_type, 'index': goal}, n_clicks=0, title=f"SDG {goal}",
+                    className=sdg_filter_class)
+        for goal in sdg_goals
+    ], className=sdg_filter_bar_class)
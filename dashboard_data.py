@@ -0,0 +1,645 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+GEO_EXTENSIONS = ('.geojson', '.json')
+
+# Column types applied whenever a source file is read, so the loaders do not need .astype
+# fix-ups. The Parquet/GeoParquet build (build_data.py) stores the same types.
+TABLE_DTYPES = {
+    'addis_adm3_mpi.geojson': {'MPI': float, 'Dist_Name': str},
+    'Hanoi_districts_MPI.geojson': {'Normalized': float, 'Dist_Name': str},
+    'addis_stakeholders_cleaned.csv': str,
+    'hanoi_stakeholders.csv': str,
+}
+
+# Pre-simplified boundary files written by build_data.py. Each level is the simplification
+# tolerance (degrees) used for maps shown at that zoom or further out; coordinates are also
+# quantized to a tenth of the tolerance.
+BOUNDARY_LEVELS = {8: 0.001, 10: 0.0002}
+
+# Boundary files to simplify, with an optional (column, value) row filter and the properties
+# the choropleths need (everything else is dropped from the served GeoJSON)
+BOUNDARY_FILES = {
+    'Hanoi_districts_MPI.geojson': {'keep': ['Dist_Name']},
+    'addis_adm3_mpi.geojson': {'keep': ['Dist_Name']},
+}
+
+
+def boundary_level(zoom):
+    """Most simplified level still detailed enough for `zoom`, or None for full detail."""
+    levels = [level for level in BOUNDARY_LEVELS if level >= zoom]
+    return min(levels) if levels else None
+
+
+def boundary_file(build_path, filename, level):
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(build_path, 'boundaries', f'{stem}.z{level}.geojson')
+
+
+def read_source(filepath):
+    """Read a CSV or GeoJSON file from assets/data with the column types in TABLE_DTYPES."""
+    dtypes = TABLE_DTYPES.get(os.path.basename(filepath))
+    if filepath.endswith(GEO_EXTENSIONS):
+        import geopandas as gpd
+        gdf = gpd.read_file(filepath)
+        return gdf.astype(dtypes) if dtypes else gdf
+    return pd.read_csv(filepath, dtype=dtypes)
+
+
+def shared_strings(series):
+    """
+    `series` of Python strings stored as a single Arrow buffer (pyarrow string dtype) rather
+    than one refcounted object per cell, so processes forked after loading it (gunicorn
+    workers with preload_app) keep sharing its memory pages copy-on-write.
+    Returned unchanged without pyarrow, or if it holds missing values or anything but strings.
+    """
+    if series.dtype != object or series.isna().any() or pd.api.types.infer_dtype(series) != 'string':
+        return series
+    try:
+        return series.astype(pd.StringDtype('pyarrow'))
+    except ImportError:
+        return series
+
+
+def shared_frame(df):
+    """`df` with its string columns converted by shared_strings."""
+    for col in [col for col in df.columns if df[col].dtype == object]:
+        df[col] = shared_strings(df[col])
+    return df
+
+
+def built_file(build_path, filename):
+    """Path of the Parquet/GeoParquet build of `filename` (relative to the data folder)."""
+    return os.path.join(build_path, filename + '.parquet')
+
+
+class DatasetRegistry:
+    """
+    Lazily loaded, memoized datasets shared by the dashboard callbacks and layouts.
+
+    Each dataset is registered with a loader function, the files it reads (relative to `path`)
+    and any other datasets it is derived from. Nothing is read at import time: a dataset is
+    loaded the first time it is requested, kept in memory, and re-loaded when one of its files
+    changes on disk or one of its dependencies is re-loaded.
+
+    When `build_path` is given, read_table() prefers the typed Parquet/GeoParquet files written
+    by build_data.py over the text sources, as long as they are newer than the source file.
+
+    Usage:
+        datasets = DatasetRegistry(path)
+
+        @datasets.register('mpi_long', 'addis_mpi_long.csv')
+        def load_mpi_long():
+            return datasets.read_table('addis_mpi_long.csv')
+
+        df_mpi = datasets['mpi_long']
+    """
+
+    def __init__(self, path, build_path=None):
+        self.path = path
+        self.build_path = build_path
+        self._loaders = {}   # name -> (loader, files, depends)
+        self._data = {}      # name -> (key, value)
+        self._versions = {}  # name -> number of times the dataset has been (re)loaded
+        self._listeners = []
+        self._boundaries = {}  # path -> (mtime, geojson dict)
+        self._lock = threading.RLock()
+
+    def file(self, filename):
+        return os.path.join(self.path, filename)
+
+    def read_table(self, filename):
+        """
+        Read `filename` from the Parquet build if it is present and fresh, else from source.
+        String columns are returned as Arrow buffers when possible (see shared_frame).
+        """
+        source = self.file(filename)
+        if self.build_path:
+            built = built_file(self.build_path, filename)
+            if os.path.exists(built) and os.path.getmtime(built) >= os.path.getmtime(source):
+                try:
+                    if filename.endswith(GEO_EXTENSIONS):
+                        import geopandas as gpd
+                        return shared_frame(gpd.read_parquet(built))
+                    return shared_frame(pd.read_parquet(built))
+                except ImportError:
+                    pass  # No Parquet engine installed, fall back to the text source
+        return shared_frame(read_source(source))
+
+    def read_boundaries(self, filename, zoom):
+        """
+        Boundary GeoJSON (as a dict) for `filename` simplified for display at `zoom`.
+        Returns None when no simplified level applies or it has not been built (or is stale),
+        in which case the caller should use the full-detail geometry.
+        """
+        level = boundary_level(zoom)
+        if level is None or not self.build_path:
+            return None
+        simplified = boundary_file(self.build_path, filename, level)
+        if not os.path.exists(simplified):
+            return None
+        mtime = os.path.getmtime(simplified)
+        if mtime < os.path.getmtime(self.file(filename)):
+            return None
+
+        entry = self._boundaries.get(simplified)
+        if entry is None or entry[0] != mtime:
+            with open(simplified) as f:
+                entry = (mtime, json.load(f))
+            with self._lock:
+                self._boundaries[simplified] = entry
+        return entry[1]
+
+    def register(self, name, *files, depends=()):
+        def decorator(loader):
+            self._loaders[name] = (loader, files, tuple(depends))
+            return loader
+        return decorator
+
+    def __contains__(self, name):
+        return name in self._loaders
+
+    def __getitem__(self, name):
+        loader, files, depends = self._loaders[name]
+        key = self._key(files, depends)
+        entry = self._data.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None or entry[0] != key:
+                reloaded = entry is not None
+                entry = (key, loader())
+                self._data[name] = entry
+                self._versions[name] = self._versions.get(name, 0) + 1
+                if reloaded:
+                    for listener in self._listeners:
+                        listener(name)
+        return entry[1]
+
+    def get(self, name, default=None):
+        return self[name] if name in self._loaders else default
+
+    def version(self, *names):
+        """Tuple identifying the currently loaded state of `names` (all datasets if empty)."""
+        names = names or tuple(sorted(self._loaders))
+        for name in names:
+            self[name]
+        return tuple(self._versions.get(name, 0) for name in names)
+
+    def fingerprint(self, *names):
+        """
+        Modification times of the files behind `names` and their dependencies. Unlike version(),
+        this is the same in every process and across restarts, so it can key shared caches.
+        """
+        files, pending, seen = set(), list(names), set()
+        while pending:
+            name = pending.pop()
+            if name not in seen:
+                seen.add(name)
+                _, dataset_files, depends = self._loaders[name]
+                files.update(dataset_files)
+                pending.extend(depends)
+        return tuple(stamp for f in sorted(files) for stamp in self._stamps(f))
+
+    def on_reload(self, listener):
+        """Register `listener(name)` to be called whenever a loaded dataset is re-loaded."""
+        self._listeners.append(listener)
+        return listener
+
+    def preload(self, *names):
+        for name in names or tuple(self._loaders):
+            self[name]
+        return self
+
+    def scope(self, prefix):
+        """View of this registry whose dataset names are prefixed with `prefix` (see DatasetScope)."""
+        return DatasetScope(self, prefix)
+
+    def _stamps(self, filename):
+        """
+        (file, mtime) of `filename` and of the simplified boundaries read_boundaries() serves in
+        its place, so rebuilding those (build_data.py) invalidates what was drawn from them.
+        """
+        stamps = [(filename, os.path.getmtime(self.file(filename)))]
+        if filename in BOUNDARY_FILES and self.build_path:
+            for level in BOUNDARY_LEVELS:
+                simplified = boundary_file(self.build_path, filename, level)
+                if os.path.exists(simplified):
+                    stamps.append((os.path.relpath(simplified, self.build_path), os.path.getmtime(simplified)))
+        return stamps
+
+    def _key(self, files, depends):
+        mtimes = tuple(stamp for f in files for stamp in self._stamps(f))
+        # Load (or refresh) the dependencies first so their versions are current
+        for dep in depends:
+            self[dep]
+        versions = tuple(self._versions[dep] for dep in depends)
+        return mtimes, versions
+
+
+class DatasetScope:
+    """
+    View of a DatasetRegistry that prefixes dataset names with `prefix` (e.g. 'addis/'), so
+    several city dashboards can register the same names in one shared registry. Names (and
+    dependencies) not registered in the scope resolve to the shared, unprefixed dataset.
+    Files, tables and boundaries are read through the underlying registry.
+    """
+
+    def __init__(self, registry, prefix):
+        self.registry = registry
+        self.prefix = prefix
+
+    def name(self, name):
+        """Full registry name of `name` in this scope."""
+        scoped = self.prefix + name
+        return scoped if scoped in self.registry or name not in self.registry else name
+
+    def register(self, name, *files, depends=()):
+        return self.registry.register(self.prefix + name, *files,
+                                      depends=[self.name(dep) for dep in depends])
+
+    def __contains__(self, name):
+        return self.prefix + name in self.registry or name in self.registry
+
+    def __getitem__(self, name):
+        return self.registry[self.name(name)]
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def version(self, *names):
+        return self.registry.version(*[self.name(name) for name in names])
+
+    def fingerprint(self, *names):
+        return self.registry.fingerprint(*[self.name(name) for name in names])
+
+    def preload(self, *names):
+        """Load `names` (every dataset of the scope if empty)."""
+        names = [self.name(name) for name in names] or [
+            name for name in self.registry._loaders if name.startswith(self.prefix)]
+        for name in names:
+            self.registry[name]
+        return self
+
+    def __getattr__(self, attr):
+        # file(), read_table(), read_boundaries(), on_reload(), path, ...
+        return getattr(self.registry, attr)
+
+
+class OutletLayerStore:
+    """
+    In-memory store of food outlet point layers.
+
+    Every GeoJSON file in `folder` is read once, reprojected to `crs` and kept as contiguous
+    lat/lon NumPy arrays keyed by filename, so toggling layers on the map only slices arrays.
+    A layer is re-read lazily the next time it is requested after its file mtime changes.
+    """
+
+    def __init__(self, folder, crs='EPSG:4326', extensions=('.geojson', '.json')):
+        self.folder = folder
+        self.crs = crs
+        self.extensions = extensions
+        self._layers = {}  # filename -> (mtime, lat, lon)
+        self._lock = threading.Lock()
+
+    def filenames(self):
+        return sorted(f for f in os.listdir(self.folder) if f.endswith(self.extensions))
+
+    def get(self, filename):
+        """Return (lat, lon) arrays for `filename`, reloading it if the file changed on disk."""
+        filepath = os.path.join(self.folder, filename)
+        mtime = os.path.getmtime(filepath)
+        layer = self._layers.get(filename)
+        if layer is None or layer[0] != mtime:
+            lat, lon = self._read(filepath)
+            layer = (mtime, lat, lon)
+            with self._lock:
+                self._layers[filename] = layer
+        return layer[1], layer[2]
+
+    def load_all(self):
+        for filename in self.filenames():
+            self.get(filename)
+        return self
+
+    def _read(self, filepath):
+        import geopandas as gpd
+
+        gdf = gpd.read_file(filepath).to_crs(self.crs)
+        points = gdf.geometry[~(gdf.geometry.isna() | gdf.geometry.is_empty)]
+        lat = np.ascontiguousarray(points.y.to_numpy(), dtype='float32')
+        lon = np.ascontiguousarray(points.x.to_numpy(), dtype='float32')
+        return lat, lon
+
+
+class LRUCache:
+    """
+    Small thread-safe least-recently-used cache holding at most `maxsize` entries (unbounded if
+    None) and, when `max_bytes` is given, at most that many bytes as declared on set().
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value, size=0):
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            # Evict the oldest entries, but always keep the one just added
+            while len(self._data) > 1 and (
+                    (self.maxsize is not None and len(self._data) > self.maxsize)
+                    or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+                oldest, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(oldest)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self.nbytes -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+# DataTable filter_query operators, longest first so e.g. '>=' is matched before '>'
+FILTER_OPERATORS = [
+    ('datestartswith', 'datestartswith'), ('scontains', 'contains'), ('icontains', 'icontains'),
+    ('contains', 'contains'), ('>=', 'ge'), ('<=', 'le'), ('!=', 'ne'), ('>', 'gt'), ('<', 'lt'),
+    ('=', 'eq'), (' sge ', 'ge'), (' sle ', 'le'), (' sne ', 'ne'), (' sgt ', 'gt'), (' slt ', 'lt'),
+    (' seq ', 'eq'), (' ieq ', 'ieq'), (' ge ', 'ge'), (' le ', 'le'), (' ne ', 'ne'), (' gt ', 'gt'),
+    (' lt ', 'lt'), (' eq ', 'eq'),
+]
+
+
+def split_filter_part(filter_part):
+    """
+    Split one DataTable filter expression ("{col} op value") into (column, operator, value).
+    The value is kept as typed (a string, without its quotes): TableQuery only converts it to a
+    number for comparisons on numeric columns, so `contains 2017` still matches text.
+    """
+    for token, operator in FILTER_OPERATORS:
+        if token in filter_part:
+            name_part, value_part = filter_part.split(token, 1)
+            name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+            value_part = value_part.strip()
+            if len(value_part) > 1 and value_part[0] == value_part[-1] and value_part[0] in ("'", '"', '`'):
+                value_part = value_part[1:-1].replace('\\' + value_part[0], value_part[0])
+            return name, operator, value_part
+    return None, None, None
+
+
+class TableQuery:
+    """
+    Server-side filtering, sorting and paging for a DataTable with page_action='custom'.
+
+    The frame is indexed once: every column keeps a text view (and a lower-case one) for the
+    'contains' filters and a numeric view for comparisons. Filtered and sorted row positions
+    are cached per (rows key, filter, sort), and page records per (..., page, page size), so
+    paging through a result only slices the cached positions.
+    """
+
+    def __init__(self, df, cache_size=256):
+        self.df = df.reset_index(drop=True)
+        self._text = {col: shared_strings(self.df[col].fillna('').astype(str)) for col in self.df.columns}
+        self._lower = {col: text.str.lower() for col, text in self._text.items()}
+        self._numeric = {col: pd.to_numeric(self.df[col], errors='coerce') for col in self.df.columns}
+        self._positions = LRUCache(cache_size)
+        self._pages = LRUCache(cache_size)
+
+    def _mask(self, column, operator, value):
+        if column not in self._text:
+            return None
+        if operator in ('contains', 'icontains', 'datestartswith', 'ieq'):
+            if operator == 'contains':
+                return self._text[column].str.contains(value, regex=False)
+            if operator == 'icontains':
+                return self._lower[column].str.contains(value.lower(), regex=False)
+            if operator == 'ieq':
+                return self._lower[column] == value.lower()
+            return self._text[column].str.startswith(value)
+
+        # Comparisons are numeric when both the value and the column are
+        series = self._text[column]
+        if self._numeric[column].notna().any():
+            try:
+                series, value = self._numeric[column], float(value)
+            except ValueError:
+                pass
+        return {
+            'eq': series == value, 'ne': series != value, 'lt': series < value,
+            'le': series <= value, 'gt': series > value, 'ge': series >= value,
+        }[operator]
+
+    def positions(self, filter_query='', sort_by=None, rows=None, rows_key=None):
+        """Row positions matching `filter_query` (within `rows`, if given), in `sort_by` order."""
+        sort_key = tuple((s['column_id'], s['direction']) for s in sort_by or [])
+        key = (rows_key, filter_query or '', sort_key)
+        cached = self._positions.get(key)
+        if cached is not None:
+            return cached
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for part in (filter_query or '').split(' && '):
+            column, operator, value = split_filter_part(part)
+            if operator is not None:
+                part_mask = self._mask(column, operator, value)
+                if part_mask is not None:
+                    mask &= part_mask.to_numpy(dtype=bool, na_value=False)
+
+        if rows is not None:
+            keep = np.zeros(len(self.df), dtype=bool)
+            keep[np.asarray(rows, dtype=int)] = True
+            mask &= keep
+        positions = np.flatnonzero(mask)
+
+        if sort_key:
+            columns = [col for col, _ in sort_key if col in self.df.columns]
+            ascending = [direction == 'asc' for col, direction in sort_key if col in self.df.columns]
+            if columns:
+                ordered = self.df.iloc[positions].sort_values(columns, ascending=ascending, kind='stable')
+                positions = ordered.index.to_numpy()
+
+        return self._positions.set(key, positions)
+
+    def page(self, page_current, page_size, filter_query='', sort_by=None, rows=None, rows_key=None, columns=None):
+        """
+        Records of the visible page plus the page count and number of matching rows.
+        `rows` optionally restricts the table to a subset of row positions (identified in the
+        cache by `rows_key`), and `columns` to a subset of columns.
+        """
+        page_current, page_size = page_current or 0, page_size or 10
+        sort_key = tuple((s['column_id'], s['direction']) for s in sort_by or [])
+        key = (rows_key, filter_query or '', sort_key, page_current, page_size, tuple(columns or ()))
+        cached = self._pages.get(key)
+        if cached is not None:
+            return cached
+
+        positions = self.positions(filter_query, sort_by, rows=rows, rows_key=rows_key)
+        visible = self.df.iloc[positions[page_current * page_size:(page_current + 1) * page_size]]
+        if columns:
+            visible = visible[columns]
+        page_count = max(1, -(-len(positions) // page_size))
+        return self._pages.set(key, (visible.to_dict('records'), page_count, len(positions)))
+
+
+class FacetIndex:
+    """
+    Category counts and row positions of a frame for a set of facet columns, built once so that
+    filtering (on one or several facets) only intersects precomputed position arrays instead of
+    scanning the frame.
+
+    Parameters:
+    - df: frame to index
+    - facets: dict mapping facet names (e.g. dropdown values) to column names
+    """
+
+    def __init__(self, df, facets):
+        self.facets = dict(facets)
+        self.n_rows = len(df)
+        self.codes, self.categories, self.rows = {}, {}, {}
+        self._counts = {}
+        for facet, column in self.facets.items():
+            codes, categories = pd.factorize(df[column].to_numpy())
+            # Positions grouped by category: one stable sort, then a slice per category
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            self.codes[facet], self.categories[facet] = codes, categories
+            self.rows[facet] = {
+                category: order[bounds[i]:bounds[i + 1]] for i, category in enumerate(categories)
+            }
+            self._counts[facet] = pd.Series(np.diff(bounds), index=categories).sort_values(
+                ascending=False, kind='stable')
+
+    def select(self, filters=None):
+        """Sorted row positions matching every {facet: category} in `filters` (all rows if none)."""
+        result = None
+        for facet, category in (filters or {}).items():
+            if category is None:
+                continue
+            rows = self.rows[facet].get(category, np.array([], dtype=int))
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return np.arange(self.n_rows) if result is None else result
+
+    def counts(self, facet, filters=None):
+        """
+        Rows per category of `facet` (largest first), optionally restricted to the rows matching
+        `filters` on the other facets.
+        """
+        filters = {f: c for f, c in (filters or {}).items() if f != facet and c is not None}
+        if not filters:
+            return self._counts[facet]
+        codes = self.codes[facet][self.select(filters)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories[facet]))
+        counts = pd.Series(counts, index=self.categories[facet])
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+
+class TrendStore:
+    """
+    Long-format trend table split once into contiguous x/y arrays per category and group
+    (e.g. Year/value per Cat and Reg), so a category's lines are ready without scanning the
+    table, plus a memo of the figure built for each category.
+
+    Parameters:
+    - df: long table with one row per (category, group, x)
+    - category, group, x, y: column names
+
+    Groups keep their order of first appearance within each category and points their row order.
+    """
+
+    def __init__(self, df, category='Cat', group='Reg', x='Year', y='value'):
+        xs, ys = df[x].to_numpy(), df[y].to_numpy(dtype=float)
+        self.series = {}  # category -> [(group, x array, y array), ...]
+        for (cat, grp), rows in df.groupby([category, group], sort=False).indices.items():
+            self.series.setdefault(cat, []).append((grp, np.ascontiguousarray(xs[rows]), np.ascontiguousarray(ys[rows])))
+        self._figures = {}
+
+    def categories(self):
+        return list(self.series)
+
+    def figure(self, category, build):
+        """
+        `build(series)` for the series of `category`, computed on first request only, or None if
+        `category` is not in the table (so client input cannot grow the memo).
+        """
+        try:
+            series = self.series.get(category)
+        except TypeError:  # unhashable, e.g. a list sent by a scripted request
+            return None
+        if series is None:
+            return None
+        figure = self._figures.get(category)
+        if figure is None:
+            figure = self._figures[category] = build(series)
+        return figure
+
+
+class RecordsCache:
+    """
+    DataTable records (DataFrame.to_dict('records')) per (dataset, filter key), so unchanged
+    frames are serialized once. Entries are evicted least-recently-used beyond `max_bytes`
+    (measured as the frame's deep memory usage) and dropped as soon as `registry` re-loads
+    their dataset.
+    """
+
+    def __init__(self, registry, max_bytes=64 * 1024 * 1024):
+        self._cache = LRUCache(maxsize=None, max_bytes=max_bytes)
+        registry.on_reload(self.invalidate)
+
+    def records(self, name, key, frame):
+        """
+        Records of dataset `name` under filter `key`, calling `frame()` for the (filtered)
+        DataFrame only on a miss.
+        """
+        records = self._cache.get((name, key))
+        if records is None:
+            df = frame()
+            size = int(df.memory_usage(deep=True, index=False).sum())
+            records = self._cache.set((name, key), df.to_dict('records'), size=size)
+        return records
+
+    def invalidate(self, name):
+        for key in self._cache.keys():
+            if key[0] == name:
+                self._cache.pop(key)
+
+    @property
+    def nbytes(self):
+        return self._cache.nbytes
@@ -0,0 +1,342 @@
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dashboard_components import brand_colors
+from dashboard_data import LRUCache
+
+sankey_link_color = "rgba(209, 231, 168, 0.5)"
+
+# Serialized supply tab outputs per (city, data version, year), shared by every app in the process
+supply_figure_cache = LRUCache(maxsize=32)
+
+
+def sankey_year_links(df_sankey, urban_node='Hanoi urban'):
+    """
+    Precompute the Sankey link arrays and KPIs of every year in the supply data.
+
+    Both flow stages (province -> Target and Target -> Target_1) are stacked and aggregated in a
+    single groupby, and the node labels are factorized once for all years, so each year only
+    needs an array lookup to map its links to local node indices.
+
+    Parameters:
+    - df_sankey: supply data with province, Target, Target_1, Year, Supply to Hanoi and Rice supply
+    - urban_node: second-stage target counted in the urban share
+
+    Returns a dict mapping each year to its labels, source/target/value arrays, total flow and
+    urban share (%).
+    """
+    # Supply to Hanoi is repeated on each Target_1 row of a province, so keep it once
+    flow1 = df_sankey[['Year', 'province', 'Target', 'Supply to Hanoi']].drop_duplicates()
+    flow1.columns = ['Year', 'source', 'target', 'supply']
+    flow2 = df_sankey[['Year', 'Target', 'Target_1', 'Rice supply']]
+    flow2.columns = ['Year', 'source', 'target', 'supply']
+
+    links = pd.concat([flow1.assign(stage=1), flow2.assign(stage=2)], ignore_index=True)
+    links = links.groupby(['Year', 'stage', 'source', 'target'], sort=False, as_index=False)['supply'].sum()
+
+    n_links = len(links)
+    codes, labels = pd.Index(np.concatenate([links['source'].to_numpy(), links['target'].to_numpy()])).factorize()
+    source_codes, target_codes = codes[:n_links], codes[n_links:]
+    urban_code = labels.get_loc(urban_node) if urban_node in labels else -1
+
+    year_links = {}
+    lookup = np.full(len(labels), -1)
+    for year, rows in links.groupby('Year', sort=True).indices.items():
+        source, target = source_codes[rows], target_codes[rows]
+        value = links['supply'].to_numpy()[rows]
+        stage = links['stage'].to_numpy()[rows]
+
+        # Nodes of this year in order of first appearance (sources, then targets)
+        nodes = pd.unique(np.concatenate([source, target]))
+        lookup[nodes] = np.arange(len(nodes))
+
+        second_stage = stage == 2
+        total = value[second_stage].sum()
+        urban = value[second_stage & (target == urban_code)].sum()
+        year_links[int(year)] = {
+            'labels': labels[nodes].tolist(),
+            'source': lookup[source],
+            'target': lookup[target],
+            'value': value,
+            'total_flow': value[stage == 1].sum(),
+            'urban_share': urban / total * 100 if total else 0.0,
+        }
+    return year_links
+
+
+# Links of a year without supply data, in the format of sankey_year_links
+no_links = {'labels': [], 'source': np.array([], dtype=int), 'target': np.array([], dtype=int),
+            'value': np.array([]), 'total_flow': 0, 'urban_share': 0.0}
+
+
+def sankey_figure(links):
+    """Sankey diagram of one year of precomputed links (see sankey_year_links)."""
+    fig = go.Figure(go.Sankey(
+        node=dict(label=links['labels'], color=[brand_colors['Red']] * len(links['labels']), pad=15, thickness=20),
+        link=dict(source=links['source'], target=links['target'], value=links['value'],
+                  color=[sankey_link_color] * len(links['value']),
+                  hovertemplate='From %{source.label} → %{target.label}<br>Flow: %{value}<extra></extra>')
+    ))
+
+    fig.update_layout(
+        hovermode='x',
+        font=dict(size=12, color='black'),
+        paper_bgcolor=brand_colors['White'],
+        plot_bgcolor=brand_colors['White'],
+        margin=dict(l=10, r=10, t=20, b=20),
+        width=None)
+    return fig
+
+
+def urban_share_figure(urban_share):
+    """Donut of the urban vs rural share of the rice supply."""
+    urban_fig = go.Figure(go.Pie(
+        values=[urban_share, 100-urban_share],
+        hole=0.6,
+        marker=dict(colors=[brand_colors['Red'], brand_colors['Light green']]),
+        textinfo="none",
+        labels=["Urban", "Rural"],
+        hoverinfo="label+percent",
+        hovertext=[f"Urban: {urban_share:.1f}%", f"Rural: {100-urban_share:.1f}%"]
+    ))
+
+    urban_fig.update_layout(showlegend=False, margin=dict(l=0,r=0,t=0,b=0.1),
+                            paper_bgcolor="rgba(0,0,0,0)",
+                            plot_bgcolor="rgba(0,0,0,0)")
+    return urban_fig
+
+
+def figure_json(fig):
+    """Plain JSON dict of a figure, which Dash can send without re-validating a go.Figure."""
+    return json.loads(fig.to_json())
+
+
+def supply_figures(city, version, year, year_links):
+    """
+    KPI text, urban donut and Sankey of one year of the supply tab, served from
+    supply_figure_cache and built from `year_links` (see sankey_year_links) on first use.
+    Years without supply links (or None) get empty figures, which are not cached.
+
+    Parameters:
+    - city: name of the calling dashboard, so cities sharing a process keep separate entries
+    - version: data version of `year_links`, so re-loaded data is never served stale figures
+    - year: slider year
+    - year_links: precomputed links of every year
+    """
+    if year not in year_links:
+        return supply_outputs(no_links)
+    key = (city, version, year)
+    outputs = supply_figure_cache.get(key)
+    if outputs is None:
+        outputs = supply_figure_cache.set(key, supply_outputs(year_links[year]))
+    return outputs
+
+
+def supply_outputs(links):
+    """KPI text, urban donut and Sankey (as JSON) of one year of precomputed links."""
+    return (
+        f"{links['total_flow']:,.0f}",
+        figure_json(urban_share_figure(links['urban_share'])),
+        figure_json(sankey_figure(links)),
+    )
+
+
+def warm_supply_figures(city, version, year_links):
+    """Fill supply_figure_cache with every year, e.g. before the first request."""
+    for year in year_links:
+        supply_figures(city, version, year, year_links)
+
+
+def mpi_bar_figure(df_variable, district_label, row_height=None):
+    """
+    Horizontal bar chart of one MPI variable by district. Built with go.Bar, which costs a
+    fraction of a px.bar call, to look like the px.bar chart it replaced.
+
+    Parameters:
+    - df_variable: rows of the long MPI table for one Variable, sorted by Value (descending)
+    - district_label: axis and hover label of the districts
+    - row_height: figure height per bar in px (None, or no rows, to fill the container)
+    """
+    value_label = "Percentage of Deprived Households"
+    fig = go.Figure(go.Bar(
+        x=df_variable['Value'].to_numpy(),
+        y=df_variable['Dist_Name'].to_numpy(),
+        orientation='h',
+        marker_color=brand_colors['Red'],
+        hovertemplate=f"{value_label}=%{{x}}<br>{district_label}=%{{y}}<extra></extra>"
+    ))
+    fig.update_layout(
+        xaxis=dict(title=value_label),
+        yaxis=dict(title=district_label, categoryorder='total ascending'),
+        barmode='relative',
+        margin=dict(l=0.15, r=0.1, t=0.15, b=1),
+        hoverlabel=dict(
+            bgcolor="white",      # Tooltip background color
+            font_color="black",   # Tooltip text color
+        )
+    )
+    if row_height and len(df_variable):
+        fig.update_layout(height=row_height * len(df_variable))
+    else:
+        fig.update_layout(autosize=True)  # Allow figure to fill container
+    return fig
+
+
+def mpi_bar_figures(df_mpi, district_label, row_height=None):
+    """Serialized mpi_bar_figure of every Variable of the long MPI table, sorted in one pass."""
+    df_sorted = df_mpi.sort_values('Value', ascending=False, kind='stable')
+    return {variable: figure_json(mpi_bar_figure(rows, district_label, row_height))
+            for variable, rows in df_sorted.groupby('Variable', sort=False)}
+
+
+def dumbbell_figure(matrix, start_year, end_year):
+    """
+    Dumbbell chart of every category (column) of a Year x category matrix between two years:
+    one marker per year and an arrow from the start to the end value. The arrows of all
+    categories are a single trace (line segments separated by gaps, with an arrow marker on
+    each end point) rather than one annotation each. Categories missing either value get no arrow.
+    """
+    categories = matrix.columns.to_numpy()
+    start, end = matrix.reindex([start_year, end_year]).to_numpy(dtype=float)
+
+    valid = ~(np.isnan(start) | np.isnan(end))
+    n_arrows = int(valid.sum())
+    arrow_x = np.full(3 * n_arrows, None, dtype=object)
+    arrow_y = np.full(3 * n_arrows, None, dtype=object)
+    arrow_x[0::3], arrow_x[1::3] = start[valid], end[valid]
+    arrow_y[0::3] = arrow_y[1::3] = categories[valid]
+
+    fig = go.Figure()
+
+    # Start year markers
+    fig.add_trace(go.Scatter(
+        x=start,
+        y=categories,
+        mode="markers",
+        name=str(start_year),
+        marker=dict(
+                    color=brand_colors['Red'],
+                    size=8,
+                    symbol="circle",
+                    line=dict(
+                        color=brand_colors['Brown'],  # outline color
+                        width=2                      # outline thickness
+                    )
+                )
+    ))
+
+    # End year markers
+    fig.add_trace(go.Scatter(
+        x=end,
+        y=categories,
+        mode="markers",
+        name=str(end_year),
+        marker=dict(
+                    color=brand_colors['Light green'],
+                    size=8,
+                    symbol="circle",
+                    line=dict(
+                        color=brand_colors['Brown'],  # outline color
+                        width=2                      # outline thickness
+                    )
+                )
+    ))
+
+    # Arrows from the start to the end value, pointing along the segment (angleref='previous')
+    fig.add_trace(go.Scatter(
+        x=arrow_x,
+        y=arrow_y,
+        mode="lines+markers",
+        line=dict(color=brand_colors['Brown'], width=2),
+        marker=dict(
+            symbol="arrow",
+            angleref="previous",
+            size=np.tile([0, 10, 0], n_arrows),
+            color=brand_colors['Brown'],
+        ),
+        hoverinfo="skip",
+        showlegend=False
+    ))
+
+    fig.update_layout(
+    yaxis=dict(
+        tickfont=dict(size=12),
+        automargin=True,
+        ticklabelposition="outside right",
+        showgrid=True,                # Show horizontal grid lines
+        gridcolor='#949494',
+        gridwidth=0.7
+    ),
+    xaxis=dict(
+        showgrid=True,
+        gridcolor="#949494",
+        gridwidth=0.7
+    ),
+    margin=dict(l=120, r=20, t=40, b=20),
+    paper_bgcolor=brand_colors['White'],
+    plot_bgcolor=brand_colors['White'],
+    )
+    return fig
+
+
+def trend_figure(series, y_label, colors):
+    """
+    Serialized line chart (go.Scattergl) of one category of a TrendStore, one line per group.
+
+    Parameters:
+    - series: list of (group, years, values) (see TrendStore.series)
+    - y_label: y axis title
+    - colors: line colors, cycled over the groups
+    """
+    fig = go.Figure([
+        go.Scattergl(
+            x=years,
+            y=values,
+            name=str(group),
+            mode='lines+markers',
+            line=dict(color=color),
+            marker=dict(size=8, color=color),
+            hovertemplate=f"Reg={group}<br>Year=%{{x}}<br>value=%{{y}}<extra></extra>"
+        )
+        for (group, years, values), color in zip(series, itertools.cycle(colors))
+    ])
+    fig.update_layout(
+        margin=dict(l=0.25, r=0, t=0, b=0.25),
+        hoverlabel=dict(bgcolor="white", font_color="black"),
+        legend=dict(
+            title=None,
+            x=1.1, y=1.1,
+            xanchor='right', yanchor='top',
+            bgcolor='rgba(255,255,255,0.7)',
+            bordercolor='rgba(0,0,0,0.1)',
+            borderwidth=1,
+            font=dict(size=12)
+        )
+    )
+    fig.update_xaxes(title_text=None)
+    fig.update_yaxes(title_text=y_label)
+    return figure_json(fig)
+
+
+def stakeholder_pie(counts, slice_colors, text_colors):
+    """Serialized pie of stakeholder counts per category (e.g. FacetIndex.counts), with no slice pulled."""
+    df_count = counts.rename_axis('name').reset_index(name='count')
+
+    fig = px.pie(df_count, values='count', names='name', hole=0,
+                 color_discrete_sequence=slice_colors)
+    fig.update_traces(textfont_color=text_colors, hoverinfo='percent', textinfo='label', textposition='inside', insidetextorientation='radial')
+    fig.update_layout(margin=dict(t=0.1, l=0.1, r=0.1, b=0.1), showlegend=False)
+    return figure_json(fig)
+
+
+def pull_slice(pie, selected):
+    """Copy of a serialized pie with the `selected` slice pulled out (the same as updatePie in
+    assets/stakeholder_filters.js does in the browser)."""
+    trace = pie['data'][0]
+    pull = [0.2 if name == selected else 0 for name in trace['labels']]
+    return {**pie, 'data': [{**trace, 'pull': pull}]}
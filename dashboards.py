@@ -0,0 +1,35 @@
+"""
+Serve every city dashboard from one process: each city app is mounted on the shared Flask
+server under its own URL prefix (/addis/, /hanoi/, ...) and shares the dataset registry and
+figure caches with the others (see dashboard_app.py).
+
+This is the development server (debug mode with DASHBOARD_DEBUG=1); use wsgi.py in production.
+
+Usage:
+    python dashboards.py
+    python dashboards.py --payload-report   # layout JSON size per tab, then exit
+"""
+import argparse
+import logging
+
+from dashboard_app import cities, debug, load_cities, payload_report
+
+server = load_cities()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--payload-report', action='store_true',
+                        help="print the serialized size of every tab layout (and of the callback "
+                             "outputs added with add_payload_output) with inline styles and with the "
+                             "shared style classes, then exit")
+    args = parser.parse_args()
+    if args.payload_report:
+        print(f"{'City':<12} {'Tab':<44} {'Inline':>10} {'Classes':>10} {'Saved':>7}")
+        for city, tab, before, after in payload_report():
+            print(f"{city:<12} {tab:<44} {before:>10,} {after:>10,} {1 - after / before:>7.1%}")
+        raise SystemExit
+    # Build the supply figures (and MPI bar figures in warm-start mode) before serving
+    for dashboard in cities.values():
+        dashboard.warm()
+    server.run(debug=debug, port=8050)
@@ -0,0 +1,16 @@
+"""
+gunicorn settings for the production entry point: gunicorn wsgi:server
+Settings can be overridden on the command line or through GUNICORN_CMD_ARGS.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+
+# Import wsgi.py (which loads all the data) in the master, then fork the workers from it so they
+# share the loaded data copy-on-write
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# The first request of a tab may still build figures that were not preloaded
+timeout = 120
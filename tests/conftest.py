@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+import pytest
+from dash import ALL
+
+# The dashboard modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def stringify_id(component_id):
+    """Component id as Dash writes it in callback keys (pattern ids as sorted JSON)"""
+    if isinstance(component_id, str):
+        return component_id
+    return json.dumps({key: ['ALL'] if value is ALL else value for key, value in component_id.items()},
+                      sort_keys=True, separators=(',', ':'))
+
+
+@pytest.fixture(scope='session')
+def dashboards():
+    """dashboard_app with every city mounted on its server"""
+    import dashboard_app
+    dashboard_app.load_cities()
+    return dashboard_app
+
+
+@pytest.fixture
+def update_component(dashboards):
+    """
+    Function calling a callback of a city app through the Flask test client, as the browser
+    does, and returning the response. The figure cache is emptied first.
+
+    Parameters of the function:
+    - slug: city of the app
+    - outputs: (id, property) pairs, or (pattern id, property, matched ids) for ALL outputs
+    - inputs, state: (id, property, value), or (pattern id, property, [(matched id, value), ...])
+      for ALL inputs
+    - changed: (id, property) that triggered the call, by default the first input
+    """
+    dashboards.figure_cache.clear()
+    client = dashboards.server.test_client()
+
+    def props(items, with_value=True):
+        payload = []
+        for component_id, prop, *rest in items:
+            if not rest:
+                payload.append({'id': component_id, 'property': prop})
+            elif not isinstance(component_id, dict) or ALL not in component_id.values():
+                payload.append({'id': component_id, 'property': prop, 'value': rest[0]})
+            elif with_value:
+                payload.append([{'id': matched, 'property': prop, 'value': value} for matched, value in rest[0]])
+            else:
+                payload.append([{'id': matched, 'property': prop} for matched in rest[0]])
+        return payload
+
+    def update(slug, outputs, inputs, state=(), changed=None):
+        keys = [f"{stringify_id(component_id)}.{prop}" for component_id, prop, *_ in outputs]
+        changed = changed or inputs[0][:2]
+        body = {
+            'output': keys[0] if len(keys) == 1 else '..' + '...'.join(keys) + '..',
+            'outputs': props(outputs, with_value=False)[0] if len(keys) == 1 else props(outputs, with_value=False),
+            'inputs': props(inputs),
+            'state': props(state),
+            'changedPropIds': [f"{stringify_id(changed[0])}.{changed[1]}"],
+        }
+        return client.post(f"/{slug}/_dash-update-component", json=body)
+
+    return update
@@ -0,0 +1,224 @@
+import pytest
+from dash import ALL
+
+from conftest import stringify_id
+from dashboard_components import sdg_filter_selected_class
+from dashboard_data import boundary_level
+
+
+def patched(figure):
+    """Locations assigned by a serialized Patch, with their values"""
+    return {tuple(op['location']): op['params']['value'] for op in figure['operations'] if op['operation'] == 'Assign'}
+
+
+def test_district_click_sends_the_boundaries_of_the_district_zoom(dashboards, update_component, monkeypatch):
+    hanoi = dashboards.cities['hanoi']
+    levels = {}
+    monkeypatch.setattr(hanoi, 'mpi_geojson_for_zoom', lambda zoom: levels.setdefault(
+        boundary_level(zoom), {'type': 'FeatureCollection', 'features': [], 'level': boundary_level(zoom)}))
+    district = hanoi.datasets['mpi_centroids']['names'][0]
+
+    def click(dist, drawn_zoom):
+        response = update_component(
+            'hanoi', [('map', 'figure'), ('map-boundary-zoom', 'data')],
+            [('bar-plot', 'clickData', {'points': [{'y': dist}]} if dist else None), ('variable-dropdown', 'value', 'Assets')],
+            state=[('map-boundary-zoom', 'data', drawn_zoom)])
+        assert response.status_code == 200
+        output = response.get_json()['response']
+        return patched(output['map']['figure']), output['map-boundary-zoom']['data']
+
+    config = hanoi.config
+    changes, zoom = click(district, config['map_zoom'])
+    assert zoom == config['district_zoom']
+    assert changes[('layout', 'mapbox', 'zoom')] == config['district_zoom']
+    assert changes[('data', 0, 'geojson')]['level'] == boundary_level(config['district_zoom'])
+
+    # Another district at the same zoom keeps the boundaries already drawn
+    changes, zoom = click(hanoi.datasets['mpi_centroids']['names'][1], zoom)
+    assert ('data', 0, 'geojson') not in changes
+
+    changes, zoom = click(None, zoom)
+    assert zoom == config['map_zoom']
+    assert changes[('data', 0, 'geojson')]['level'] == boundary_level(config['map_zoom'])
+
+
+def test_variable_change_resets_the_district_highlight(dashboards, update_component):
+    hanoi = dashboards.cities['hanoi']
+    config, centroids = hanoi.config, hanoi.datasets['mpi_centroids']
+    click = {'points': [{'y': centroids['names'][0]}]}
+    inputs = [('bar-plot', 'clickData', click), ('variable-dropdown', 'value', 'Assets')]
+    state = [('map-boundary-zoom', 'data', config['map_zoom'])]
+
+    response = update_component('hanoi', [('map', 'figure'), ('map-boundary-zoom', 'data')], inputs, state)
+    changes = patched(response.get_json()['response']['map']['figure'])
+    assert changes[('layout', 'mapbox', 'zoom')] == config['district_zoom']
+    assert max(changes[('data', 0, 'marker', 'line', 'width')]) == 2
+
+    # The click is still in clickData, but the dropdown triggered the call
+    response = update_component('hanoi', [('map', 'figure'), ('map-boundary-zoom', 'data')], inputs, state,
+                                changed=('variable-dropdown', 'value'))
+    changes = patched(response.get_json()['response']['map']['figure'])
+    assert changes[('layout', 'mapbox', 'zoom')] == config['map_zoom']
+    assert changes[('layout', 'mapbox', 'center')] == centroids['center']
+    assert set(changes[('data', 0, 'marker', 'opacity')]) == {0.7}
+    assert set(changes[('data', 0, 'marker', 'line', 'width')]) == {0.8}
+
+
+def test_food_items_grid_caches_only_food_groups(dashboards, update_component):
+    scope = dashboards.cities['addis'].datasets
+    groups = set(scope['lca']['Food Group'].dropna())
+    group = sorted(groups)[0]
+
+    def grid(value):
+        response = update_component('addis', [('food-items-container', 'children')], [('food-group-select', 'value', value)])
+        assert response.status_code == 200
+        return response.get_json()['response']['food-items-container']['children']
+
+    cards = grid(group)
+    assert len(cards) == (scope['lca']['Food Group'] == group).sum()
+    assert grid(group) == cards
+    for value in [None, 'bogus', ['bogus']]:
+        assert grid(value) == []
+    assert set(scope['lca_card_cache']) == groups
+
+
+def test_policies_table_pages_filtered_and_sorted_rows(dashboards, update_component):
+    df = dashboards.cities['addis'].datasets['policies']
+    expected = df[df['Year of publication'].str.contains('2017', regex=False)].sort_values(
+        'Document title', ascending=False, kind='stable')
+
+    def page(page_current):
+        response = update_component('addis', [('policies_table', 'data'), ('policies_table', 'page_count')], [
+            ('policies_table', 'page_current', page_current),
+            ('policies_table', 'page_size', 2),
+            ('policies_table', 'sort_by', [{'column_id': 'Document title', 'direction': 'desc'}]),
+            ('policies_table', 'filter_query', '{Year of publication} contains 2017')])
+        assert response.status_code == 200
+        output = response.get_json()['response']
+        return output['policies_table']['data'], output['policies_table']['page_count']
+
+    records, page_count = page(0)
+    assert page_count == -(-len(expected) // 2)
+    assert [r['Code'] for r in records + page(1)[0]] == expected['Code'].tolist()[:4]
+
+
+def test_sdg_filter_selects_the_indicators_of_the_clicked_goals(dashboards, update_component):
+    df = dashboards.cities['addis'].datasets['indicators']
+    goals = [{'type': 'sdg-filter', 'index': goal} for goal in range(1, 18)]
+    pattern = {'type': 'sdg-filter', 'index': ALL}
+
+    def click(goal, selected, match_mode='any'):
+        response = update_component(
+            'addis',
+            [('indicators_table', 'page_current'), ('sdg-filter-status', 'children'),
+             (pattern, 'className', goals), ('sdg-selected', 'data')],
+            [(pattern, 'n_clicks', [(button, 1 if button['index'] == goal else None) for button in goals]),
+             ('sdg-clear-filter', 'n_clicks', None),
+             ('sdg-match-mode', 'value', match_mode)],
+            state=[('sdg-selected', 'data', selected)],
+            changed=(goals[goal - 1], 'n_clicks'))
+        assert response.status_code == 200
+        return response.get_json()['response']
+
+    output = click(2, ['1'])
+    assert output['sdg-selected']['data'] == ['1', '2']
+    classes = [output[stringify_id(button)]['className'] for button in goals]
+    assert [goal for goal, name in enumerate(classes, 1) if sdg_filter_selected_class in name.split()] == [1, 2]
+    assert click(2, ['1', '2'])['sdg-selected']['data'] == ['1']
+
+    def indicators(selected, match_mode):
+        response = update_component(
+            'addis',
+            [('indicators_table', 'data'), ('indicators_table', 'page_count'), ('indicators_table', 'tooltip_data')],
+            [('indicators_table', 'page_current', 0), ('indicators_table', 'page_size', len(df)),
+             ('indicators_table', 'sort_by', []), ('indicators_table', 'filter_query', ''),
+             ('sdg-selected', 'data', selected), ('sdg-match-mode', 'value', match_mode)])
+        assert response.status_code == 200
+        return response.get_json()['response']['indicators_table']['data']
+
+    numbers = df['SDG Numbers'].fillna('').map(lambda value: {n.strip() for n in value.split(',')})
+    assert len(indicators(['1', '2'], 'any')) == numbers.map(lambda n: bool(n & {'1', '2'})).sum()
+    assert len(indicators(['1', '2'], 'all')) == numbers.map(lambda n: {'1', '2'} <= n).sum()
+    assert len(indicators([], 'any')) == len(df)
+
+
+def test_sankey_of_a_year_without_supply_data_is_empty(dashboards, update_component):
+    def slide(value):
+        response = update_component(
+            'hanoi', [('kpi-total-flow', 'children'), ('urban-indicator', 'figure'), ('sankey-graph', 'figure')],
+            [('slider', 'value', value)])
+        assert response.status_code == 200
+        output = response.get_json()['response']
+        return output['kpi-total-flow']['children'], output['sankey-graph']['figure']['data'][0]
+
+    total_flow, sankey = slide(2022)
+    assert total_flow != "0" and sankey['node']['label']
+    for value in [2011, None, 'bogus']:
+        total_flow, sankey = slide(value)
+        assert total_flow == "0" and not sankey['node'].get('label')
+
+
+@pytest.mark.parametrize('warm_start', [False, True])
+def test_bar_chart_of_every_variable(dashboards, update_component, monkeypatch, warm_start):
+    monkeypatch.setattr(dashboards, 'warm_start', warm_start)
+
+    def bar(slug, value):
+        return update_component(slug, [('bar-plot', 'figure')], [('variable-dropdown', 'value', value)])
+
+    for slug, dashboard in dashboards.cities.items():
+        mpi_long = dashboard.datasets['mpi_long']
+        for variable in dashboard.datasets['mpi_variables']:
+            response = bar(slug, variable)
+            assert response.status_code == 200
+            figure = response.get_json()['response']['bar-plot']['figure']
+            assert len(figure['data'][0]['y']) == (mpi_long['Variable'] == variable).sum()
+
+        # A cleared dropdown or an unknown variable leaves the chart as it is
+        for value in [None, 'bogus']:
+            response = bar(slug, value)
+            assert response.status_code == 200
+            assert 'bar-plot' not in response.get_json()['response']
+
+
+@pytest.mark.parametrize('trend, dropdown, dataset', [
+    ('affordability-trend', 'affordability-filter-dropdown', 'affordability_trends'),
+    ('health-trend', 'health-filter-dropdown', 'health_trends'),
+])
+def test_trend_charts_only_build_table_categories(dashboards, update_component, trend, dropdown, dataset):
+    store = dashboards.cities['hanoi'].datasets[dataset]
+
+    def select(value):
+        response = update_component('hanoi', [(trend, 'figure')], [(dropdown, 'value', value)])
+        assert response.status_code == 200
+        return response.get_json()['response']
+
+    for category in store.categories():
+        figure = select(category)[trend]['figure']
+        assert [trace['name'] for trace in figure['data']] == [group for group, _, _ in store.series[category]]
+    for value in [None, 'bogus']:
+        assert trend not in select(value)
+    assert set(store._figures) == set(store.categories())
+
+
+@pytest.mark.parametrize('slug, output, trigger, value', [
+    ('hanoi', ('diet-dumbell', 'figure'), ('dumbell-slider', 'value'), 2013),
+    ('hanoi', ('bar-plot', 'figure'), ('variable-dropdown', 'value'), 'Assets'),
+    ('addis', ('map_foodoutlets', 'figure'), ('variable-dropdown', 'value'), None),
+])
+def test_memoized_callbacks_serve_the_cached_output(dashboards, update_component, monkeypatch, slug, output, trigger, value):
+    monkeypatch.setattr(dashboards, 'warm_start', False)
+
+    def call():
+        response = update_component(slug, [output], [(*trigger, value)])
+        assert response.status_code == 200
+        return response.get_json()['response'][output[0]][output[1]]
+
+    def counts():
+        stats = dashboards.figure_cache.stats().values()
+        return sum(s['hits'] for s in stats), sum(s['misses'] for s in stats)
+
+    first = call()
+    hits, misses = counts()
+    assert misses == 1
+    assert call() == first
+    assert counts() == (hits + 1, misses)
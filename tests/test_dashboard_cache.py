@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+pytest.importorskip('plotly')
+from dashboard_cache import DiskBackend, FigureCache, RedisBackend
+
+
+class Datasets:
+    """Stand-in for a DatasetRegistry whose files never change."""
+
+    def fingerprint(self, *names):
+        return tuple((name, 0.0) for name in names)
+
+
+def cached_figure_function(cache, calls):
+    @cache.memoize(Datasets(), depends=['mpi_long'], name='bar')
+    def figure(variable):
+        calls.append(variable)
+        return {'data': [{'type': 'bar', 'x': [1, 2], 'name': variable}], 'layout': {}}
+    return figure
+
+
+def test_redis_backend_hits_misses_and_clear():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    client.set('other:key', 'kept')
+    cache = FigureCache(RedisBackend(client))
+    calls = []
+    figure = cached_figure_function(cache, calls)
+
+    first = figure('Income')
+    assert figure('Income') == first
+    figure('Education')
+    assert calls == ['Income', 'Education']
+    assert cache.stats() == {'bar': {'hits': 1, 'misses': 2}}
+    assert all(client.ttl(key) > 0 for key in client.scan_iter(match='dashboard:figures:*'))
+
+    # Another process sharing the server hits the stored entry
+    assert cached_figure_function(FigureCache(RedisBackend(client)), calls)('Income') == first
+    assert calls == ['Income', 'Education']
+
+    cache.clear()
+    assert cache.stats() == {}
+    assert list(client.scan_iter(match='dashboard:figures:*')) == []
+    assert client.get('other:key') == b'kept'
+    figure('Income')
+    assert calls == ['Income', 'Education', 'Income']
+
+
+def test_disk_backend_evicts_least_recently_used(tmp_path):
+    backend = DiskBackend(str(tmp_path), max_bytes=350)
+    for key in 'abc':
+        backend.set(key, 'x' * 100)
+        os.utime(tmp_path / f'{key}.json', (0, {'a': 1, 'b': 2, 'c': 3}[key]))
+    backend.get('a')  # Now the most recently used
+
+    backend.set('d', 'x' * 100)
+    assert backend.get('b') is None and backend.get('c') is None
+    assert backend.get('a') is not None and backend.get('d') is not None
+
+    backend.clear()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,84 @@
+import os
+
+import pandas as pd
+
+from dashboard_data import DatasetRegistry, TableQuery, TrendStore, boundary_file, split_filter_part
+
+
+def policies():
+    return TableQuery(pd.DataFrame({
+        'Title': ['Food policy', 'Urban plan', 'Nutrition strategy', 'Water act'],
+        'Year of publication': ['2017', '2015', '2017-2020', '2009'],
+        'SDG Numbers': ['1, 2', '11', '2, 3', '6'],
+        'Budget': [10.0, 2.5, None, 30.0],
+    }))
+
+
+def matches(query, filter_query):
+    return query.positions(filter_query).tolist()
+
+
+def test_split_filter_part_keeps_values_as_typed():
+    assert split_filter_part('{Year of publication} contains 2017') == ('Year of publication', 'contains', '2017')
+    assert split_filter_part('{Title} contains "Food"') == ('Title', 'contains', 'Food')
+    assert split_filter_part('{Budget} >= 10') == ('Budget', 'ge', '10')
+
+
+def test_unquoted_number_matches_text_columns():
+    query = policies()
+    assert matches(query, '{Year of publication} contains 2017') == [0, 2]
+    assert matches(query, '{Year of publication} contains 2017') == matches(query, '{Year of publication} contains "2017"')
+    assert matches(query, '{SDG Numbers} contains 1') == [0, 1]
+    assert matches(query, '{Year of publication} datestartswith 20') == [0, 1, 2, 3]
+
+
+def test_comparisons_are_numeric_on_numeric_columns():
+    query = policies()
+    assert matches(query, '{Budget} >= 10') == [0, 3]
+    assert matches(query, '{Budget} < 5') == [1]
+    assert matches(query, '{Year of publication} = 2017') == [0]
+    assert matches(query, '{Budget} >= 10 && {Title} icontains food') == [0]
+
+
+def test_comparisons_on_text_columns():
+    query = policies()
+    assert matches(query, '{Title} = "Urban plan"') == [1]
+    assert matches(query, '{Title} ieq "water act"') == [3]
+
+
+def test_fingerprint_covers_simplified_boundaries(tmp_path):
+    source, build = tmp_path / 'data', tmp_path / 'build'
+    source.mkdir()
+    (source / 'addis_adm3_mpi.geojson').write_text('{}')
+    datasets = DatasetRegistry(str(source) + os.sep, build_path=str(build) + os.sep)
+    datasets.register('mpi', 'addis_adm3_mpi.geojson')(lambda: None)
+    before = datasets.fingerprint('mpi')
+
+    simplified = boundary_file(str(build), 'addis_adm3_mpi.geojson', 10)
+    os.makedirs(os.path.dirname(simplified))
+    with open(simplified, 'w') as f:
+        f.write('{}')
+    after = datasets.fingerprint('mpi')
+    assert after != before
+    assert ('boundaries/addis_adm3_mpi.z10.geojson', os.path.getmtime(simplified)) in after
+
+
+def test_trend_store_memoizes_only_table_categories():
+    store = TrendStore(pd.DataFrame({
+        'Cat': ['a', 'a', 'a', 'b'],
+        'Reg': ['x', 'x', 'y', 'x'],
+        'Year': [2020, 2021, 2020, 2020],
+        'value': [1, 2, 3, 4],
+    }))
+    built = []
+
+    def build(series):
+        built.append(series)
+        return {'groups': [group for group, _, _ in series]}
+
+    assert store.figure('a', build) == {'groups': ['x', 'y']}
+    assert store.figure('a', build) is store.figure('a', build)
+    assert len(built) == 1
+    for category in [None, 'bogus', ['a']]:
+        assert store.figure(category, build) is None
+    assert list(store._figures) == ['a']
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dashboard_figures import sankey_year_links
+
+data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'data')
+
+
+def per_request_links(df_sankey, year):
+    """Links and KPIs of one year as the supply callback aggregated them on every slider move"""
+    df_sankey_filt = df_sankey[df_sankey['Year'] == year]
+    flow1 = df_sankey_filt[['province', 'Target', 'Supply to Hanoi']].rename(
+        columns={'province': 'source', 'Target': 'target', 'Supply to Hanoi': 'supply'})
+    flow2 = df_sankey_filt[['Target', 'Target_1', 'Rice supply']].rename(
+        columns={'Target': 'source', 'Target_1': 'target', 'Rice supply': 'supply'})
+    flow2 = flow2.groupby(['source', 'target']).sum().reset_index()
+    df_sankey_final = pd.concat([flow1.drop_duplicates(), flow2], ignore_index=True)
+
+    links = dict(zip(zip(df_sankey_final['source'], df_sankey_final['target']), df_sankey_final['supply']))
+    urban_share = flow2.set_index('target').loc['Hanoi urban', 'supply'] / flow2['supply'].sum() * 100
+    return links, flow1.drop_duplicates()['supply'].sum(), urban_share
+
+
+@pytest.mark.parametrize('year', [2010, 2022])
+def test_sankey_year_links_match_the_per_request_aggregation(year):
+    df_sankey = pd.read_csv(os.path.join(data_path, 'hanoi_supply.csv'))
+    links = sankey_year_links(df_sankey)[year]
+    expected, total_flow, urban_share = per_request_links(df_sankey, year)
+
+    labels = links['labels']
+    assert sorted(labels) == sorted(set(label for pair in expected for label in pair))
+    assert {(labels[s], labels[t]): v for s, t, v in zip(links['source'], links['target'], links['value'])} \
+        == pytest.approx(expected)
+    assert links['total_flow'] == pytest.approx(total_flow)
+    assert links['urban_share'] == pytest.approx(urban_share)
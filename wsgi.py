@@ -0,0 +1,21 @@
+"""
+WSGI entry point serving every city dashboard, for production servers:
+
+    gunicorn wsgi:server                                        # settings in gunicorn.conf.py
+    uwsgi --master --processes 4 --http :8050 --module wsgi:server
+
+Unless DASHBOARD_PRELOAD=0 is set, every dataset, figure and tab layout is loaded here, in the
+master process. Both commands above import this module before forking the workers (gunicorn
+through preload_app in gunicorn.conf.py, uwsgi unless --lazy-apps is given), so the workers
+share that memory copy-on-write instead of each loading its own copy.
+"""
+import logging
+
+from dashboard_app import env_flag, load_cities, preload
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+server = load_cities()
+
+if env_flag('DASHBOARD_PRELOAD', default=True):
+    preload()